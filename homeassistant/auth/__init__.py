@@ -4,14 +4,20 @@ from __future__ import annotations
 import asyncio
 from collections import OrderedDict
 from datetime import timedelta
-from typing import Any, Dict, List, Optional, Tuple, cast
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
 
 import jwt
 
 from homeassistant import data_entry_flow
-from homeassistant.auth.const import ACCESS_TOKEN_EXPIRATION
+from homeassistant.auth.const import (
+    ACCESS_TOKEN_CACHE_SIZE,
+    ACCESS_TOKEN_CACHE_TTL,
+    ACCESS_TOKEN_EXPIRATION,
+)
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.util import dt as dt_util
+from homeassistant.util.lru import LRU
 
 from . import auth_store, models
 from .const import GROUP_ID_ADMIN
@@ -155,6 +161,10 @@ class AuthManager:
         self._providers = providers
         self._mfa_modules = mfa_modules
         self.login_flow = AuthManagerFlowManager(hass, self)
+        # Verified access tokens with the time they have to be verified again
+        self._access_token_cache: LRU[str, Tuple[models.RefreshToken, float]] = LRU(
+            ACCESS_TOKEN_CACHE_SIZE
+        )
 
     @property
     def auth_providers(self) -> List[AuthProvider]:
@@ -288,6 +298,9 @@ class AuthManager:
             await asyncio.wait(tasks)
 
         await self._store.async_remove_user(user)
+        self._async_invalidate_access_tokens(
+            lambda refresh_token: refresh_token.user is user
+        )
 
         self.hass.bus.async_fire(EVENT_USER_REMOVED, {"user_id": user.id})
 
@@ -321,6 +334,9 @@ class AuthManager:
         if user.is_owner:
             raise ValueError("Unable to deactivate the owner")
         await self._store.async_deactivate_user(user)
+        self._async_invalidate_access_tokens(
+            lambda refresh_token: refresh_token.user is user
+        )
 
     async def async_remove_credentials(self, credentials: models.Credentials) -> None:
         """Remove credentials."""
@@ -447,6 +463,9 @@ class AuthManager:
     ) -> None:
         """Delete a refresh token."""
         await self._store.async_remove_refresh_token(refresh_token)
+        self._async_invalidate_access_tokens(
+            lambda cached_token: cached_token.id == refresh_token.id
+        )
 
     @callback
     def async_create_access_token(
@@ -505,7 +524,22 @@ class AuthManager:
     async def async_validate_access_token(
         self, token: str
     ) -> Optional[models.RefreshToken]:
-        """Return refresh token if an access token is valid."""
+        """Return refresh token if an access token is valid.
+
+        Verified tokens are cached until they expire, so the
+        same token is not decoded again on every request.
+        """
+        cached = self._access_token_cache.get(token)
+        if cached is not None:
+            refresh_token, verify_after = cached
+            if (
+                time.time() < verify_after
+                and refresh_token.user.is_active
+                and refresh_token.id in refresh_token.user.refresh_tokens
+            ):
+                return refresh_token
+            self._access_token_cache.pop(token)
+
         try:
             unverif_claims = jwt.decode(token, verify=False)
         except jwt.InvalidTokenError:
@@ -523,15 +557,33 @@ class AuthManager:
             issuer = refresh_token.id
 
         try:
-            jwt.decode(token, jwt_key, leeway=10, issuer=issuer, algorithms=["HS256"])
+            claims = jwt.decode(
+                token, jwt_key, leeway=10, issuer=issuer, algorithms=["HS256"]
+            )
         except jwt.InvalidTokenError:
             return None
 
         if refresh_token is None or not refresh_token.user.is_active:
             return None
 
+        now = time.time()
+        verify_after = now + ACCESS_TOKEN_CACHE_TTL.total_seconds()
+        if "exp" in claims:
+            verify_after = min(verify_after, claims["exp"])
+        if verify_after > now:
+            self._access_token_cache[token] = (refresh_token, verify_after)
+
         return refresh_token
 
+    @callback
+    def _async_invalidate_access_tokens(
+        self, match: Callable[[models.RefreshToken], bool]
+    ) -> None:
+        """Remove the cached access tokens of matching refresh tokens."""
+        for token, (refresh_token, _) in list(self._access_token_cache.items()):
+            if match(refresh_token):
+                self._access_token_cache.pop(token)
+
     @callback
     def _async_get_auth_provider(
         self, credentials: models.Credentials
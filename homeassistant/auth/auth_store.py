@@ -2,8 +2,10 @@
 import asyncio
 from collections import OrderedDict
 from datetime import timedelta
+import hashlib
 import hmac
 from logging import getLogger
+import secrets
 from typing import Any, Dict, List, Optional
 
 from homeassistant.auth.const import ACCESS_TOKEN_EXPIRATION
@@ -41,6 +43,12 @@ class AuthStore:
             STORAGE_VERSION, STORAGE_KEY, private=True
         )
         self._lock = asyncio.Lock()
+        # Refresh tokens indexed by id and by a keyed hash of the token.
+        # The hash key is random, so the dict lookup by the hash does not
+        # reveal anything about the tokens that can be timed.
+        self._refresh_tokens: Dict[str, models.RefreshToken] = {}
+        self._token_hash_key = secrets.token_bytes(32)
+        self._refresh_tokens_by_hash: Dict[bytes, models.RefreshToken] = {}
 
     async def async_get_groups(self) -> List[models.Group]:
         """Retrieve all users."""
@@ -141,6 +149,8 @@ class AuthStore:
             assert self._users is not None
 
         self._users.pop(user.id)
+        for refresh_token in user.refresh_tokens.values():
+            self._async_unindex_refresh_token(refresh_token)
         self._async_schedule_save()
 
     async def async_update_user(
@@ -225,6 +235,7 @@ class AuthStore:
 
         refresh_token = models.RefreshToken(**kwargs)
         user.refresh_tokens[refresh_token.id] = refresh_token
+        self._async_index_refresh_token(refresh_token)
 
         self._async_schedule_save()
         return refresh_token
@@ -237,10 +248,13 @@ class AuthStore:
             await self._async_load()
             assert self._users is not None
 
-        for user in self._users.values():
-            if user.refresh_tokens.pop(refresh_token.id, None):
-                self._async_schedule_save()
-                break
+        indexed_token = self._refresh_tokens.get(refresh_token.id)
+        if indexed_token is None:
+            return
+
+        self._async_unindex_refresh_token(indexed_token)
+        indexed_token.user.refresh_tokens.pop(indexed_token.id, None)
+        self._async_schedule_save()
 
     async def async_get_refresh_token(
         self, token_id: str
@@ -250,12 +264,7 @@ class AuthStore:
             await self._async_load()
             assert self._users is not None
 
-        for user in self._users.values():
-            refresh_token = user.refresh_tokens.get(token_id)
-            if refresh_token is not None:
-                return refresh_token
-
-        return None
+        return self._refresh_tokens.get(token_id)
 
     async def async_get_refresh_token_by_token(
         self, token: str
@@ -265,14 +274,35 @@ class AuthStore:
             await self._async_load()
             assert self._users is not None
 
-        found = None
+        refresh_token = self._refresh_tokens_by_hash.get(self._token_hash(token))
+        # Compare the tokens themselves as well, in constant time
+        if refresh_token is None or not hmac.compare_digest(refresh_token.token, token):
+            return None
 
-        for user in self._users.values():
-            for refresh_token in user.refresh_tokens.values():
-                if hmac.compare_digest(refresh_token.token, token):
-                    found = refresh_token
+        return refresh_token
+
+    def _token_hash(self, token: str) -> bytes:
+        """Return the keyed hash of a refresh token value."""
+        return hmac.new(
+            self._token_hash_key, token.encode("utf-8"), hashlib.sha256
+        ).digest()
 
-        return found
+    @callback
+    def _async_index_refresh_token(self, refresh_token: models.RefreshToken) -> None:
+        """Add a refresh token to the indexes."""
+        self._refresh_tokens[refresh_token.id] = refresh_token
+        self._refresh_tokens_by_hash[
+            self._token_hash(refresh_token.token)
+        ] = refresh_token
+
+    @callback
+    def _async_unindex_refresh_token(self, refresh_token: models.RefreshToken) -> None:
+        """Remove a refresh token from the indexes."""
+        if self._refresh_tokens.get(refresh_token.id) is refresh_token:
+            self._refresh_tokens.pop(refresh_token.id)
+        token_hash = self._token_hash(refresh_token.token)
+        if self._refresh_tokens_by_hash.get(token_hash) is refresh_token:
+            self._refresh_tokens_by_hash.pop(token_hash)
 
     @callback
     def async_log_refresh_token_usage(
@@ -476,6 +506,7 @@ class AuthStore:
                 version=rt_dict.get("version"),
             )
             users[rt_dict["user_id"]].refresh_tokens[token.id] = token
+            self._async_index_refresh_token(token)
 
         self._groups = groups
         self._users = users
@@ -2,6 +2,10 @@
 from datetime import timedelta
 
 ACCESS_TOKEN_EXPIRATION = timedelta(minutes=30)
+# Verified access tokens are cached until they expire,
+# but no longer than the TTL to verify long-lived tokens again
+ACCESS_TOKEN_CACHE_SIZE = 1024
+ACCESS_TOKEN_CACHE_TTL = timedelta(minutes=5)
 MFA_SESSION_EXPIRATION = timedelta(minutes=5)
 
 GROUP_ID_ADMIN = "system-admin"
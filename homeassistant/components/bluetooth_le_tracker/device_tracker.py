@@ -14,10 +14,7 @@ from homeassistant.components.device_tracker.const import (
     SCAN_INTERVAL,
     SOURCE_TYPE_BLUETOOTH_LE,
 )
-from homeassistant.components.device_tracker.legacy import (
-    YAML_DEVICES,
-    async_load_config,
-)
+from homeassistant.components.device_tracker.legacy import async_load_known_devices
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import track_point_in_utc_time
@@ -115,7 +112,6 @@ def setup_scanner(hass, config, see, discovery_info=None):
             return {}
         return devices
 
-    yaml_path = hass.config.path(YAML_DEVICES)
     devs_to_track = []
     devs_donot_track = []
     devs_track_battery = {}
@@ -124,7 +120,7 @@ def setup_scanner(hass, config, see, discovery_info=None):
     # We just need the devices so set consider_home and home range
     # to 0
     for device in asyncio.run_coroutine_threadsafe(
-        async_load_config(yaml_path, hass, 0), hass.loop
+        async_load_known_devices(hass, timedelta(0)), hass.loop
     ).result():
         # check if device is a valid bluetooth device
         if device.mac and device.mac[:4].upper() == BLE_PREFIX:
@@ -1,5 +1,6 @@
 """Tracking for bluetooth devices."""
 import asyncio
+from datetime import timedelta
 import logging
 from typing import List, Optional, Set, Tuple
 
@@ -15,10 +16,7 @@ from homeassistant.components.device_tracker.const import (
     SCAN_INTERVAL,
     SOURCE_TYPE_BLUETOOTH,
 )
-from homeassistant.components.device_tracker.legacy import (
-    YAML_DEVICES,
-    async_load_config,
-)
+from homeassistant.components.device_tracker.legacy import async_load_known_devices
 from homeassistant.const import CONF_DEVICE_ID
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
@@ -85,9 +83,7 @@ async def get_tracking_devices(hass: HomeAssistantType) -> Tuple[Set[str], Set[s
 
     We just need the devices so set consider_home and home range to 0
     """
-    yaml_path: str = hass.config.path(YAML_DEVICES)
-
-    devices = await async_load_config(yaml_path, hass, 0)
+    devices = await async_load_known_devices(hass, timedelta(0))
     bluetooth_devices = [device for device in devices if is_bluetooth_device(device)]
 
     devices_to_track: Set[str] = {
@@ -2,8 +2,9 @@
 import asyncio
 from datetime import timedelta
 import hashlib
+import os
 from types import ModuleType
-from typing import Any, Callable, Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import attr
 import voluptuous as vol
@@ -27,7 +28,7 @@ from homeassistant.const import (
 )
 from homeassistant.core import callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import config_per_platform, discovery
+from homeassistant.helpers import config_per_platform, discovery, singleton
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity_registry import async_get_registry
 from homeassistant.helpers.event import (
@@ -35,6 +36,7 @@ from homeassistant.helpers.event import (
     async_track_utc_time_change,
 )
 from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType, GPSType, HomeAssistantType
 from homeassistant.setup import async_prepare_setup_platform
 from homeassistant.util import dt as dt_util
@@ -115,6 +117,27 @@ SERVICE_SEE_PAYLOAD_SCHEMA = vol.Schema(
 YAML_DEVICES = "known_devices.yaml"
 EVENT_NEW_DEVICE = "device_tracker_new_device"
 
+DATA_KNOWN_DEVICES = "device_tracker_known_devices"
+STORAGE_KEY = f"{DOMAIN}.known_devices"
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+KNOWN_DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Optional(CONF_ICON, default=None): vol.Any(None, cv.icon),
+        vol.Optional("track", default=False): cv.boolean,
+        vol.Optional(CONF_MAC, default=None): vol.Any(
+            None, vol.All(cv.string, vol.Upper)
+        ),
+        vol.Optional("gravatar", default=None): vol.Any(None, cv.string),
+        vol.Optional("picture", default=None): vol.Any(None, cv.string),
+        vol.Optional(CONF_CONSIDER_HOME): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
+    }
+)
+
 
 def see(
     hass: HomeAssistantType,
@@ -366,8 +389,6 @@ def async_setup_scanner_platform(
 
 async def get_tracker(hass, config):
     """Create a tracker."""
-    yaml_path = hass.config.path(YAML_DEVICES)
-
     conf = config.get(DOMAIN, [])
     conf = conf[0] if conf else {}
     consider_home = conf.get(CONF_CONSIDER_HOME, DEFAULT_CONSIDER_HOME)
@@ -377,7 +398,7 @@ async def get_tracker(hass, config):
     if track_new is None:
         track_new = defaults.get(CONF_TRACK_NEW, DEFAULT_TRACK_NEW)
 
-    devices = await async_load_config(yaml_path, hass, consider_home)
+    devices = await async_load_known_devices(hass, consider_home)
     tracker = DeviceTracker(hass, consider_home, track_new, defaults, devices)
     return tracker
 
@@ -536,7 +557,7 @@ class DeviceTracker:
             },
         )
 
-        # update known_devices.yaml
+        # update known_devices.yaml and the known devices store
         self.hass.async_create_task(
             self.async_update_config(
                 self.hass.config.path(YAML_DEVICES), dev_id, device
@@ -544,14 +565,13 @@ class DeviceTracker:
         )
 
     async def async_update_config(self, path, dev_id, device):
-        """Add device to YAML configuration file.
+        """Add device to YAML configuration file and the known devices store.
 
         This method is a coroutine.
         """
         async with self._is_updating:
-            await self.hass.async_add_executor_job(
-                update_config, self.hass.config.path(YAML_DEVICES), dev_id, device
-            )
+            known_devices = await async_get_known_devices(self.hass)
+            await known_devices.async_add_device(path, device)
 
     @callback
     def async_update_stale(self, now: dt_util.dt.datetime):
@@ -811,49 +831,173 @@ class DeviceScanner:
         return await self.hass.async_add_executor_job(self.get_extra_attributes, device)
 
 
-async def async_load_config(
-    path: str, hass: HomeAssistantType, consider_home: timedelta
-):
-    """Load devices from YAML configuration file.
+class KnownDevices:
+    """Keep track of the known devices of the legacy device trackers.
 
-    This method is a coroutine.
+    Devices are indexed by device id and persisted with a delayed save, so
+    discovering many new devices only results in a single write. Entries in
+    known_devices.yaml take precedence over the stored devices and the file
+    is only parsed again when it has been modified.
     """
-    dev_schema = vol.Schema(
-        {
-            vol.Required(CONF_NAME): cv.string,
-            vol.Optional(CONF_ICON, default=None): vol.Any(None, cv.icon),
-            vol.Optional("track", default=False): cv.boolean,
-            vol.Optional(CONF_MAC, default=None): vol.Any(
-                None, vol.All(cv.string, vol.Upper)
-            ),
-            vol.Optional("gravatar", default=None): vol.Any(None, cv.string),
-            vol.Optional("picture", default=None): vol.Any(None, cv.string),
-            vol.Optional(CONF_CONSIDER_HOME, default=consider_home): vol.All(
-                cv.time_period, cv.positive_timedelta
-            ),
+
+    def __init__(self, hass: HomeAssistantType) -> None:
+        """Initialize the known devices."""
+        self.hass = hass
+        self.devices: Dict[str, dict] = {}
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._yaml_mtime: Optional[float] = None
+        self._yaml_dev_ids: List[str] = []
+
+    async def async_load(self) -> None:
+        """Load the known devices and merge known_devices.yaml over them."""
+        data = await self._store.async_load()
+
+        if data is not None:
+            self.devices = {device["dev_id"]: device for device in data["devices"]}
+            self._yaml_mtime = data["yaml_mtime"]
+            self._yaml_dev_ids = data["yaml_dev_ids"]
+
+        path = self.hass.config.path(YAML_DEVICES)
+        mtime = await self.hass.async_add_executor_job(_get_mtime, path)
+        if mtime == self._yaml_mtime:
+            return
+
+        yaml_devices, valid = await _async_load_yaml_devices(path, self.hass)
+
+        for dev_id, device in yaml_devices.items():
+            gravatar = device.pop("gravatar")
+            if gravatar is not None:
+                device["picture"] = get_gravatar_for_email(gravatar)
+            consider_home = device.pop(CONF_CONSIDER_HOME, None)
+            if consider_home is not None:
+                device[CONF_CONSIDER_HOME] = consider_home.total_seconds()
+            device["dev_id"] = dev_id
+            self.devices[dev_id] = device
+
+        # Keep everything around until the file is fixed, the next start
+        # will parse it again.
+        if not valid:
+            return
+
+        for dev_id in self._yaml_dev_ids:
+            if dev_id not in yaml_devices:
+                self.devices.pop(dev_id, None)
+
+        self._yaml_mtime = mtime
+        self._yaml_dev_ids = list(yaml_devices)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_get_devices(self, consider_home: timedelta) -> List["Device"]:
+        """Create the devices, falling back to consider_home."""
+        return [
+            Device(
+                self.hass,
+                timedelta(seconds=device[CONF_CONSIDER_HOME])
+                if CONF_CONSIDER_HOME in device
+                else consider_home,
+                device["track"],
+                device["dev_id"],
+                device[CONF_MAC],
+                device[CONF_NAME],
+                picture=device["picture"],
+                icon=device[CONF_ICON],
+            )
+            for device in self.devices.values()
+        ]
+
+    async def async_add_device(self, path: str, device: "Device") -> None:
+        """Add a device to a YAML file and schedule saving the known devices.
+
+        New devices are still added to known_devices.yaml, so they can be
+        renamed or untracked there.
+        """
+        self.devices[device.dev_id] = {
+            "dev_id": device.dev_id,
+            CONF_NAME: device.name,
+            CONF_MAC: device.mac,
+            CONF_ICON: device.icon,
+            "picture": device.config_picture,
+            "track": device.track,
         }
-    )
-    result = []
+        old_mtime, mtime = await self.hass.async_add_executor_job(
+            _append_yaml_device, path, device
+        )
+
+        if path == self.hass.config.path(YAML_DEVICES):
+            self._yaml_dev_ids.append(device.dev_id)
+            # Only parse the file again on the next start if it was also
+            # modified by something else since it was parsed.
+            if old_mtime == self._yaml_mtime:
+                self._yaml_mtime = mtime
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return data of the known devices to store in a file."""
+        return {
+            "devices": list(self.devices.values()),
+            "yaml_mtime": self._yaml_mtime,
+            "yaml_dev_ids": self._yaml_dev_ids,
+        }
+
+
+@singleton.singleton(DATA_KNOWN_DEVICES)
+async def async_get_known_devices(hass: HomeAssistantType) -> KnownDevices:
+    """Return the loaded known devices."""
+    known_devices = KnownDevices(hass)
+    await known_devices.async_load()
+    return known_devices
+
+
+async def async_load_known_devices(
+    hass: HomeAssistantType, consider_home: timedelta
+) -> List["Device"]:
+    """Load devices from the known devices store.
+
+    This method is a coroutine.
+    """
+    known_devices = await async_get_known_devices(hass)
+    return known_devices.async_get_devices(consider_home)
+
+
+def _get_mtime(path: str) -> Optional[float]:
+    """Return the modification time of a file or None if it does not exist."""
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+
+async def _async_load_yaml_devices(
+    path: str, hass: HomeAssistantType
+) -> Tuple[Dict[str, dict], bool]:
+    """Load and validate the devices of a YAML configuration file.
+
+    Also return if all devices in the file were valid.
+    """
+    result: Dict[str, dict] = {}
     try:
         devices = await hass.async_add_executor_job(load_yaml_config_file, path)
     except HomeAssistantError as err:
         LOGGER.error("Unable to load %s: %s", path, str(err))
-        return []
+        return result, False
     except FileNotFoundError:
-        return []
+        return result, True
 
+    valid = True
     for dev_id, device in devices.items():
         # Deprecated option. We just ignore it to avoid breaking change
         device.pop("vendor", None)
         device.pop("hide_if_away", None)
         try:
-            device = dev_schema(device)
-            device["dev_id"] = cv.slugify(dev_id)
+            device = KNOWN_DEVICE_SCHEMA(device)
+            result[cv.slugify(dev_id)] = device
         except vol.Invalid as exp:
             async_log_exception(exp, dev_id, devices, hass)
-        else:
-            result.append(Device(hass, **device))
-    return result
+            valid = False
+    return result, valid
 
 
 def update_config(path: str, dev_id: str, device: Device):
@@ -872,6 +1016,16 @@ def update_config(path: str, dev_id: str, device: Device):
         out.write(dump(device))
 
 
+def _append_yaml_device(path: str, device: Device) -> Tuple[Optional[float], float]:
+    """Add device to YAML configuration file.
+
+    Return the modification time of the file before and after adding it.
+    """
+    old_mtime = _get_mtime(path)
+    update_config(path, device.dev_id, device)
+    return old_mtime, os.path.getmtime(path)
+
+
 def get_gravatar_for_email(email: str):
     """Return an 80px Gravatar for the given email address.
 
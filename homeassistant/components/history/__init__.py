@@ -1,38 +1,59 @@
 """Provide pre-made queries on top of the recorder component."""
+import asyncio
 from collections import defaultdict
 from datetime import datetime as dt, timedelta
+from functools import lru_cache
 from itertools import groupby
 import json
 import logging
+import re
+import threading
 import time
 from typing import Iterable, Optional, cast
 
 from aiohttp import web
+from aiohttp.hdrs import CONTENT_TYPE
 from sqlalchemy import and_, bindparam, func, not_, or_
 from sqlalchemy.ext import baked
 import voluptuous as vol
 
-from homeassistant.components import recorder
+from homeassistant.components import recorder, websocket_api
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.recorder.models import (
+    StateAttributes,
     States,
     process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
+from homeassistant.components.recorder.statistics import (
+    PERIOD_HOUR,
+    STATISTIC_PERIODS,
+    list_statistic_ids,
+    statistics_during_period,
+)
 from homeassistant.components.recorder.util import execute, session_scope
 from homeassistant.const import (
     CONF_DOMAINS,
     CONF_ENTITIES,
     CONF_EXCLUDE,
     CONF_INCLUDE,
+    CONTENT_TYPE_JSON,
+    EVENT_STATE_CHANGED,
     HTTP_BAD_REQUEST,
 )
-from homeassistant.core import Context, State, split_entity_id
+from homeassistant.core import (
+    Context,
+    HomeAssistant,
+    State,
+    callback,
+    split_entity_id,
+)
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entityfilter import (
     CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
 )
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.helpers.typing import HomeAssistantType
 import homeassistant.util.dt as dt_util
 
@@ -46,10 +67,17 @@ CONF_ORDER = "use_include_order"
 STATE_KEY = "state"
 LAST_CHANGED_KEY = "last_changed"
 
+COMPACT_START_KEY = "start"
+COMPACT_OFFSETS_KEY = "offsets"
+COMPACT_STATES_KEY = "states"
+COMPACT_ATTRIBUTES_KEY = "attributes"
+
 GLOB_TO_SQL_CHARS = {
     42: "%",  # *
     46: "_",  # .
 }
+# The same wildcards as the LIKE the globs are translated to
+LIKE_WILDCARDS_TO_RE = {"%": ".*", "_": "."}
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -75,16 +103,55 @@ NEED_ATTRIBUTE_DOMAINS = {
     "water_heater",
 }
 
-QUERY_STATES = [
+QUERY_STATES_NO_ATTR = [
     States.domain,
     States.entity_id,
     States.state,
     States.attributes,
+    States.attributes_id,
     States.last_changed,
     States.last_updated,
 ]
+QUERY_STATES = [*QUERY_STATES_NO_ATTR, StateAttributes.shared_attrs]
+
+# Keep the number of bound parameters below the SQLite limit
+MAX_ATTRIBUTES_IDS_PER_QUERY = 900
 
 HISTORY_BAKERY = "history_bakery"
+HISTORY_FILTERS = "history_filters"
+
+# The number of rows fetched at once when streaming history
+STREAM_ROWS_PER_FETCH = 1000
+# The number of entities read ahead of the client when streaming history
+STREAM_QUEUE_SIZE = 4
+
+
+def _query_states_with_attributes(session):
+    """Return a query for states joined with their shared attributes."""
+    return session.query(*QUERY_STATES).outerjoin(
+        StateAttributes, States.attributes_id == StateAttributes.attributes_id
+    )
+
+
+def _load_shared_attributes(session, states):
+    """Load the shared attributes of states queried without them."""
+    states_by_attributes_id = defaultdict(list)
+    for state in states:
+        if isinstance(state, LazyState) and state.attributes_id_to_load is not None:
+            states_by_attributes_id[state.attributes_id_to_load].append(state)
+
+    attributes_ids = list(states_by_attributes_id)
+    for idx in range(0, len(attributes_ids), MAX_ATTRIBUTES_IDS_PER_QUERY):
+        query = session.query(
+            StateAttributes.attributes_id, StateAttributes.shared_attrs
+        ).filter(
+            StateAttributes.attributes_id.in_(
+                attributes_ids[idx : idx + MAX_ATTRIBUTES_IDS_PER_QUERY]
+            )
+        )
+        for attributes_id, shared_attrs in execute(query):
+            for state in states_by_attributes_id[attributes_id]:
+                state.shared_attrs = shared_attrs
 
 
 def get_significant_states(hass, *args, **kwargs):
@@ -113,10 +180,55 @@ def _get_significant_states(
     """
     timer_start = time.perf_counter()
 
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
+    states = execute(
+        _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+            minimal_response,
+        )
+    )
+
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        elapsed = time.perf_counter() - timer_start
+        _LOGGER.debug("get_significant_states took %fs", elapsed)
+
+    return _sorted_states_to_json(
+        hass,
+        session,
+        states,
+        start_time,
+        entity_ids,
+        filters,
+        include_start_time_state,
+        minimal_response,
     )
 
+
+def _significant_states_query(
+    hass,
+    session,
+    start_time,
+    end_time,
+    entity_ids,
+    filters,
+    significant_changes_only,
+    minimal_response,
+):
+    """Return the query for the significant states, sorted by entity_id."""
+    if minimal_response:
+        # Most states of a minimal response do not include attributes,
+        # the ones that do get them from _load_shared_attributes
+        baked_query = hass.data[HISTORY_BAKERY](
+            lambda session: session.query(*QUERY_STATES_NO_ATTR)
+        )
+    else:
+        baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
+
     if significant_changes_only:
         baked_query += lambda q: q.filter(
             (
@@ -142,34 +254,15 @@ def _get_significant_states(
 
     baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
 
-    states = execute(
-        baked_query(session).params(
-            start_time=start_time, end_time=end_time, entity_ids=entity_ids
-        )
-    )
-
-    if _LOGGER.isEnabledFor(logging.DEBUG):
-        elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("get_significant_states took %fs", elapsed)
-
-    return _sorted_states_to_json(
-        hass,
-        session,
-        states,
-        start_time,
-        entity_ids,
-        filters,
-        include_start_time_state,
-        minimal_response,
+    return baked_query(session).params(
+        start_time=start_time, end_time=end_time, entity_ids=entity_ids
     )
 
 
 def state_changes_during_period(hass, start_time, end_time=None, entity_id=None):
     """Return states changes during UTC period start_time - end_time."""
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
 
         baked_query += lambda q: q.filter(
             (States.last_changed == States.last_updated)
@@ -182,7 +275,9 @@ def state_changes_during_period(hass, start_time, end_time=None, entity_id=None)
             )
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(States.entity_id, States.last_updated)
@@ -203,13 +298,13 @@ def get_last_state_changes(hass, number_of_states, entity_id):
     start_time = dt_util.utcnow()
 
     with session_scope(hass=hass) as session:
-        baked_query = hass.data[HISTORY_BAKERY](
-            lambda session: session.query(*QUERY_STATES)
-        )
+        baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
         baked_query += lambda q: q.filter(States.last_changed == States.last_updated)
 
         if entity_id is not None:
-            baked_query += lambda q: q.filter_by(entity_id=bindparam("entity_id"))
+            baked_query += lambda q: q.filter(
+                States.entity_id == bindparam("entity_id")
+            )
             entity_id = entity_id.lower()
 
         baked_query += lambda q: q.order_by(
@@ -270,7 +365,7 @@ def _get_states_with_session(
     # We have more than one entity to look at (most commonly we want
     # all entities,) so we need to do a search on all states since the
     # last recorder run started.
-    query = session.query(*QUERY_STATES)
+    query = _query_states_with_attributes(session)
 
     most_recent_states_by_date = session.query(
         States.entity_id.label("max_entity_id"),
@@ -318,9 +413,7 @@ def _get_states_with_session(
 def _get_single_entity_states_with_session(hass, session, utc_point_in_time, entity_id):
     # Use an entirely different (and extremely fast) query if we only
     # have a single entity id
-    baked_query = hass.data[HISTORY_BAKERY](
-        lambda session: session.query(*QUERY_STATES)
-    )
+    baked_query = hass.data[HISTORY_BAKERY](_query_states_with_attributes)
     baked_query += lambda q: q.filter(
         States.last_updated < bindparam("utc_point_in_time"),
         States.entity_id == bindparam("entity_id"),
@@ -363,65 +456,231 @@ def _sorted_states_to_json(
             result[ent_id] = []
 
     # Get the states at the start time
+    for state in _get_start_time_states(
+        hass, session, start_time, entity_ids, filters, include_start_time_state
+    ):
+        result[state.entity_id].append(state)
+
+    # Append all changes to it
+    for ent_id, group in groupby(states, lambda state: state.entity_id):
+        _append_entity_states(result[ent_id], ent_id, group, minimal_response)
+
+    if minimal_response:
+        _load_shared_attributes(
+            session, (state for ent_results in result.values() for state in ent_results)
+        )
+
+    # Filter out the empty lists if some states had 0 results.
+    return {key: val for key, val in result.items() if val}
+
+
+def _get_start_time_states(
+    hass, session, start_time, entity_ids, filters, include_start_time_state
+):
+    """Return the states at the start time as the first data points."""
+    if not include_start_time_state:
+        return []
+
     timer_start = time.perf_counter()
-    if include_start_time_state:
-        run = recorder.run_information_from_instance(hass, start_time)
-        for state in _get_states_with_session(
-            hass, session, start_time, entity_ids, run=run, filters=filters
-        ):
-            state.last_changed = start_time
-            state.last_updated = start_time
-            result[state.entity_id].append(state)
+    run = recorder.run_information_from_instance(hass, start_time)
+    states = _get_states_with_session(
+        hass, session, start_time, entity_ids, run=run, filters=filters
+    )
+    for state in states:
+        state.last_changed = start_time
+        state.last_updated = start_time
 
     if _LOGGER.isEnabledFor(logging.DEBUG):
         elapsed = time.perf_counter() - timer_start
-        _LOGGER.debug("getting %d first datapoints took %fs", len(result), elapsed)
+        _LOGGER.debug("getting %d first datapoints took %fs", len(states), elapsed)
+
+    return states
+
+
+def _append_entity_states(ent_results, ent_id, group, minimal_response):
+    """Append the states of one entity, sorted by last_updated."""
+    domain = split_entity_id(ent_id)[0]
+    if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
+        ent_results.extend(LazyState(db_state) for db_state in group)
+
+    # With minimal response we only provide a native
+    # State for the first and last response. All the states
+    # in-between only provide the "state" and the
+    # "last_changed".
+    if not ent_results:
+        ent_results.append(LazyState(next(group)))
+
+    prev_state = ent_results[-1]
+    initial_state_count = len(ent_results)
 
     # Called in a tight loop so cache the function
     # here
     _process_timestamp_to_utc_isoformat = process_timestamp_to_utc_isoformat
 
-    # Append all changes to it
-    for ent_id, group in groupby(states, lambda state: state.entity_id):
-        domain = split_entity_id(ent_id)[0]
-        ent_results = result[ent_id]
-        if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
-            ent_results.extend(LazyState(db_state) for db_state in group)
-
-        # With minimal response we only provide a native
-        # State for the first and last response. All the states
-        # in-between only provide the "state" and the
-        # "last_changed".
-        if not ent_results:
-            ent_results.append(LazyState(next(group)))
-
-        prev_state = ent_results[-1]
-        initial_state_count = len(ent_results)
-
-        for db_state in group:
-            # With minimal response we do not care about attribute
-            # changes so we can filter out duplicate states
-            if db_state.state == prev_state.state:
-                continue
+    for db_state in group:
+        # With minimal response we do not care about attribute
+        # changes so we can filter out duplicate states
+        if db_state.state == prev_state.state:
+            continue
+
+        ent_results.append(
+            {
+                STATE_KEY: db_state.state,
+                LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
+                    db_state.last_changed
+                ),
+            }
+        )
+        prev_state = db_state
+
+    if prev_state and len(ent_results) != initial_state_count:
+        # There was at least one state change
+        # replace the last minimal state with
+        # a full state
+        ent_results[-1] = LazyState(prev_state)
+
+
+def stream_significant_states(
+    hass,
+    write,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    significant_changes_only=True,
+    minimal_response=False,
+):
+    """Pass the significant states of each entity to write as they are read.
 
-            ent_results.append(
-                {
-                    STATE_KEY: db_state.state,
-                    LAST_CHANGED_KEY: _process_timestamp_to_utc_isoformat(
-                        db_state.last_changed
-                    ),
-                }
+    Unlike get_significant_states only the states of one entity are kept
+    in memory. The entities are sorted by entity_id.
+    """
+    with session_scope(hass=hass) as session:
+        start_time_states = {
+            state.entity_id: state
+            for state in _get_start_time_states(
+                hass, session, start_time, entity_ids, filters, include_start_time_state
             )
-            prev_state = db_state
+        }
+        without_changes = iter(sorted(start_time_states))
+        next_without_changes = next(without_changes, None)
 
-        if prev_state and len(ent_results) != initial_state_count:
-            # There was at least one state change
-            # replace the last minimal state with
-            # a full state
-            ent_results[-1] = LazyState(prev_state)
+        # Attributes are queried along with the states so
+        # nothing else is read while the rows are streamed
+        query = _significant_states_query(
+            hass,
+            session,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            significant_changes_only,
+            False,
+        ).with_post_criteria(lambda q: q.yield_per(STREAM_ROWS_PER_FETCH))
+
+        for ent_id, group in groupby(query, lambda state: state.entity_id):
+            while next_without_changes is not None and next_without_changes < ent_id:
+                write(next_without_changes, [start_time_states[next_without_changes]])
+                next_without_changes = next(without_changes, None)
+            if next_without_changes == ent_id:
+                next_without_changes = next(without_changes, None)
+
+            ent_results = []
+            if ent_id in start_time_states:
+                ent_results.append(start_time_states[ent_id])
+            _append_entity_states(ent_results, ent_id, group, minimal_response)
+            write(ent_id, ent_results)
+
+        while next_without_changes is not None:
+            write(next_without_changes, [start_time_states[next_without_changes]])
+            next_without_changes = next(without_changes, None)
+
+
+def get_significant_states_compact(
+    hass,
+    start_time,
+    end_time=None,
+    entity_ids=None,
+    filters=None,
+    include_start_time_state=True,
+    significant_changes_only=True,
+    minimal_response=False,
+):
+    """Return the significant states in the compact format.
 
-    # Filter out the empty lists if some states had 0 results.
-    return {key: val for key, val in result.items() if val}
+    Instead of a list of states each entity gets parallel lists of the
+    seconds since its first state and of the states. The attributes are
+    only included for the states they changed at.
+    """
+    with session_scope(hass=hass) as session:
+        start_time_states = {
+            state.entity_id: state
+            for state in _get_start_time_states(
+                hass, session, start_time, entity_ids, filters, include_start_time_state
+            )
+        }
+        states = execute(
+            _significant_states_query(
+                hass,
+                session,
+                start_time,
+                end_time,
+                entity_ids,
+                filters,
+                significant_changes_only,
+                False,
+            )
+        )
+
+        result = {}
+        for ent_id, group in groupby(states, lambda state: state.entity_id):
+            ent_states = [LazyState(db_state) for db_state in group]
+            if ent_id in start_time_states:
+                ent_states.insert(0, start_time_states.pop(ent_id))
+            result[ent_id] = _states_to_compact(ent_id, ent_states, minimal_response)
+
+        for ent_id, state in start_time_states.items():
+            result[ent_id] = _states_to_compact(ent_id, [state], minimal_response)
+
+        return result
+
+
+def _states_to_compact(ent_id, states, minimal_response):
+    """Convert the states of one entity to the compact format."""
+    with_attributes = (
+        not minimal_response or split_entity_id(ent_id)[0] in NEED_ATTRIBUTE_DOMAINS
+    )
+    start = states[0].last_updated.timestamp()
+    offsets = []
+    values = []
+    attributes = []
+    prev_state = None
+    prev_attributes_json = None
+
+    for state in states:
+        attributes_json = state.attributes_json
+        if prev_state is not None:
+            if state.state == prev_state.state and (
+                not with_attributes or attributes_json == prev_attributes_json
+            ):
+                continue
+            if not with_attributes:
+                attributes_json = prev_attributes_json
+
+        if attributes_json != prev_attributes_json:
+            attributes.append([len(values), state.attributes])
+            prev_attributes_json = attributes_json
+        offsets.append(round(state.last_updated.timestamp() - start, 3))
+        values.append(state.state)
+        prev_state = state
+
+    return {
+        COMPACT_START_KEY: start,
+        COMPACT_OFFSETS_KEY: offsets,
+        COMPACT_STATES_KEY: values,
+        COMPACT_ATTRIBUTES_KEY: attributes,
+    }
 
 
 def get_state(hass, utc_point_in_time, entity_id, run=None):
@@ -437,10 +696,16 @@ async def async_setup(hass, config):
     filters = sqlalchemy_filter_from_include_exclude_conf(conf)
 
     hass.data[HISTORY_BAKERY] = baked.bakery()
+    hass.data[HISTORY_FILTERS] = filters
 
     use_include_order = conf.get(CONF_ORDER)
 
     hass.http.register_view(HistoryPeriodView(filters, use_include_order))
+    hass.http.register_view(HistoryStatisticsView())
+    websocket_api.async_register_command(hass, ws_get_history_during_period)
+    websocket_api.async_register_command(hass, ws_get_statistics_during_period)
+    websocket_api.async_register_command(hass, ws_get_list_statistic_ids)
+    websocket_api.async_register_command(hass, ws_stream)
     hass.components.frontend.async_register_built_in_panel(
         "history", "history", "hass:poll-box"
     )
@@ -511,6 +776,33 @@ class HistoryPeriodView(HomeAssistantView):
         ):
             return self.json([])
 
+        if "compact" in request.query:
+            return self.json(
+                await hass.async_add_executor_job(
+                    get_significant_states_compact,
+                    hass,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    minimal_response,
+                )
+            )
+
+        # Reordering by the include order needs the whole result
+        if "stream" in request.query and not (self.filters and self.use_include_order):
+            return await self._async_stream_significant_states_json(
+                request,
+                start_time,
+                end_time,
+                entity_ids,
+                include_start_time_state,
+                significant_changes_only,
+                minimal_response,
+            )
+
         return cast(
             web.Response,
             await hass.async_add_executor_job(
@@ -525,6 +817,81 @@ class HistoryPeriodView(HomeAssistantView):
             ),
         )
 
+    async def _async_stream_significant_states_json(
+        self,
+        request,
+        start_time,
+        end_time,
+        entity_ids,
+        include_start_time_state,
+        significant_changes_only,
+        minimal_response,
+    ):
+        """Stream significant states from the database as a chunked json array."""
+        hass = request.app["hass"]
+        to_write: asyncio.Queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        closed = threading.Event()
+        done = object()
+
+        def put(payload):
+            """Pass a payload to the response, waiting when the client is behind."""
+            if closed.is_set():
+                raise _HistoryStreamClosed
+            asyncio.run_coroutine_threadsafe(to_write.put(payload), hass.loop).result()
+
+        def write(_ent_id, ent_results):
+            """Encode the states of one entity."""
+            put(json.dumps(ent_results, cls=JSONEncoder))
+
+        def stream():
+            """Read the states in the executor."""
+            timer_start = time.perf_counter()
+            try:
+                stream_significant_states(
+                    hass,
+                    write,
+                    start_time,
+                    end_time,
+                    entity_ids,
+                    self.filters,
+                    include_start_time_state,
+                    significant_changes_only,
+                    minimal_response,
+                )
+            except _HistoryStreamClosed:
+                return
+            finally:
+                if not closed.is_set():
+                    put(done)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                elapsed = time.perf_counter() - timer_start
+                _LOGGER.debug("Streamed states in %fs", elapsed)
+
+        response = web.StreamResponse(headers={CONTENT_TYPE: CONTENT_TYPE_JSON})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        reader = hass.async_add_executor_job(stream)
+        try:
+            separator = "["
+            while True:
+                payload = await to_write.get()
+                if payload is done:
+                    break
+                await response.write(f"{separator}{payload}".encode("UTF-8"))
+                separator = ","
+            # Leave the array unterminated if reading failed
+            await reader
+            await response.write(b"[]" if separator == "[" else b"]")
+        finally:
+            closed.set()
+            # Unblock the reader so it notices the response is closed
+            while not to_write.empty():
+                to_write.get_nowait()
+
+        await response.write_eof()
+        return response
+
     def _sorted_significant_states_json(
         self,
         hass,
@@ -572,6 +939,298 @@ class HistoryPeriodView(HomeAssistantView):
         return self.json(result)
 
 
+class HistoryStatisticsView(HomeAssistantView):
+    """Handle long-term statistics requests."""
+
+    url = "/api/history/statistics"
+    name = "api:history:view-statistics"
+    extra_urls = ["/api/history/statistics/{datetime}"]
+
+    async def get(
+        self, request: web.Request, datetime: Optional[str] = None
+    ) -> web.Response:
+        """Return the statistics of a period of time."""
+        now = dt_util.utcnow()
+        if datetime:
+            datetime_ = dt_util.parse_datetime(datetime)
+            if datetime_ is None:
+                return self.json_message("Invalid datetime", HTTP_BAD_REQUEST)
+            start_time = dt_util.as_utc(datetime_)
+        else:
+            start_time = now - timedelta(days=1)
+
+        end_time = None
+        end_time_str = request.query.get("end_time")
+        if end_time_str:
+            end_time = dt_util.parse_datetime(end_time_str)
+            if end_time is None:
+                return self.json_message("Invalid end_time", HTTP_BAD_REQUEST)
+            end_time = dt_util.as_utc(end_time)
+
+        period = request.query.get("period", PERIOD_HOUR)
+        if period not in STATISTIC_PERIODS:
+            return self.json_message("Invalid period", HTTP_BAD_REQUEST)
+
+        statistic_ids = None
+        statistic_ids_str = request.query.get("statistic_ids")
+        if statistic_ids_str:
+            statistic_ids = statistic_ids_str.lower().split(",")
+
+        hass = request.app["hass"]
+        result = await hass.async_add_executor_job(
+            statistics_during_period,
+            hass,
+            start_time,
+            end_time,
+            statistic_ids,
+            period,
+        )
+        return self.json(result)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "history/history_during_period",
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("entity_ids"): [str],
+        vol.Optional("include_start_time_state", default=True): bool,
+        vol.Optional("significant_changes_only", default=True): bool,
+        vol.Optional("minimal_response", default=False): bool,
+    }
+)
+@websocket_api.async_response
+async def ws_get_history_during_period(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Return the significant states of a period in the compact format."""
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    end_time = None
+    if "end_time" in msg:
+        end_time = dt_util.parse_datetime(msg["end_time"])
+        if end_time is None:
+            connection.send_error(msg["id"], "invalid_end_time", "Invalid end_time")
+            return
+        end_time = dt_util.as_utc(end_time)
+    else:
+        end_time = start_time + timedelta(days=1)
+
+    entity_ids = msg.get("entity_ids")
+    if entity_ids is not None:
+        entity_ids = [entity_id.lower() for entity_id in entity_ids]
+
+    history = await hass.async_add_executor_job(
+        get_significant_states_compact,
+        hass,
+        start_time,
+        end_time,
+        entity_ids,
+        hass.data[HISTORY_FILTERS],
+        msg["include_start_time_state"],
+        msg["significant_changes_only"],
+        msg["minimal_response"],
+    )
+    connection.send_result(msg["id"], history)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "history/statistics_during_period",
+        vol.Required("start_time"): str,
+        vol.Optional("end_time"): str,
+        vol.Optional("statistic_ids"): [str],
+        vol.Optional("period", default=PERIOD_HOUR): vol.In(STATISTIC_PERIODS),
+    }
+)
+@websocket_api.async_response
+async def ws_get_statistics_during_period(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Handle statistics websocket command."""
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg["id"], "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    end_time = None
+    if "end_time" in msg:
+        end_time = dt_util.parse_datetime(msg["end_time"])
+        if end_time is None:
+            connection.send_error(msg["id"], "invalid_end_time", "Invalid end_time")
+            return
+        end_time = dt_util.as_utc(end_time)
+
+    statistics = await hass.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start_time,
+        end_time,
+        msg.get("statistic_ids"),
+        msg["period"],
+    )
+    connection.send_result(msg["id"], statistics)
+
+
+@websocket_api.websocket_command({vol.Required("type"): "history/list_statistic_ids"})
+@websocket_api.async_response
+async def ws_get_list_statistic_ids(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Return the ids and units of the recorded statistics."""
+    statistic_ids = await hass.async_add_executor_job(list_statistic_ids, hass)
+    connection.send_result(msg["id"], statistic_ids)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "history/stream",
+        vol.Required("start_time"): str,
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("include_start_time_state", default=True): bool,
+        vol.Optional("significant_changes_only", default=True): bool,
+        vol.Optional("minimal_response", default=False): bool,
+    }
+)
+@websocket_api.async_response
+async def ws_stream(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Send the significant states since start_time and then new ones as they change.
+
+    The database is read once, after the recorder committed the states changed
+    before the subscription, and the live states are sent from that point on.
+    """
+    msg_id = msg["id"]
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg_id, "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    entity_ids = msg.get("entity_ids")
+    filters = hass.data[HISTORY_FILTERS]
+    significant_changes_only = msg["significant_changes_only"]
+    minimal_response = msg["minimal_response"]
+    pending_states: dict = {}
+    backfilled = False
+    send_scheduled = False
+    # States changed before this are read from the database
+    end_time = dt_util.utcnow()
+
+    @callback
+    def _async_send_pending_states() -> None:
+        """Send the states changed since the last call."""
+        nonlocal send_scheduled
+        send_scheduled = False
+        if pending_states:
+            connection.send_message(
+                websocket_api.event_message(msg_id, {"states": pending_states.copy()})
+            )
+            pending_states.clear()
+
+    @callback
+    def _async_forward_state_changed(event) -> None:
+        """Queue a changed state for the next states sent."""
+        nonlocal send_scheduled
+        if event.time_fired < end_time:
+            return
+        state = _stream_state(
+            event, entity_ids, filters, significant_changes_only, minimal_response
+        )
+        if state is None:
+            return
+
+        pending_states.setdefault(event.data["entity_id"], []).append(state)
+        # States changed in the same iteration of the event loop are sent together
+        if backfilled and not send_scheduled:
+            send_scheduled = True
+            hass.loop.call_soon(_async_send_pending_states)
+
+    connection.subscriptions[msg_id] = hass.bus.async_listen(
+        EVENT_STATE_CHANGED, _async_forward_state_changed
+    )
+    connection.send_result(msg_id)
+
+    try:
+        await hass.data[recorder.DATA_INSTANCE].async_commit()
+        history = await hass.async_add_executor_job(
+            get_significant_states,
+            hass,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            msg["include_start_time_state"],
+            significant_changes_only,
+            minimal_response,
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        # Stop the stream unless the client already unsubscribed
+        unsub = connection.subscriptions.pop(msg_id, None)
+        if unsub is not None:
+            unsub()
+            connection.async_handle_exception(msg, err)
+        return
+
+    if msg_id not in connection.subscriptions:
+        return
+
+    connection.send_message(websocket_api.event_message(msg_id, {"states": history}))
+    backfilled = True
+    _async_send_pending_states()
+
+
+def _stream_state(
+    event, entity_ids, filters, significant_changes_only, minimal_response
+):
+    """Return the state to stream for a state change or None if it is filtered.
+
+    Applies the same rules as the queries of get_significant_states.
+    """
+    new_state = event.data.get("new_state")
+    if new_state is None:
+        return None
+
+    entity_id = new_state.entity_id
+    domain = new_state.domain
+    if entity_ids is not None:
+        if entity_id not in entity_ids:
+            return None
+    elif domain in IGNORE_DOMAINS or (
+        filters is not None and not filters.included_entity(entity_id, domain)
+    ):
+        return None
+
+    if (
+        significant_changes_only
+        and domain not in SIGNIFICANT_DOMAINS
+        and new_state.last_changed != new_state.last_updated
+    ):
+        return None
+
+    if not minimal_response or domain in NEED_ATTRIBUTE_DOMAINS:
+        return new_state
+
+    old_state = event.data.get("old_state")
+    if old_state is not None and old_state.state == new_state.state:
+        return None
+
+    return {
+        STATE_KEY: new_state.state,
+        LAST_CHANGED_KEY: process_timestamp_to_utc_isoformat(new_state.last_changed),
+    }
+
+
+class _HistoryStreamClosed(Exception):
+    """Raised in the executor when the streamed response is closed."""
+
+
 def sqlalchemy_filter_from_include_exclude_conf(conf):
     """Build a sql filter from config."""
     filters = Filters()
@@ -634,6 +1293,32 @@ class Filters:
 
         baked_query += lambda q: q.filter(self.entity_filter())
 
+    def included_entity(self, entity_id, domain):
+        """Return if the entity passes the filter entity_filter generates."""
+        if (
+            self.included_domains
+            or self.included_entities
+            or self.included_entity_globs
+        ):
+            if not (
+                domain in self.included_domains
+                or entity_id in self.included_entities
+                or any(
+                    _glob_to_re(glob).match(entity_id)
+                    for glob in self.included_entity_globs
+                )
+            ):
+                return False
+
+        return not (
+            domain in self.excluded_domains
+            or entity_id in self.excluded_entities
+            or any(
+                _glob_to_re(glob).match(entity_id)
+                for glob in self.excluded_entity_globs
+            )
+        )
+
     def entity_filter(self):
         """Generate the entity filter query."""
         includes = []
@@ -669,6 +1354,19 @@ def _glob_to_like(glob_str):
     return States.entity_id.like(glob_str.translate(GLOB_TO_SQL_CHARS))
 
 
+@lru_cache(maxsize=256)
+def _glob_to_re(glob_str):
+    """Translate glob to a regular expression matching like _glob_to_like."""
+    return re.compile(
+        "".join(
+            LIKE_WILDCARDS_TO_RE.get(char) or re.escape(char)
+            for char in glob_str.translate(GLOB_TO_SQL_CHARS)
+        )
+        + "$",
+        re.IGNORECASE,
+    )
+
+
 def _entities_may_have_state_changes_after(
     hass: HomeAssistantType, entity_ids: Iterable, start_time: dt
 ) -> bool:
@@ -689,6 +1387,7 @@ class LazyState(State):
         "_row",
         "entity_id",
         "state",
+        "shared_attrs",
         "_attributes",
         "_last_changed",
         "_last_updated",
@@ -700,17 +1399,30 @@ class LazyState(State):
         self._row = row
         self.entity_id = self._row.entity_id
         self.state = self._row.state or ""
+        self.shared_attrs = getattr(self._row, "shared_attrs", None)
         self._attributes = None
         self._last_changed = None
         self._last_updated = None
         self._context = None
 
+    @property
+    def attributes_id_to_load(self):
+        """Return the id of the shared attributes if they were not queried."""
+        if self.shared_attrs is not None or self._attributes:
+            return None
+        return self._row.attributes_id
+
+    @property
+    def attributes_json(self):
+        """Return the attributes as they are stored in the database."""
+        return self.shared_attrs or self._row.attributes or "{}"
+
     @property  # type: ignore
     def attributes(self):
         """State attributes."""
         if not self._attributes:
             try:
-                self._attributes = json.loads(self._row.attributes)
+                self._attributes = json.loads(self.attributes_json)
             except ValueError:
                 # When json.loads fails
                 _LOGGER.exception("Error converting row to state: %s", self)
@@ -1,7 +1,7 @@
 """Offer event listening automation rules."""
 import voluptuous as vol
 
-from homeassistant.const import CONF_EVENT_DATA, CONF_PLATFORM
+from homeassistant.const import CONF_EVENT_DATA, CONF_PLATFORM, MATCH_ALL
 from homeassistant.core import HassJob, callback
 from homeassistant.helpers import config_validation as cv, template
 
@@ -42,6 +42,7 @@ async def async_attach_trigger(
     removes = []
 
     event_data_schema = None
+    event_data_key = None
     if CONF_EVENT_DATA in config:
         # Render the schema input
         template.attach(hass, config[CONF_EVENT_DATA])
@@ -54,6 +55,12 @@ async def async_attach_trigger(
             {vol.Required(key): value for key, value in event_data.items()},
             extra=vol.ALLOW_EXTRA,
         )
+        # Let the bus route the events by a plain value, like a device_id,
+        # the schema still has to match the rest of the event data
+        event_data_key = next(
+            (key for key, value in event_data.items() if isinstance(value, str)),
+            None,
+        )
 
     event_context_schema = None
     if CONF_EVENT_CONTEXT in config:
@@ -100,9 +107,16 @@ async def async_attach_trigger(
             event.context,
         )
 
-    removes = [
-        hass.bus.async_listen(event_type, handle_event) for event_type in event_types
-    ]
+    @callback
+    def listen_event(event_type):
+        """Listen for the events of a type."""
+        if event_data_key is None or event_type == MATCH_ALL:
+            return hass.bus.async_listen(event_type, handle_event)
+        return hass.bus.async_listen_keyed(
+            event_type, event_data_key, event_data[event_data_key], handle_event
+        )
+
+    removes = [listen_event(event_type) for event_type in event_types]
 
     @callback
     def remove_listen_events():
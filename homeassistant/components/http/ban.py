@@ -1,10 +1,17 @@
 """Ban logic for HTTP component."""
 from collections import defaultdict
 from datetime import datetime
-from ipaddress import ip_address
+from ipaddress import (
+    IPv4Address,
+    IPv4Network,
+    IPv6Address,
+    IPv6Network,
+    ip_address,
+    ip_network,
+)
 import logging
 from socket import gethostbyaddr, herror
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
 
 from aiohttp.web import middleware
 from aiohttp.web_exceptions import HTTPForbidden, HTTPUnauthorized
@@ -45,8 +52,8 @@ def setup_bans(hass, app, login_threshold):
 
     async def ban_startup(app):
         """Initialize bans when app starts up."""
-        app[KEY_BANNED_IPS] = await async_load_ip_bans_config(
-            hass, hass.config.path(IP_BANS_FILE)
+        app[KEY_BANNED_IPS] = IpBanMatcher(
+            await async_load_ip_bans_config(hass, hass.config.path(IP_BANS_FILE))
         )
 
     app.on_startup.append(ban_startup)
@@ -60,12 +67,7 @@ async def ban_middleware(request, handler):
         return await handler(request)
 
     # Verify if IP is not banned
-    ip_address_ = ip_address(request.remote)
-    is_banned = any(
-        ip_ban.ip_address == ip_address_ for ip_ban in request.app[KEY_BANNED_IPS]
-    )
-
-    if is_banned:
+    if request.app[KEY_BANNED_IPS].is_banned(ip_address(request.remote)):
         raise HTTPForbidden()
 
     try:
@@ -137,7 +139,7 @@ async def process_wrong_login(request):
         >= request.app[KEY_LOGIN_THRESHOLD]
     ):
         new_ban = IpBan(remote_addr)
-        request.app[KEY_BANNED_IPS].append(new_ban)
+        request.app[KEY_BANNED_IPS].add(new_ban)
 
         await hass.async_add_executor_job(
             update_ip_bans_config, hass.config.path(IP_BANS_FILE), new_ban
@@ -176,13 +178,75 @@ async def process_success_login(request):
 
 
 class IpBan:
-    """Represents banned IP address."""
+    """Represents banned IP address or network."""
 
-    def __init__(self, ip_ban: str, banned_at: Optional[datetime] = None) -> None:
+    def __init__(
+        self,
+        ip_ban: Union[str, IPv4Address, IPv6Address],
+        banned_at: Optional[datetime] = None,
+    ) -> None:
         """Initialize IP Ban object."""
-        self.ip_address = ip_address(ip_ban)
+        self.ip_network = ip_network(ip_ban, strict=False)
+        # The address of bans of a single address, None for networks
+        self.ip_address = (
+            self.ip_network.network_address
+            if self.ip_network.num_addresses == 1
+            else None
+        )
         self.banned_at = banned_at or dt_util.utcnow()
 
+    def __str__(self) -> str:
+        """Return the banned address or network."""
+        if self.ip_address is not None:
+            return str(self.ip_address)
+        return str(self.ip_network)
+
+
+class IpBanMatcher:
+    """Match addresses against the bans.
+
+    Single addresses are kept in a set. Networks are kept in a set per
+    prefix length, an address is matched by looking up its network for
+    every prefix length that has bans. So a lookup costs at most one set
+    lookup per distinct prefix length, however many bans there are.
+    """
+
+    def __init__(self, ip_bans: Iterable[IpBan] = ()) -> None:
+        """Initialize the matcher."""
+        self._ip_bans: List[IpBan] = []
+        self._addresses: Set[Union[IPv4Address, IPv6Address]] = set()
+        self._networks: Set[Union[IPv4Network, IPv6Network]] = set()
+        # Prefix lengths of the banned networks per IP version
+        self._prefixlens: Dict[int, Set[int]] = {4: set(), 6: set()}
+        for ip_ban in ip_bans:
+            self.add(ip_ban)
+
+    def __len__(self) -> int:
+        """Return the number of bans."""
+        return len(self._ip_bans)
+
+    def __iter__(self) -> Iterator[IpBan]:
+        """Iterate over the bans."""
+        return iter(self._ip_bans)
+
+    def add(self, ip_ban: IpBan) -> None:
+        """Add a ban."""
+        self._ip_bans.append(ip_ban)
+        if ip_ban.ip_address is not None:
+            self._addresses.add(ip_ban.ip_address)
+            return
+        self._networks.add(ip_ban.ip_network)
+        self._prefixlens[ip_ban.ip_network.version].add(ip_ban.ip_network.prefixlen)
+
+    def is_banned(self, address: Union[IPv4Address, IPv6Address]) -> bool:
+        """Return if an address is banned."""
+        if address in self._addresses:
+            return True
+        for prefixlen in self._prefixlens[address.version]:
+            if ip_network((address, prefixlen), strict=False) in self._networks:
+                return True
+        return False
+
 
 async def async_load_ip_bans_config(hass: HomeAssistant, path: str) -> List[IpBan]:
     """Load list of banned IPs from config file."""
@@ -203,6 +267,9 @@ async def async_load_ip_bans_config(hass: HomeAssistant, path: str) -> List[IpBa
         except vol.Invalid as err:
             _LOGGER.error("Failed to load IP ban %s: %s", ip_info, err)
             continue
+        except ValueError as err:
+            _LOGGER.error("Failed to load IP ban %s: %s", ip_ban, err)
+            continue
 
     return ip_list
 
@@ -210,6 +277,6 @@ async def async_load_ip_bans_config(hass: HomeAssistant, path: str) -> List[IpBa
 def update_ip_bans_config(path: str, ip_ban: IpBan) -> None:
     """Update config file with new banned IP address."""
     with open(path, "a") as out:
-        ip_ = {str(ip_ban.ip_address): {ATTR_BANNED_AT: ip_ban.banned_at.isoformat()}}
+        ip_ = {str(ip_ban): {ATTR_BANNED_AT: ip_ban.banned_at.isoformat()}}
         out.write("\n")
         out.write(yaml.dump(ip_))
@@ -15,7 +15,7 @@ import voluptuous as vol
 
 from homeassistant import exceptions
 from homeassistant.const import CONTENT_TYPE_JSON, HTTP_OK, HTTP_SERVICE_UNAVAILABLE
-from homeassistant.core import Context, is_callback
+from homeassistant.core import Context, State, is_callback
 from homeassistant.helpers.json import JSONEncoder
 
 from .const import KEY_AUTHENTICATED, KEY_HASS
@@ -23,6 +23,19 @@ from .const import KEY_AUTHENTICATED, KEY_HASS
 _LOGGER = logging.getLogger(__name__)
 
 
+def _json_dumps(result: Any) -> str:
+    """Serialize a result to JSON, reusing the JSON of states."""
+    if isinstance(result, State):
+        return result.as_json()
+    if (
+        isinstance(result, list)
+        and result
+        and all(isinstance(item, State) for item in result)
+    ):
+        return f"[{', '.join(state.as_json() for state in result)}]"
+    return json.dumps(result, cls=JSONEncoder, allow_nan=False)
+
+
 class HomeAssistantView:
     """Base view for all views."""
 
@@ -49,7 +62,7 @@ class HomeAssistantView:
     ) -> web.Response:
         """Return a JSON response."""
         try:
-            msg = json.dumps(result, cls=JSONEncoder, allow_nan=False).encode("UTF-8")
+            msg = _json_dumps(result).encode("UTF-8")
         except (ValueError, TypeError) as err:
             _LOGGER.error("Unable to serialize to JSON: %s\n%s", err, result)
             raise HTTPInternalServerError from err
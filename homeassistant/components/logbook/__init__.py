@@ -1,4 +1,5 @@
 """Event parser and human readable log generator."""
+from collections import namedtuple
 from datetime import timedelta
 from itertools import groupby
 import json
@@ -9,12 +10,19 @@ from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import literal
 import voluptuous as vol
 
+from homeassistant.components import recorder, websocket_api
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
 from homeassistant.components.history import sqlalchemy_filter_from_include_exclude_conf
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.components.recorder.models import (
+    EventData,
+    EventEntities,
     Events,
+    EventTypes,
+    SchemaChanges,
+    StateAttributes,
     States,
+    process_timestamp,
     process_timestamp_to_utc_isoformat,
 )
 from homeassistant.components.recorder.util import session_scope
@@ -26,6 +34,7 @@ from homeassistant.const import (
     ATTR_ICON,
     ATTR_NAME,
     ATTR_SERVICE,
+    ATTR_UNIT_OF_MEASUREMENT,
     EVENT_CALL_SERVICE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
@@ -46,17 +55,26 @@ from homeassistant.helpers.integration_platform import (
 )
 from homeassistant.loader import bind_hass
 import homeassistant.util.dt as dt_util
+from homeassistant.util.lru import LRU
 
 ENTITY_ID_JSON_TEMPLATE = '"entity_id": "{}"'
 ENTITY_ID_JSON_EXTRACT = re.compile('"entity_id": "([^"]+)"')
 DOMAIN_JSON_EXTRACT = re.compile('"domain": "([^"]+)"')
 ICON_JSON_EXTRACT = re.compile('"icon": "([^"]+)"')
 
+# The first schema version of the recorder with the event_entities table
+EVENT_ENTITIES_SCHEMA_VERSION = 16
+
 ATTR_MESSAGE = "message"
 
 CONTINUOUS_DOMAINS = ["proximity", "sensor"]
 
 DOMAIN = "logbook"
+LOGBOOK_FILTERS = "logbook_filters"
+LOGBOOK_ENTITIES_FILTER = "logbook_entities_filter"
+
+# The number of contexts the event stream remembers the first event of
+EVENT_STREAM_CONTEXT_LOOKUP_SIZE = 1024
 
 GROUP_BY_MINUTES = 15
 
@@ -85,9 +103,14 @@ ALL_EVENT_TYPES = [
     *ALL_EVENT_TYPES_EXCEPT_STATE_CHANGED,
 ]
 
+# Events recorded since schema 14 keep their type and data
+# in the shared event_types and event_data tables
+EVENT_TYPE_COLUMN = sqlalchemy.func.coalesce(EventTypes.event_type, Events.event_type)
+EVENT_DATA_COLUMN = sqlalchemy.func.coalesce(EventData.shared_data, Events.event_data)
+
 EVENT_COLUMNS = [
-    Events.event_type,
-    Events.event_data,
+    EVENT_TYPE_COLUMN.label("event_type"),
+    EVENT_DATA_COLUMN.label("event_data"),
     Events.time_fired,
     Events.context_id,
     Events.context_user_id,
@@ -159,7 +182,10 @@ async def async_setup(hass, config):
         filters = None
         entities_filter = None
 
+    hass.data[LOGBOOK_FILTERS] = filters
+    hass.data[LOGBOOK_ENTITIES_FILTER] = entities_filter
     hass.http.register_view(LogbookView(conf, filters, entities_filter))
+    websocket_api.async_register_command(hass, ws_event_stream)
 
     hass.services.async_register(DOMAIN, "log", log_message, schema=LOG_MESSAGE_SCHEMA)
 
@@ -256,6 +282,151 @@ class LogbookView(HomeAssistantView):
         return await hass.async_add_executor_job(json_events)
 
 
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "logbook/event_stream",
+        vol.Required("start_time"): str,
+        vol.Optional("entity_ids"): cv.entity_ids,
+        vol.Optional("entity_matches_only", default=False): bool,
+    }
+)
+@websocket_api.async_response
+async def ws_event_stream(hass, connection, msg):
+    """Send the logbook since start_time and then its new entries as they happen.
+
+    The database is read once, after the recorder committed the events fired
+    before the subscription, and the live events are sent from that point on.
+    """
+    msg_id = msg["id"]
+    start_time = dt_util.parse_datetime(msg["start_time"])
+    if start_time is None:
+        connection.send_error(msg_id, "invalid_start_time", "Invalid start_time")
+        return
+    start_time = dt_util.as_utc(start_time)
+
+    entity_ids = msg.get("entity_ids")
+    entity_matches_only = msg["entity_matches_only"]
+    filters = hass.data[LOGBOOK_FILTERS]
+    entities_filter = hass.data[LOGBOOK_ENTITIES_FILTER]
+    if entity_ids:
+        entities_filter = generate_filter([], entity_ids, [], [])
+
+    entity_attr_cache = EntityAttributeCache(hass)
+    context_lookup = LRU(EVENT_STREAM_CONTEXT_LOOKUP_SIZE)
+    pending_events = []
+    backfilled = False
+    send_scheduled = False
+    # Events fired before this are read from the database
+    end_time = dt_util.utcnow()
+
+    @callback
+    def _async_send_pending_events():
+        """Send the entries of the events received since the last call."""
+        nonlocal send_scheduled
+        send_scheduled = False
+        events = pending_events.copy()
+        pending_events.clear()
+        entries = list(humanify(hass, events, entity_attr_cache, context_lookup))
+        if entries:
+            connection.send_message(
+                websocket_api.event_message(msg_id, {"events": entries})
+            )
+
+    @callback
+    def _async_forward_event(event):
+        """Queue an event for the next entries sent."""
+        nonlocal send_scheduled
+        lazy_event = LazyEventPartialState.from_event(event)
+        if not _keep_live_event(
+            hass, event, lazy_event, entity_ids, entities_filter, entity_matches_only
+        ):
+            return
+
+        context_lookup.setdefault(lazy_event.context_id, lazy_event)
+        if event.event_type == EVENT_CALL_SERVICE or event.time_fired < end_time:
+            return
+
+        pending_events.append(lazy_event)
+        # Events fired in the same iteration of the event loop are sent together
+        if backfilled and not send_scheduled:
+            send_scheduled = True
+            hass.loop.call_soon(_async_send_pending_events)
+
+    unsubs = [
+        hass.bus.async_listen(event_type, _async_forward_event)
+        for event_type in {*ALL_EVENT_TYPES, *hass.data[DOMAIN]}
+    ]
+
+    @callback
+    def _async_unsubscribe():
+        """Stop forwarding events."""
+        for unsub in unsubs:
+            unsub()
+
+    connection.subscriptions[msg_id] = _async_unsubscribe
+    connection.send_result(msg_id)
+
+    try:
+        await hass.data[recorder.DATA_INSTANCE].async_commit()
+        entries = await hass.async_add_executor_job(
+            _get_events,
+            hass,
+            start_time,
+            end_time,
+            entity_ids,
+            filters,
+            entities_filter,
+            entity_matches_only,
+        )
+    except Exception as err:  # pylint: disable=broad-except
+        # Stop the stream unless the client already unsubscribed
+        if connection.subscriptions.pop(msg_id, None) is not None:
+            _async_unsubscribe()
+            connection.async_handle_exception(msg, err)
+        return
+
+    if msg_id not in connection.subscriptions:
+        return
+
+    connection.send_message(websocket_api.event_message(msg_id, {"events": entries}))
+    backfilled = True
+    _async_send_pending_events()
+
+
+def _keep_live_event(
+    hass, event, lazy_event, entity_ids, entities_filter, entity_matches_only
+):
+    """Return if a live event passes the filters _get_events applies in SQL."""
+    event_type = event.event_type
+    if event_type == EVENT_STATE_CHANGED:
+        new_state = event.data.get("new_state")
+        old_state = event.data.get("old_state")
+        if (
+            new_state is None
+            or old_state is None
+            or new_state.state == old_state.state
+            or (
+                new_state.domain in CONTINUOUS_DOMAINS
+                and ATTR_UNIT_OF_MEASUREMENT in new_state.attributes
+            )
+        ):
+            return False
+        if entity_ids:
+            return new_state.entity_id in entity_ids
+        return entities_filter is None or entities_filter(new_state.entity_id)
+
+    if event_type == EVENT_CALL_SERVICE:
+        # Only kept to describe the context of other events
+        return True
+
+    if entity_ids and entity_matches_only:
+        referenced = EventEntities.entity_ids_from_event(event)
+        if not any(entity_id in referenced for entity_id in entity_ids):
+            return False
+
+    return _keep_event(hass, lazy_event, entities_filter)
+
+
 def humanify(hass, events, entity_attr_cache, context_lookup):
     """Generate a converted list of events into Entry objects.
 
@@ -457,7 +628,7 @@ def _get_events(
             if entity_matches_only:
                 # When entity_matches_only is provided, contexts and events that do not
                 # contain the entity_ids are not included in the logbook response.
-                query = _apply_event_entity_id_matchers(query, entity_ids)
+                query = _apply_event_entity_id_matchers(query, entity_ids, start_day)
 
             query = query.union_all(
                 _generate_states_query(
@@ -465,17 +636,18 @@ def _get_events(
                 )
             )
         else:
-            query = _generate_events_query(session)
+            query = _generate_events_query(session).select_from(Events)
+            query = _apply_shared_event_joins(query)
             query = _apply_event_time_filter(query, start_day, end_day)
             query = _apply_events_types_and_states_filter(
                 hass, query, old_state
             ).filter(
                 (States.last_updated == States.last_changed)
-                | (Events.event_type != EVENT_STATE_CHANGED)
+                | (EVENT_TYPE_COLUMN != EVENT_STATE_CHANGED)
             )
             if filters:
                 query = query.filter(
-                    filters.entity_filter() | (Events.event_type != EVENT_STATE_CHANGED)
+                    filters.entity_filter() | (EVENT_TYPE_COLUMN != EVENT_STATE_CHANGED)
                 )
 
             if context_id is not None:
@@ -494,25 +666,45 @@ def _generate_events_query(session):
         States.state,
         States.entity_id,
         States.domain,
-        States.attributes,
+        _state_attributes().label("attributes"),
     )
 
 
+def _state_attributes():
+    # States recorded since schema 13 keep their attributes
+    # in the shared state_attributes table
+    return sqlalchemy.func.coalesce(StateAttributes.shared_attrs, States.attributes)
+
+
 def _generate_events_query_without_states(session):
-    return session.query(
-        *EVENT_COLUMNS,
-        literal(None).label("state"),
-        literal(None).label("entity_id"),
-        literal(None).label("domain"),
-        literal(None).label("attributes"),
+    return _apply_shared_event_joins(
+        session.query(
+            *EVENT_COLUMNS,
+            literal(None).label("state"),
+            literal(None).label("entity_id"),
+            literal(None).label("domain"),
+            literal(None).label("attributes"),
+        ).select_from(Events)
     )
 
 
+def _apply_shared_event_joins(query):
+    return query.outerjoin(
+        EventTypes, (Events.event_type_id == EventTypes.event_type_id)
+    ).outerjoin(EventData, (Events.data_id == EventData.data_id))
+
+
 def _generate_states_query(session, start_day, end_day, old_state, entity_ids):
     return (
         _generate_events_query(session)
+        .select_from(States)
         .outerjoin(Events, (States.event_id == Events.event_id))
+        .outerjoin(EventTypes, (Events.event_type_id == EventTypes.event_type_id))
+        .outerjoin(EventData, (Events.data_id == EventData.data_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(_missing_state_matcher(old_state))
         .filter(_continuous_entity_matcher())
         .filter((States.last_updated > start_day) & (States.last_updated < end_day))
@@ -527,12 +719,15 @@ def _apply_events_types_and_states_filter(hass, query, old_state):
     events_query = (
         query.outerjoin(States, (Events.event_id == States.event_id))
         .outerjoin(old_state, (States.old_state_id == old_state.state_id))
+        .outerjoin(
+            StateAttributes, (States.attributes_id == StateAttributes.attributes_id)
+        )
         .filter(
-            (Events.event_type != EVENT_STATE_CHANGED)
+            (EVENT_TYPE_COLUMN != EVENT_STATE_CHANGED)
             | _missing_state_matcher(old_state)
         )
         .filter(
-            (Events.event_type != EVENT_STATE_CHANGED) | _continuous_entity_matcher()
+            (EVENT_TYPE_COLUMN != EVENT_STATE_CHANGED) | _continuous_entity_matcher()
         )
     )
     return _apply_event_types_filter(hass, events_query, ALL_EVENT_TYPES)
@@ -556,7 +751,7 @@ def _continuous_entity_matcher():
     #
     return sqlalchemy.or_(
         sqlalchemy.not_(States.domain.in_(CONTINUOUS_DOMAINS)),
-        sqlalchemy.not_(States.attributes.contains(UNIT_OF_MEASUREMENT_JSON)),
+        sqlalchemy.not_(_state_attributes().contains(UNIT_OF_MEASUREMENT_JSON)),
     )
 
 
@@ -567,20 +762,52 @@ def _apply_event_time_filter(events_query, start_day, end_day):
 
 
 def _apply_event_types_filter(hass, query, event_types):
+    event_types = event_types + list(hass.data.get(DOMAIN, {}))
+    event_type_ids = [
+        event_type_id
+        for (event_type_id,) in query.session.query(EventTypes.event_type_id).filter(
+            EventTypes.event_type.in_(event_types)
+        )
+    ]
     return query.filter(
-        Events.event_type.in_(event_types + list(hass.data.get(DOMAIN, {})))
+        Events.event_type_id.in_(event_type_ids) | Events.event_type.in_(event_types)
     )
 
 
-def _apply_event_entity_id_matchers(events_query, entity_ids):
-    return events_query.filter(
-        sqlalchemy.or_(
-            *[
-                Events.event_data.contains(ENTITY_ID_JSON_TEMPLATE.format(entity_id))
-                for entity_id in entity_ids
-            ]
+def _apply_event_entity_id_matchers(events_query, entity_ids, start_day):
+    session = events_query.session
+    referenced = Events.event_id.in_(
+        session.query(EventEntities.event_id).filter(
+            EventEntities.entity_id.in_(entity_ids)
         )
     )
+    references_since = _event_entities_recorded_since(session)
+    if references_since is not None and references_since <= start_day:
+        return events_query.filter(referenced)
+
+    # Events recorded before the schema had the event_entities
+    # table can only be found by searching their data
+    matches_data = sqlalchemy.or_(
+        *[
+            EVENT_DATA_COLUMN.contains(ENTITY_ID_JSON_TEMPLATE.format(entity_id))
+            for entity_id in entity_ids
+        ]
+    )
+    if references_since is None:
+        return events_query.filter(matches_data)
+    return events_query.filter(
+        referenced | ((Events.time_fired < references_since) & matches_data)
+    )
+
+
+def _event_entities_recorded_since(session):
+    """Return since when the entities referenced by events are recorded."""
+    changed = (
+        session.query(sqlalchemy.func.min(SchemaChanges.changed))
+        .filter(SchemaChanges.schema_version >= EVENT_ENTITIES_SCHEMA_VERSION)
+        .scalar()
+    )
+    return process_timestamp(changed) if changed is not None else None
 
 
 def _keep_event(hass, event, entities_filter):
@@ -677,6 +904,23 @@ def _entity_name_from_event(entity_id, event, entity_attr_cache):
     ) or split_entity_id(entity_id)[1].replace("_", " ")
 
 
+_EventRow = namedtuple(
+    "_EventRow",
+    [
+        "event_type",
+        "event_data",
+        "time_fired",
+        "context_id",
+        "context_user_id",
+        "context_parent_id",
+        "state",
+        "entity_id",
+        "domain",
+        "attributes",
+    ],
+)
+
+
 class LazyEventPartialState:
     """A lazy version of core Event with limited State joined in."""
 
@@ -710,6 +954,33 @@ class LazyEventPartialState:
         self.context_parent_id = self._row.context_parent_id
         self.time_fired_minute = self._row.time_fired.minute
 
+    @classmethod
+    def from_event(cls, event):
+        """Create from a native event without encoding its data to json."""
+        new_state = None
+        if event.event_type == EVENT_STATE_CHANGED:
+            new_state = event.data.get("new_state")
+        lazy_event = cls(
+            _EventRow(
+                event.event_type,
+                EMPTY_JSON_OBJECT,
+                event.time_fired,
+                event.context.id,
+                event.context.user_id,
+                event.context.parent_id,
+                new_state and new_state.state,
+                new_state and new_state.entity_id,
+                new_state and new_state.domain,
+                EMPTY_JSON_OBJECT,
+            )
+        )
+        # The data of state changes is not recorded
+        if new_state is None:
+            lazy_event._event_data = event.data
+        else:
+            lazy_event._attributes = new_state.attributes
+        return lazy_event
+
     @property
     def attributes_icon(self):
         """Extract the icon from the decoded attributes or json."""
@@ -1,14 +1,15 @@
 """Support for MQTT message handling."""
 import asyncio
-from functools import lru_cache, partial, wraps
+from functools import partial, wraps
 import inspect
 from itertools import groupby
 import logging
 from operator import attrgetter
 import os
 import ssl
+import threading
 import time
-from typing import Any, Callable, List, Optional, Union
+from typing import Any, Callable, List, Optional, Tuple, Union
 import uuid
 
 import attr
@@ -66,6 +67,7 @@ from .const import (
 )
 from .discovery import LAST_DISCOVERY
 from .models import Message, MessageCallbackType, PublishPayloadType
+from .topic_trie import TopicTrie
 from .util import _VALID_QOS_SCHEMA, valid_publish_topic, valid_subscribe_topic
 
 _LOGGER = logging.getLogger(__name__)
@@ -104,6 +106,9 @@ CONNECTION_FAILED_RECOVERABLE = "connection_failed_recoverable"
 DISCOVERY_COOLDOWN = 2
 TIMEOUT_ACK = 10
 
+# The maximum number of received messages handled in one event loop iteration
+MAX_MESSAGES_PER_BATCH = 500
+
 PLATFORMS = [
     "alarm_control_panel",
     "binary_sensor",
@@ -390,6 +395,7 @@ async def async_setup(hass: HomeAssistantType, config: ConfigType) -> bool:
     websocket_api.async_register_command(hass, websocket_subscribe)
     websocket_api.async_register_command(hass, websocket_remove_device)
     websocket_api.async_register_command(hass, websocket_mqtt_info)
+    websocket_api.async_register_command(hass, websocket_mqtt_message_stats)
 
     if conf is None:
         # If we have a config entry, setup is done by that config entry.
@@ -524,12 +530,33 @@ async def async_setup_entry(hass, entry):
     return True
 
 
+@attr.s(slots=True)
+class MessageBatchStats:
+    """Statistics of the batches of received messages."""
+
+    batches: int = attr.ib(default=0)
+    messages: int = attr.ib(default=0)
+    last_batch_size: int = attr.ib(default=0)
+    max_batch_size: int = attr.ib(default=0)
+    # Seconds the oldest message of a batch waited for the event loop
+    last_latency: float = attr.ib(default=0.0)
+    max_latency: float = attr.ib(default=0.0)
+
+    def record(self, batch_size: int, latency: float) -> None:
+        """Record a handled batch."""
+        self.batches += 1
+        self.messages += batch_size
+        self.last_batch_size = batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+
+
 @attr.s(slots=True, frozen=True)
 class Subscription:
     """Class to hold data about an active subscription."""
 
     topic: str = attr.ib()
-    matcher: Any = attr.ib()
     job: HassJob = attr.ib()
     qos: int = attr.ib(default=0)
     encoding: str = attr.ib(default="utf-8")
@@ -553,6 +580,7 @@ class MQTT:
         self.config_entry = config_entry
         self.conf = conf
         self.subscriptions: List[Subscription] = []
+        self._subscription_trie: TopicTrie[Subscription] = TopicTrie()
         self.connected = False
         self._ha_started = asyncio.Event()
         self._last_subscribe = time.time()
@@ -560,6 +588,10 @@ class MQTT:
         self._paho_lock = asyncio.Lock()
 
         self._pending_operations = {}
+        self._pending_messages: List[Tuple[Any, float]] = []
+        self._pending_messages_lock = threading.Lock()
+        self._drain_scheduled = False
+        self.message_batch_stats = MessageBatchStats()
 
         if self.hass.state == CoreState.running:
             self._ha_started.set()
@@ -739,11 +771,9 @@ class MQTT:
         if not isinstance(topic, str):
             raise HomeAssistantError("Topic needs to be a string!")
 
-        subscription = Subscription(
-            topic, _matcher_for_topic(topic), HassJob(msg_callback), qos, encoding
-        )
+        subscription = Subscription(topic, HassJob(msg_callback), qos, encoding)
         self.subscriptions.append(subscription)
-        self._matching_subscriptions.cache_clear()
+        self._subscription_trie.add(topic, subscription)
 
         # Only subscribe if currently connected.
         if self.connected:
@@ -756,7 +786,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
-            self._matching_subscriptions.cache_clear()
+            self._subscription_trie.remove(topic, subscription)
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -846,16 +876,38 @@ class MQTT:
             )
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are buffered and handed to the event loop in batches so
+        a burst of messages only wakes up the event loop once.
+        """
+        with self._pending_messages_lock:
+            self._pending_messages.append((msg, time.monotonic()))
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._async_handle_pending_messages)
 
-    @lru_cache(2048)
-    def _matching_subscriptions(self, topic):
-        subscriptions = []
-        for subscription in self.subscriptions:
-            if subscription.matcher(topic):
-                subscriptions.append(subscription)
-        return subscriptions
+    @callback
+    def _async_handle_pending_messages(self) -> None:
+        """Handle the messages received since the last batch."""
+        with self._pending_messages_lock:
+            batch = self._pending_messages[:MAX_MESSAGES_PER_BATCH]
+            del self._pending_messages[:MAX_MESSAGES_PER_BATCH]
+            if self._pending_messages:
+                # Leave the event loop to other jobs before the next batch
+                self.hass.loop.call_soon(self._async_handle_pending_messages)
+            else:
+                self._drain_scheduled = False
+
+        latency = time.monotonic() - batch[0][1]
+        self.message_batch_stats.record(len(batch), latency)
+        _LOGGER.debug(
+            "Handling %s received messages, oldest waited %.3fs", len(batch), latency
+        )
+
+        for msg, _ in batch:
+            self._mqtt_handle_message(msg)
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
@@ -867,7 +919,7 @@ class MQTT:
         )
         timestamp = dt_util.utcnow()
 
-        subscriptions = self._matching_subscriptions(msg.topic)
+        subscriptions = self._subscription_trie.match(msg.topic)
 
         for subscription in subscriptions:
 
@@ -967,14 +1019,14 @@ def _raise_on_error(result_code: int) -> None:
         )
 
 
-def _matcher_for_topic(subscription: str) -> Any:
-    # pylint: disable=import-outside-toplevel
-    from paho.mqtt.matcher import MQTTMatcher
-
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-
-    return lambda topic: next(matcher.iter_match(topic), False)
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "mqtt/message_stats"})
+@callback
+def websocket_mqtt_message_stats(hass, connection, msg):
+    """Get the statistics of the batches of received MQTT messages."""
+    connection.send_result(
+        msg["id"], attr.asdict(hass.data[DATA_MQTT].message_batch_stats)
+    )
 
 
 @websocket_api.websocket_command(
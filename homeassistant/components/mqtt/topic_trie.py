@@ -0,0 +1,102 @@
+"""Match MQTT topics against subscribed topic filters."""
+from typing import Dict, Generic, List, TypeVar
+
+_T = TypeVar("_T")
+
+MULTI_LEVEL_WILDCARD = "#"
+SINGLE_LEVEL_WILDCARD = "+"
+
+
+class _TopicTrieNode(Generic[_T]):
+    """A level of the topic filters."""
+
+    __slots__ = ["children", "values"]
+
+    def __init__(self) -> None:
+        """Initialize the node."""
+        self.children: Dict[str, "_TopicTrieNode[_T]"] = {}
+        self.values: List[_T] = []
+
+
+class TopicTrie(Generic[_T]):
+    """Topic filters with + and # wildcards, stored level by level.
+
+    Looking up the values of the filters matching a topic takes time
+    proportional to the number of levels of the topic instead of the
+    number of filters. Follows the matching rules of paho's MQTTMatcher.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the trie."""
+        self._root: _TopicTrieNode[_T] = _TopicTrieNode()
+
+    def add(self, topic_filter: str, value: _T) -> None:
+        """Add a value for a topic filter."""
+        node = self._root
+        for level in topic_filter.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicTrieNode()
+            node = child
+        node.values.append(value)
+
+    def remove(self, topic_filter: str, value: _T) -> None:
+        """Remove a value for a topic filter.
+
+        Raises KeyError if the value was not added for the topic filter.
+        """
+        path = [self._root]
+        levels = topic_filter.split("/")
+        for level in levels:
+            child = path[-1].children.get(level)
+            if child is None:
+                raise KeyError(topic_filter)
+            path.append(child)
+
+        try:
+            path[-1].values.remove(value)
+        except ValueError as err:
+            raise KeyError(topic_filter) from err
+
+        # Prune the levels that are no longer used by any filter
+        for level, parent, node in zip(
+            reversed(levels), reversed(path[:-1]), reversed(path)
+        ):
+            if node.values or node.children:
+                break
+            del parent.children[level]
+
+    def match(self, topic: str) -> List[_T]:
+        """Return the values of all topic filters matching the topic."""
+        matches: List[_T] = []
+        self._match(self._root, topic.split("/"), 0, not topic.startswith("$"), matches)
+        return matches
+
+    def _match(
+        self,
+        node: _TopicTrieNode[_T],
+        levels: List[str],
+        index: int,
+        normal: bool,
+        matches: List[_T],
+    ) -> None:
+        """Collect the matching values below node."""
+        children = node.children
+        # Topics starting with $ are not matched by wildcards on the first level
+        wildcards = normal or index > 0
+
+        if wildcards and MULTI_LEVEL_WILDCARD in children:
+            # Also matches the parent level
+            matches.extend(children[MULTI_LEVEL_WILDCARD].values)
+
+        if index == len(levels):
+            matches.extend(node.values)
+            return
+
+        child = children.get(levels[index])
+        if child is not None:
+            self._match(child, levels, index + 1, normal, matches)
+        if wildcards and SINGLE_LEVEL_WILDCARD in children:
+            self._match(
+                children[SINGLE_LEVEL_WILDCARD], levels, index + 1, normal, matches
+            )
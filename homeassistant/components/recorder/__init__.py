@@ -7,9 +7,9 @@ import queue
 import sqlite3
 import threading
 import time
-from typing import Any, Callable, List, NamedTuple, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy import create_engine, event as sqlalchemy_event, exc, select
+from sqlalchemy import create_engine, event as sqlalchemy_event, exc, func, select
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import StaticPool
 import voluptuous as vol
@@ -17,6 +17,8 @@ import voluptuous as vol
 from homeassistant.components import persistent_notification
 from homeassistant.const import (
     ATTR_ENTITY_ID,
+    CONF_DOMAINS,
+    CONF_ENTITIES,
     CONF_EXCLUDE,
     EVENT_HOMEASSISTANT_START,
     EVENT_HOMEASSISTANT_STOP,
@@ -25,18 +27,41 @@ from homeassistant.const import (
     MATCH_ALL,
 )
 from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.helpers import discovery
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entityfilter import (
+    CONF_ENTITY_GLOBS,
     INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA,
     INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER,
     convert_include_exclude_filter,
 )
 from homeassistant.helpers.typing import ConfigType
 import homeassistant.util.dt as dt_util
-
-from . import migration, purge
-from .const import CONF_DB_INTEGRITY_CHECK, DATA_INSTANCE, DOMAIN, SQLITE_URL_PREFIX
-from .models import Base, Events, RecorderRuns, States
+from homeassistant.util.lru import LRU
+
+from . import migration, purge, statistics, websocket_api
+from .const import (
+    ADAPTIVE_COMMIT_BUSY_RATE,
+    CONF_DB_INTEGRITY_CHECK,
+    DATA_INSTANCE,
+    DOMAIN,
+    MAX_BATCH_SIZE,
+    SQLITE_URL_PREFIX,
+    SHARED_ID_CACHE_SIZE,
+    SIGNAL_PURGE_PROGRESS,
+)
+from .models import (
+    Base,
+    EventData,
+    EventEntities,
+    Events,
+    EventTypes,
+    RecorderPurge,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from .util import (
     dburl_to_path,
     move_away_broken_database,
@@ -72,9 +97,16 @@ DEFAULT_DB_RETRY_WAIT = 3
 DEFAULT_COMMIT_INTERVAL = 1
 KEEPALIVE_TIME = 30
 
-# Controls how often we clean up
-# States and Events objects
-EXPIRE_AFTER_COMMITS = 120
+# Databases where explicitly inserted primary keys
+# advance the autoincrement counter
+ID_ALLOCATION_DIALECTS = ("sqlite", "mysql")
+
+# Tables that store values shared between rows
+SHARED_MODELS = (EventTypes, EventData, StateAttributes)
+
+# Tables in the order rows have to be inserted
+# so they only reference rows that already exist
+INSERT_ORDER = (EventTypes, EventData, Events, StateAttributes, States)
 
 CONF_AUTO_PURGE = "auto_purge"
 CONF_DB_URL = "db_url"
@@ -84,6 +116,18 @@ CONF_PURGE_KEEP_DAYS = "purge_keep_days"
 CONF_PURGE_INTERVAL = "purge_interval"
 CONF_EVENT_TYPES = "event_types"
 CONF_COMMIT_INTERVAL = "commit_interval"
+CONF_MAX_COMMIT_INTERVAL = "max_commit_interval"
+CONF_RETENTION = "retention"
+
+KEEP_DAYS_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=1))
+
+RETENTION_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_DOMAINS, default={}): {cv.string: KEEP_DAYS_SCHEMA},
+        vol.Optional(CONF_ENTITY_GLOBS, default={}): {cv.string: KEEP_DAYS_SCHEMA},
+        vol.Optional(CONF_ENTITIES, default={}): {cv.entity_id: KEEP_DAYS_SCHEMA},
+    }
+)
 
 EXCLUDE_SCHEMA = INCLUDE_EXCLUDE_FILTER_SCHEMA_INNER.extend(
     {vol.Optional(CONF_EVENT_TYPES): vol.All(cv.ensure_list, [cv.string])}
@@ -93,6 +137,21 @@ FILTER_SCHEMA = INCLUDE_EXCLUDE_BASE_FILTER_SCHEMA.extend(
     {vol.Optional(CONF_EXCLUDE, default=EXCLUDE_SCHEMA({})): EXCLUDE_SCHEMA}
 )
 
+
+def _validate_retention(conf: ConfigType) -> ConfigType:
+    """Validate that retention policies do not keep more than purge_keep_days."""
+    keep_days = conf[CONF_PURGE_KEEP_DAYS]
+    for policies in conf[CONF_RETENTION].values():
+        for key, days in policies.items():
+            if days > keep_days:
+                raise vol.Invalid(
+                    f"Retention of {key} ({days} days) is longer than "
+                    f"{CONF_PURGE_KEEP_DAYS} ({keep_days} days)",
+                    path=[CONF_RETENTION],
+                )
+    return conf
+
+
 CONFIG_SCHEMA = vol.Schema(
     {
         vol.Optional(DOMAIN, default=dict): vol.All(
@@ -100,14 +159,16 @@ CONFIG_SCHEMA = vol.Schema(
             FILTER_SCHEMA.extend(
                 {
                     vol.Optional(CONF_AUTO_PURGE, default=True): cv.boolean,
-                    vol.Optional(CONF_PURGE_KEEP_DAYS, default=10): vol.All(
-                        vol.Coerce(int), vol.Range(min=1)
-                    ),
+                    vol.Optional(CONF_PURGE_KEEP_DAYS, default=10): KEEP_DAYS_SCHEMA,
+                    vol.Optional(
+                        CONF_RETENTION, default=RETENTION_SCHEMA({})
+                    ): RETENTION_SCHEMA,
                     vol.Optional(CONF_PURGE_INTERVAL, default=1): cv.positive_int,
                     vol.Optional(CONF_DB_URL): cv.string,
                     vol.Optional(
                         CONF_COMMIT_INTERVAL, default=DEFAULT_COMMIT_INTERVAL
                     ): cv.positive_int,
+                    vol.Optional(CONF_MAX_COMMIT_INTERVAL): cv.positive_int,
                     vol.Optional(
                         CONF_DB_MAX_RETRIES, default=DEFAULT_DB_MAX_RETRIES
                     ): cv.positive_int,
@@ -119,12 +180,18 @@ CONFIG_SCHEMA = vol.Schema(
                     ): cv.boolean,
                 }
             ),
+            _validate_retention,
         )
     },
     extra=vol.ALLOW_EXTRA,
 )
 
 
+def _primary_key_name(model) -> str:
+    """Return the name of the primary key column of a model."""
+    return next(iter(model.__table__.primary_key)).name
+
+
 def run_information(hass, point_in_time: Optional[datetime] = None):
     """Return information about current run.
 
@@ -172,6 +239,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     auto_purge = conf[CONF_AUTO_PURGE]
     keep_days = conf[CONF_PURGE_KEEP_DAYS]
     commit_interval = conf[CONF_COMMIT_INTERVAL]
+    max_commit_interval = conf.get(CONF_MAX_COMMIT_INTERVAL)
+    retention = purge.convert_retention(conf[CONF_RETENTION])
     db_max_retries = conf[CONF_DB_MAX_RETRIES]
     db_retry_wait = conf[CONF_DB_RETRY_WAIT]
     db_integrity_check = conf[CONF_DB_INTEGRITY_CHECK]
@@ -186,15 +255,30 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         auto_purge=auto_purge,
         keep_days=keep_days,
         commit_interval=commit_interval,
+        max_commit_interval=max_commit_interval,
         uri=db_url,
         db_max_retries=db_max_retries,
         db_retry_wait=db_retry_wait,
         entity_filter=entity_filter,
         exclude_t=exclude_t,
         db_integrity_check=db_integrity_check,
+        retention=retention,
     )
     instance.async_initialize()
     instance.start()
+    websocket_api.async_setup(hass)
+
+    @callback
+    def async_setup_purge_sensor(progress):
+        """Set up the purge progress sensor when a purge runs the first time."""
+        remove_purge_listener()
+        hass.async_create_task(
+            discovery.async_load_platform(hass, "sensor", DOMAIN, {}, config)
+        )
+
+    remove_purge_listener = async_dispatcher_connect(
+        hass, SIGNAL_PURGE_PROGRESS, async_setup_purge_sensor
+    )
 
     async def async_handle_purge_service(service):
         """Handle calls to the purge service."""
@@ -224,6 +308,13 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     return await instance.async_db_ready
 
 
+@callback
+def _async_set_done(done: asyncio.Future) -> None:
+    """Mark a commit as done unless its waiter is gone."""
+    if not done.done():
+        done.set_result(None)
+
+
 class PurgeTask(NamedTuple):
     """Object to store information about purge task."""
 
@@ -232,10 +323,37 @@ class PurgeTask(NamedTuple):
     apply_filter: bool
 
 
+class StatisticsTask(NamedTuple):
+    """An object to insert into the recorder queue to compile statistics."""
+
+    start: datetime
+
+
+class PendingRows(NamedTuple):
+    """Rows of an event waiting to be written.
+
+    The shared values are kept apart from the rows so the rows
+    can be rebuilt when the write has to be retried.
+    """
+
+    event_row: Dict[str, Any]
+    event_type: str
+    shared_data: str
+    state_row: Optional[Dict[str, Any]]
+    shared_attrs: Optional[str]
+    entity_ids: List[str]
+
+
 class WaitTask:
     """An object to insert into the recorder queue to tell it set the _queue_watch event."""
 
 
+class CommitTask(NamedTuple):
+    """An object to insert into the recorder queue to commit the pending rows now."""
+
+    done: Optional[asyncio.Future] = None
+
+
 class Recorder(threading.Thread):
     """A threaded recorder class."""
 
@@ -251,6 +369,8 @@ class Recorder(threading.Thread):
         entity_filter: Callable[[str], bool],
         exclude_t: List[str],
         db_integrity_check: bool,
+        max_commit_interval: Optional[int] = None,
+        retention: Optional[Callable[[str], Optional[int]]] = None,
     ) -> None:
         """Initialize the recorder."""
         threading.Thread.__init__(self, name="Recorder")
@@ -259,6 +379,10 @@ class Recorder(threading.Thread):
         self.auto_purge = auto_purge
         self.keep_days = keep_days
         self.commit_interval = commit_interval
+        # The commit interval adapts to the load
+        # between commit_interval and max_commit_interval
+        self.max_commit_interval = max(max_commit_interval or 0, commit_interval)
+        self.current_commit_interval: float = commit_interval
         self.queue: Any = queue.SimpleQueue()
         self.recording_start = dt_util.utcnow()
         self.db_url = uri
@@ -272,12 +396,22 @@ class Recorder(threading.Thread):
 
         self.entity_filter = entity_filter
         self.exclude_t = exclude_t
-
-        self._timechanges_seen = 0
-        self._commits_without_expire = 0
-        self._keepalive_count = 0
-        self._old_states = {}
-        self._pending_expunge = []
+        # Returns the days to keep the states of an entity
+        # or None if purge_keep_days applies
+        self.retention = retention
+
+        self._commit_deadline: Optional[float] = None
+        self._keepalive_deadline = 0.0
+        self._old_states: Dict[str, int] = {}
+        self._retention_groups: Optional[Tuple[Any, Dict[int, List[str]]]] = None
+        self._pending_rows: List[PendingRows] = []
+        self._next_ids: Dict[Any, int] = {}
+        self._shared_ids: Dict[Any, LRU[str, int]] = {
+            model: LRU(SHARED_ID_CACHE_SIZE) for model in SHARED_MODELS
+        }
+        self.statistics_collector = statistics.StatisticsCollector()
+        self.purge_progress: Optional[Dict[str, Any]] = None
+        self.purge_sensor_entity_id: Optional[str] = None
         self.event_session = None
         self.get_session = None
         self._completed_database_setup = None
@@ -298,6 +432,10 @@ class Recorder(threading.Thread):
     @callback
     def _async_event_filter(self, event):
         """Filter events."""
+        # The recorder runs its own commit and keepalive deadlines
+        if event.event_type == EVENT_TIME_CHANGED:
+            return False
+
         if event.event_type in self.exclude_t:
             return False
 
@@ -305,6 +443,9 @@ class Recorder(threading.Thread):
         if entity_id is not None:
             if not self.entity_filter(entity_id):
                 return False
+            # Recording the purge progress would add rows while purging
+            if entity_id == self.purge_sensor_entity_id:
+                return False
 
         return True
 
@@ -316,6 +457,11 @@ class Recorder(threading.Thread):
 
         self.queue.put(PurgeTask(keep_days, repack, apply_filter))
 
+    def do_adhoc_statistics(self, **kwargs):
+        """Trigger an adhoc statistics compilation."""
+        start = kwargs.get("start", dt_util.utcnow())
+        self.queue.put(StatisticsTask(start))
+
     def run(self):
         """Start processing events to save."""
 
@@ -377,12 +523,34 @@ class Recorder(threading.Thread):
                 async_purge, hour=4, minute=12, second=0
             )
 
+        # Resume the purge that was running when Home Assistant stopped
+        self._resume_purge()
+
+        @callback
+        def async_periodic_statistics(now):
+            """Trigger the statistics compilation."""
+            self.queue.put(StatisticsTask(dt_util.as_utc(now)))
+
+        # Compile the statistics of the last five minutes, and
+        # of the last hour when it has ended, every five minutes
+        self.hass.helpers.event.track_time_change(
+            async_periodic_statistics, minute=range(0, 60, 5), second=10
+        )
+
         _LOGGER.debug("Recorder processing the queue")
         # Use a session for the event read loop
-        # with a commit every time the event time
-        # has changed. This reduces the disk io.
+        # with a commit once the commit interval
+        # has passed. This reduces the disk io.
+        self._keepalive_deadline = time.monotonic() + KEEPALIVE_TIME
         while True:
-            event = self.queue.get()
+            deadline = self._keepalive_deadline
+            if self._commit_deadline is not None:
+                deadline = min(deadline, self._commit_deadline)
+            try:
+                event = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self._run_deadlines()
+                continue
 
             if event is None:
                 self._shutdown()
@@ -390,6 +558,50 @@ class Recorder(threading.Thread):
 
             self._process_one_event(event)
 
+            if time.monotonic() >= deadline:
+                self._run_deadlines()
+
+    def _run_deadlines(self):
+        """Commit and send keepalives when their deadlines have passed."""
+        now = time.monotonic()
+        if self._commit_deadline is not None and now >= self._commit_deadline:
+            rows = len(self._pending_rows)
+            self._commit_event_session_or_recover()
+            self._adapt_commit_interval(rows / self.current_commit_interval)
+        if now >= self._keepalive_deadline:
+            self._send_keep_alive()
+
+    def _adapt_commit_interval(self, rate):
+        """Grow the commit interval under load and shrink it when idle."""
+        if self.max_commit_interval == self.commit_interval:
+            return
+        if rate >= ADAPTIVE_COMMIT_BUSY_RATE:
+            interval = min(self.current_commit_interval * 2, self.max_commit_interval)
+        elif rate < ADAPTIVE_COMMIT_BUSY_RATE / 2:
+            interval = max(self.current_commit_interval / 2, self.commit_interval)
+        else:
+            return
+        if interval != self.current_commit_interval:
+            _LOGGER.debug("Commit interval changed to %s seconds", interval)
+            self.current_commit_interval = interval
+
+    def _resume_purge(self):
+        """Queue the purge that has not finished yet, if any."""
+        try:
+            with session_scope(session=self.get_session()) as session:
+                progress = session.query(RecorderPurge).first()
+                if progress is None:
+                    return
+                task = PurgeTask(
+                    progress.keep_days, progress.repack, progress.apply_filter
+                )
+        except exc.SQLAlchemyError as err:
+            _LOGGER.warning("Error checking for an unfinished purge: %s", err)
+            return
+
+        _LOGGER.info("Resuming the purge of data older than %s days", task.keep_days)
+        self.queue.put(task)
+
     def _setup_recorder(self) -> bool:
         """Create schema and connect to the database."""
         tries = 1
@@ -430,27 +642,33 @@ class Recorder(threading.Thread):
     def _process_one_event(self, event):
         """Process one event."""
         if isinstance(event, PurgeTask):
-            # Schedule a new purge task if this one didn't finish
-            if not purge.purge_old_data(
+            # Write out pending rows first as they may reference
+            # old states or attributes that are about to be purged
+            if self._pending_rows:
+                self._commit_event_session_or_recover()
+            # Purge the next chunk right away while nothing else is queued,
+            # otherwise schedule a new purge task after the queued events
+            while not purge.purge_old_data(
                 self, event.keep_days, event.repack, event.apply_filter
             ):
-                self.queue.put(
-                    PurgeTask(event.keep_days, event.repack, event.apply_filter)
-                )
+                if not self.queue.empty():
+                    self.queue.put(
+                        PurgeTask(event.keep_days, event.repack, event.apply_filter)
+                    )
+                    break
+            return
+        if isinstance(event, StatisticsTask):
+            statistics.compile_statistics(self, event.start)
             return
         if isinstance(event, WaitTask):
             self._queue_watch.set()
             return
-        if event.event_type == EVENT_TIME_CHANGED:
-            self._keepalive_count += 1
-            if self._keepalive_count >= KEEPALIVE_TIME:
-                self._keepalive_count = 0
-                self._send_keep_alive()
-            if self.commit_interval:
-                self._timechanges_seen += 1
-                if self._timechanges_seen >= self.commit_interval:
-                    self._timechanges_seen = 0
-                    self._commit_event_session_or_recover()
+        if isinstance(event, CommitTask):
+            try:
+                self._commit_event_session_or_recover()
+            finally:
+                if event.done is not None:
+                    self.hass.add_job(_async_set_done, event.done)
             return
 
         if not self.enabled:
@@ -458,11 +676,19 @@ class Recorder(threading.Thread):
 
         try:
             if event.event_type == EVENT_STATE_CHANGED:
-                dbevent = Events.from_event(event, event_data="{}")
+                event_row = Events.row_from_event(event, event_data="{}")
+                entity_ids = []
             else:
-                dbevent = Events.from_event(event)
-            dbevent.created = event.time_fired
-            self.event_session.add(dbevent)
+                event_row = Events.row_from_event(event)
+                # Referenced entities are stored in the indexed
+                # event_entities table for finding their events
+                entity_ids = EventEntities.entity_ids_from_event(event)
+            event_row["created"] = event.time_fired
+            # The type and data are stored in the shared
+            # event_types and event_data tables
+            event_type = event_row["event_type"]
+            shared_data = event_row["event_data"]
+            event_row["event_type"] = event_row["event_data"] = None
         except (TypeError, ValueError):
             _LOGGER.warning("Event is not JSON serializable: %s", event)
             return
@@ -471,40 +697,50 @@ class Recorder(threading.Thread):
             _LOGGER.exception("Error adding event: %s", err)
             return
 
+        state_row = None
+        shared_attrs = None
         if event.event_type == EVENT_STATE_CHANGED:
             try:
-                dbstate = States.from_event(event)
-                has_new_state = event.data.get("new_state")
-                if dbstate.entity_id in self._old_states:
-                    old_state = self._old_states.pop(dbstate.entity_id)
-                    if old_state.state_id:
-                        dbstate.old_state_id = old_state.state_id
-                    else:
-                        dbstate.old_state = old_state
-                if not has_new_state:
-                    dbstate.state = None
-                dbstate.event = dbevent
-                dbstate.created = event.time_fired
-                self.event_session.add(dbstate)
-                if has_new_state:
-                    self._old_states[dbstate.entity_id] = dbstate
-                    self._pending_expunge.append(dbstate)
+                state_row = States.row_from_event(event)
+                if not event.data.get("new_state"):
+                    state_row["state"] = None
+                state_row["created"] = event.time_fired
+                # The attributes are stored in the shared state_attributes table
+                shared_attrs = state_row["attributes"]
+                state_row["attributes"] = None
+                self.statistics_collector.add_state_changed(event)
             except (TypeError, ValueError):
                 _LOGGER.warning(
                     "State is not JSON serializable: %s",
                     event.data.get("new_state"),
                 )
+                state_row = None
             except Exception as err:  # pylint: disable=broad-except
                 # Must catch the exception to prevent the loop from collapsing
                 _LOGGER.exception("Error adding state change: %s", err)
+                state_row = None
+
+        self._pending_rows.append(
+            PendingRows(
+                event_row, event_type, shared_data, state_row, shared_attrs, entity_ids
+            )
+        )
 
         # If they do not have a commit interval
-        # than we commit right away
+        # than we commit right away. A full batch is
+        # written out early to bound memory use when
+        # the recorder falls behind.
         if not self.commit_interval:
             self._commit_event_session_or_recover()
+        elif len(self._pending_rows) >= MAX_BATCH_SIZE:
+            self._commit_event_session_or_recover()
+            self._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE)
+        elif self._commit_deadline is None:
+            self._commit_deadline = time.monotonic() + self.current_commit_interval
 
     def _commit_event_session_or_recover(self):
         """Commit changes to the database and recover if the database fails when possible."""
+        self._commit_deadline = None
         try:
             self._commit_event_session_or_retry()
             return
@@ -543,28 +779,166 @@ class Recorder(threading.Thread):
                 if tries == self.db_max_retries:
                     raise
 
+                # The pending rows are kept so they are written
+                # again once the transaction has been rolled back
+                self.event_session.rollback()
                 tries += 1
                 time.sleep(self.db_retry_wait)
 
     def _commit_event_session(self):
-        self._commits_without_expire += 1
-
-        if self._pending_expunge:
-            self.event_session.flush()
-            for dbstate in self._pending_expunge:
-                # Expunge the state so its not expired
-                # until we use it later for dbstate.old_state
-                if dbstate in self.event_session:
-                    self.event_session.expunge(dbstate)
-            self._pending_expunge = []
+        if self._pending_rows:
+            self._write_pending_rows()
         self.event_session.commit()
 
-        # Expire is an expensive operation (frequently more expensive
-        # than the flush and commit itself) so we only
-        # do it after EXPIRE_AFTER_COMMITS commits
-        if self._commits_without_expire == EXPIRE_AFTER_COMMITS:
-            self._commits_without_expire = 0
-            self.event_session.expire_all()
+    def _write_pending_rows(self):
+        """Write the pending events and states with Core-level inserts."""
+        try:
+            if not self._next_ids:
+                # The ids could not be read when the session was opened
+                self._setup_id_allocation()
+            if not self._next_ids:
+                self._insert_pending_rows_one_by_one()
+            else:
+                try:
+                    self._insert_pending_rows_many()
+                except exc.IntegrityError as err:
+                    # Something else wrote rows with the ids we allocated,
+                    # continue after them
+                    _LOGGER.warning(
+                        "Reallocating ids after a conflicting insert: %s", err
+                    )
+                    self.event_session.rollback()
+                    self._clear_cached_ids()
+                    self._setup_id_allocation()
+                    self._insert_pending_rows_many()
+        except Exception:
+            # The cached ids may point to rows that were never written
+            self._clear_cached_ids()
+            self._next_ids = {}
+            raise
+
+        _LOGGER.debug(
+            "Wrote %s rows, queue backlog is %s", len(self._pending_rows), self.backlog
+        )
+        self._pending_rows = []
+
+    def _insert_pending_rows_many(self):
+        """Insert the pending rows with one executemany per table.
+
+        The primary keys are allocated here so rows can reference their
+        shared rows and old state without reading anything back.
+        """
+        new_rows = {model: [] for model in INSERT_ORDER}
+        event_entity_rows = []
+        for pending in self._pending_rows:
+            event_row = pending.event_row
+            event_row["event_id"] = self._allocate_id(Events)
+            event_row["event_type_id"] = self._shared_id(
+                EventTypes, pending.event_type, new_rows
+            )
+            event_row["data_id"] = self._shared_id(
+                EventData, pending.shared_data, new_rows
+            )
+            new_rows[Events].append(event_row)
+            event_entity_rows.extend(
+                {"event_id": event_row["event_id"], "entity_id": entity_id}
+                for entity_id in pending.entity_ids
+            )
+            state_row = pending.state_row
+            if state_row is None:
+                continue
+            state_row["attributes_id"] = self._shared_id(
+                StateAttributes, pending.shared_attrs, new_rows
+            )
+            state_row["event_id"] = event_row["event_id"]
+            state_row["state_id"] = self._allocate_id(States)
+            self._link_old_state(state_row)
+            new_rows[States].append(state_row)
+
+        for model in INSERT_ORDER:
+            if new_rows[model]:
+                self.event_session.execute(model.__table__.insert(), new_rows[model])
+        if event_entity_rows:
+            self.event_session.execute(
+                EventEntities.__table__.insert(), event_entity_rows
+            )
+
+    def _insert_pending_rows_one_by_one(self):
+        """Insert the pending rows for databases we cannot allocate ids for."""
+        for pending in self._pending_rows:
+            event_row = pending.event_row
+            event_row["event_type_id"] = self._shared_id(EventTypes, pending.event_type)
+            event_row["data_id"] = self._shared_id(EventData, pending.shared_data)
+            result = self.event_session.execute(Events.__table__.insert(), event_row)
+            if pending.entity_ids:
+                self.event_session.execute(
+                    EventEntities.__table__.insert(),
+                    [
+                        {
+                            "event_id": result.inserted_primary_key[0],
+                            "entity_id": entity_id,
+                        }
+                        for entity_id in pending.entity_ids
+                    ],
+                )
+            state_row = pending.state_row
+            if state_row is None:
+                continue
+            state_row["attributes_id"] = self._shared_id(
+                StateAttributes, pending.shared_attrs
+            )
+            state_row["event_id"] = result.inserted_primary_key[0]
+            state_row["state_id"] = None
+            self._link_old_state(state_row)
+            result = self.event_session.execute(States.__table__.insert(), state_row)
+            if state_row["state"] is not None:
+                self._old_states[state_row["entity_id"]] = result.inserted_primary_key[
+                    0
+                ]
+
+    def _shared_id(self, model, content, new_rows=None):
+        """Return the id of the shared row storing content.
+
+        Without a stored copy a new row is added to new_rows with an
+        allocated id, or inserted right away when ids are not allocated.
+        """
+        cache = self._shared_ids[model]
+        shared_id = cache.get(content)
+        if shared_id is not None:
+            return shared_id
+
+        shared_id = model.find_shared_id(self.event_session, content)
+        if shared_id is None:
+            row = model.shared_row(content)
+            if new_rows is None:
+                result = self.event_session.execute(model.__table__.insert(), row)
+                shared_id = result.inserted_primary_key[0]
+            else:
+                shared_id = row[_primary_key_name(model)] = self._allocate_id(model)
+                new_rows[model].append(row)
+
+        cache[content] = shared_id
+        return shared_id
+
+    def _allocate_id(self, model):
+        """Allocate the next primary key of a table."""
+        next_id = self._next_ids[model]
+        self._next_ids[model] = next_id + 1
+        return next_id
+
+    def _clear_cached_ids(self):
+        """Forget the ids of old states and shared rows."""
+        self._old_states = {}
+        for cache in self._shared_ids.values():
+            cache.clear()
+
+    def _link_old_state(self, state_row):
+        """Set old_state_id from the last state written for the entity."""
+        entity_id = state_row["entity_id"]
+        state_row["old_state_id"] = self._old_states.pop(entity_id, None)
+        # A removed entity has no state to link the next one to
+        if state_row["state"] is not None and state_row["state_id"] is not None:
+            self._old_states[entity_id] = state_row["state_id"]
 
     def _handle_sqlite_corruption(self):
         """Handle the sqlite3 database being corrupt."""
@@ -574,8 +948,6 @@ class Recorder(threading.Thread):
 
     def _reopen_event_session(self):
         """Rollback the event session and reopen it after a failure."""
-        self._old_states = {}
-
         try:
             self.event_session.rollback()
             self.event_session.close()
@@ -589,13 +961,37 @@ class Recorder(threading.Thread):
 
     def _open_event_session(self):
         """Open the event session."""
+        # Ids cached for an earlier session may not have been committed
+        self._pending_rows = []
+        self._clear_cached_ids()
+        self._next_ids = {}
         try:
             self.event_session = self.get_session()
             self.event_session.expire_on_commit = False
+            self._setup_id_allocation()
         except Exception as err:  # pylint: disable=broad-except
             _LOGGER.exception("Error while creating new event session: %s", err)
 
+    def _setup_id_allocation(self):
+        """Continue the primary keys of the tables the recorder writes to.
+
+        For databases that accept explicit values for autoincrement
+        columns and pick up after them, we allocate the ids ourselves
+        so rows can be written with executemany. The current maximum
+        is read when the session is opened and again when an insert
+        conflicts with rows written outside of the recorder, e.g. when
+        importing data.
+        """
+        self._next_ids = {}
+        if self.engine.dialect.name not in ID_ALLOCATION_DIALECTS:
+            return
+        for model in INSERT_ORDER:
+            primary_key = getattr(model, _primary_key_name(model))
+            max_id = self.event_session.query(func.max(primary_key)).scalar()
+            self._next_ids[model] = (max_id or 0) + 1
+
     def _send_keep_alive(self):
+        self._keepalive_deadline = time.monotonic() + KEEPALIVE_TIME
         try:
             _LOGGER.debug("Sending keepalive")
             self.event_session.connection().scalar(select([1]))
@@ -607,11 +1003,23 @@ class Recorder(threading.Thread):
             )
             self._reopen_event_session()
 
+    async def async_commit(self) -> None:
+        """Wait until the events fired so far are committed to the database."""
+        done = self.hass.loop.create_future()
+        # Queue the commit after the events that are waiting to be recorded
+        self.hass.loop.call_soon(self.queue.put, CommitTask(done))
+        await done
+
     @callback
     def event_listener(self, event):
         """Listen for new events and put them in the process queue."""
         self.queue.put(event)
 
+    @property
+    def backlog(self) -> int:
+        """Return the number of items waiting in the queue."""
+        return self.queue.qsize()
+
     def block_till_done(self):
         """Block till all events processed.
 
@@ -6,5 +6,20 @@ DOMAIN = "recorder"
 
 CONF_DB_INTEGRITY_CHECK = "db_integrity_check"
 
+SIGNAL_PURGE_PROGRESS = "recorder_purge_progress"
+
 # The maximum number of rows (events) we purge in one delete statement
 MAX_ROWS_TO_PURGE = 1000
+
+# The maximum number of events we hold before writing them
+# out, even if the commit interval has not passed yet
+MAX_BATCH_SIZE = 1000
+
+# The number of rows written per second of the commit interval above which
+# an adaptive commit interval grows, it shrinks again below half of it
+ADAPTIVE_COMMIT_BUSY_RATE = 100
+
+# The number of recently written event types, event data and
+# attributes we keep the shared row id of per table, to avoid
+# looking them up again
+SHARED_ID_CACHE_SIZE = 2048
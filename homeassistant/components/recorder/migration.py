@@ -363,6 +363,29 @@ def _apply_update(engine, new_version, old_version):
         if engine.dialect.name == "mysql":
             _modify_columns(engine, "events", ["event_data LONGTEXT"])
             _modify_columns(engine, "states", ["attributes LONGTEXT"])
+    elif new_version == 13:
+        # The state_attributes table is created by create_all
+        # since it did not exist before
+        _add_columns(engine, "states", ["attributes_id INTEGER"])
+        _create_index(engine, "states", "ix_states_attributes_id")
+    elif new_version == 14:
+        # The event_types and event_data tables are created by
+        # create_all since they did not exist before
+        _add_columns(engine, "events", ["event_type_id INTEGER", "data_id INTEGER"])
+        _create_index(engine, "events", "ix_events_event_type_id_time_fired")
+        _create_index(engine, "events", "ix_events_data_id")
+    elif new_version == 15:
+        # The statistics_meta, statistics and statistics_short_term
+        # tables are created by create_all since they did not exist before
+        pass
+    elif new_version == 16:
+        # The event_entities table is created by create_all since it did
+        # not exist before. Events recorded before this change are not in it.
+        pass
+    elif new_version == 17:
+        # The recorder_purge table is created by create_all
+        # since it did not exist before
+        pass
     else:
         raise ValueError(f"No schema migration defined for version {new_version}")
 
@@ -1,11 +1,14 @@
 """Models for SQLAlchemy."""
 import json
 import logging
+import zlib
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
+    Float,
     ForeignKey,
     Index,
     Integer,
@@ -14,10 +17,11 @@ from sqlalchemy import (
     distinct,
 )
 from sqlalchemy.dialects import mysql
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.declarative import declarative_base, declared_attr
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.session import Session
 
+from homeassistant.const import ATTR_ENTITY_ID, ATTR_SERVICE_DATA, EVENT_CALL_SERVICE
 from homeassistant.core import Context, Event, EventOrigin, State, split_entity_id
 from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
@@ -26,15 +30,23 @@ import homeassistant.util.dt as dt_util
 # pylint: disable=invalid-name
 Base = declarative_base()
 
-SCHEMA_VERSION = 12
+SCHEMA_VERSION = 17
 
 _LOGGER = logging.getLogger(__name__)
 
 DB_TIMEZONE = "+00:00"
 
 TABLE_EVENTS = "events"
+TABLE_EVENT_TYPES = "event_types"
+TABLE_EVENT_DATA = "event_data"
+TABLE_EVENT_ENTITIES = "event_entities"
 TABLE_STATES = "states"
+TABLE_STATE_ATTRIBUTES = "state_attributes"
 TABLE_RECORDER_RUNS = "recorder_runs"
+TABLE_RECORDER_PURGE = "recorder_purge"
+TABLE_STATISTICS_META = "statistics_meta"
+TABLE_STATISTICS = "statistics"
+TABLE_STATISTICS_SHORT_TERM = "statistics_short_term"
 TABLE_SCHEMA_CHANGES = "schema_changes"
 
 ALL_TABLES = [TABLE_STATES, TABLE_EVENTS, TABLE_RECORDER_RUNS, TABLE_SCHEMA_CHANGES]
@@ -57,11 +69,16 @@ class Events(Base):  # type: ignore
     context_id = Column(String(36), index=True)
     context_user_id = Column(String(36), index=True)
     context_parent_id = Column(String(36), index=True)
+    event_type_id = Column(Integer, ForeignKey("event_types.event_type_id"))
+    data_id = Column(Integer, ForeignKey("event_data.data_id"), index=True)
+    event_type_rel = relationship("EventTypes", uselist=False, lazy="joined")
+    event_data_rel = relationship("EventData", uselist=False, lazy="joined")
 
     __table_args__ = (
         # Used for fetching events at a specific time
         # see logbook
         Index("ix_events_event_type_time_fired", "event_type", "time_fired"),
+        Index("ix_events_event_type_id_time_fired", "event_type_id", "time_fired"),
     )
 
     def __repr__(self) -> str:
@@ -76,15 +93,23 @@ class Events(Base):  # type: ignore
     @staticmethod
     def from_event(event, event_data=None):
         """Create an event database object from a native event."""
-        return Events(
-            event_type=event.event_type,
-            event_data=event_data or json.dumps(event.data, cls=JSONEncoder),
-            origin=str(event.origin.value),
-            time_fired=event.time_fired,
-            context_id=event.context.id,
-            context_user_id=event.context.user_id,
-            context_parent_id=event.context.parent_id,
-        )
+        return Events(**Events.row_from_event(event, event_data))
+
+    @staticmethod
+    def row_from_event(event, event_data=None):
+        """Create the column values for an events row from a native event.
+
+        Used for Core-level inserts that bypass the ORM.
+        """
+        return {
+            "event_type": event.event_type,
+            "event_data": event_data or json.dumps(event.data, cls=JSONEncoder),
+            "origin": str(event.origin.value),
+            "time_fired": event.time_fired,
+            "context_id": event.context.id,
+            "context_user_id": event.context.user_id,
+            "context_parent_id": event.context.parent_id,
+        }
 
     def to_native(self, validate_entity_id=True):
         """Convert to a natve HA Event."""
@@ -93,10 +118,17 @@ class Events(Base):  # type: ignore
             user_id=self.context_user_id,
             parent_id=self.context_parent_id,
         )
+        # Events recorded since schema 14 share their type and data
+        event_type = self.event_type
+        if event_type is None and self.event_type_rel is not None:
+            event_type = self.event_type_rel.event_type
+        event_data = self.event_data
+        if event_data is None and self.event_data_rel is not None:
+            event_data = self.event_data_rel.shared_data
         try:
             return Event(
-                self.event_type,
-                json.loads(self.event_data),
+                event_type,
+                json.loads(event_data) if event_data else {},
                 EventOrigin(self.origin),
                 process_timestamp(self.time_fired),
                 context=context,
@@ -107,6 +139,125 @@ class Events(Base):  # type: ignore
             return None
 
 
+class EventTypes(Base):  # type: ignore
+    """Event types, shared between events."""
+
+    __tablename__ = TABLE_EVENT_TYPES
+    event_type_id = Column(Integer, primary_key=True)
+    event_type = Column(String(64), index=True, unique=True)
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.EventTypes("
+            f"id={self.event_type_id}, event_type='{self.event_type}'"
+            f")>"
+        )
+
+    @staticmethod
+    def shared_row(event_type):
+        """Create the column values for a new shared row."""
+        return {"event_type": event_type}
+
+    @staticmethod
+    def find_shared_id(session, event_type):
+        """Return the id of the row for the event type if there is one."""
+        return (
+            session.query(EventTypes.event_type_id)
+            .filter(EventTypes.event_type == event_type)
+            .scalar()
+        )
+
+
+class EventData(Base):  # type: ignore
+    """Event data, shared between events."""
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_EVENT_DATA
+    data_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    # Note that this is not named event_data to avoid confusion with the events table
+    shared_data = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.EventData("
+            f"id={self.data_id}, hash='{self.hash}', data='{self.shared_data}'"
+            f")>"
+        )
+
+    @staticmethod
+    def shared_row(shared_data):
+        """Create the column values for a new shared row."""
+        return {"hash": hash_shared_json(shared_data), "shared_data": shared_data}
+
+    @staticmethod
+    def find_shared_id(session, shared_data):
+        """Return the id of a stored copy of the data if there is one."""
+        return (
+            session.query(EventData.data_id)
+            .filter(EventData.hash == hash_shared_json(shared_data))
+            .filter(EventData.shared_data == shared_data)
+            .limit(1)
+            .scalar()
+        )
+
+
+class EventEntities(Base):  # type: ignore
+    """Entities referenced by the data of events other than state changes."""
+
+    __tablename__ = TABLE_EVENT_ENTITIES
+    event_id = Column(
+        Integer,
+        ForeignKey("events.event_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    entity_id = Column(String(255), primary_key=True)
+
+    __table_args__ = (
+        # Used for finding the events of an entity
+        # see logbook
+        Index("ix_event_entities_entity_id_event_id", "entity_id", "event_id"),
+    )
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.EventEntities("
+            f"event_id={self.event_id}, entity_id='{self.entity_id}'"
+            f")>"
+        )
+
+    @staticmethod
+    def entity_ids_from_event(event):
+        """Return the entity ids in the entity_id field of the event data.
+
+        Service calls reference their targets in the entity_id field of
+        the service data.
+        """
+        data = event.data
+        if event.event_type == EVENT_CALL_SERVICE:
+            data = data.get(ATTR_SERVICE_DATA)
+            if not isinstance(data, dict):
+                return []
+        entity_ids = data.get(ATTR_ENTITY_ID)
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        elif not isinstance(entity_ids, list):
+            return []
+        return list(
+            {
+                entity_id: None
+                for entity_id in entity_ids
+                if isinstance(entity_id, str) and 0 < len(entity_id) <= 255
+            }
+        )
+
+
 class States(Base):  # type: ignore
     """State change history."""
 
@@ -129,8 +280,12 @@ class States(Base):  # type: ignore
     old_state_id = Column(
         Integer, ForeignKey("states.state_id", ondelete="NO ACTION"), index=True
     )
+    attributes_id = Column(
+        Integer, ForeignKey("state_attributes.attributes_id"), index=True
+    )
     event = relationship("Events", uselist=False)
     old_state = relationship("States", remote_side=[state_id])
+    state_attributes = relationship("StateAttributes", uselist=False, lazy="joined")
 
     __table_args__ = (
         # Used for fetching the state of entities at a specific time
@@ -152,34 +307,48 @@ class States(Base):  # type: ignore
     @staticmethod
     def from_event(event):
         """Create object from a state_changed event."""
+        return States(**States.row_from_event(event))
+
+    @staticmethod
+    def row_from_event(event):
+        """Create the column values for a states row from a state_changed event.
+
+        Used for Core-level inserts that bypass the ORM.
+        """
         entity_id = event.data["entity_id"]
         state = event.data.get("new_state")
 
-        dbstate = States(entity_id=entity_id)
-
         # State got deleted
         if state is None:
-            dbstate.state = ""
-            dbstate.domain = split_entity_id(entity_id)[0]
-            dbstate.attributes = "{}"
-            dbstate.last_changed = event.time_fired
-            dbstate.last_updated = event.time_fired
-        else:
-            dbstate.domain = state.domain
-            dbstate.state = state.state
-            dbstate.attributes = json.dumps(dict(state.attributes), cls=JSONEncoder)
-            dbstate.last_changed = state.last_changed
-            dbstate.last_updated = state.last_updated
-
-        return dbstate
+            return {
+                "entity_id": entity_id,
+                "state": "",
+                "domain": split_entity_id(entity_id)[0],
+                "attributes": "{}",
+                "last_changed": event.time_fired,
+                "last_updated": event.time_fired,
+            }
+
+        return {
+            "entity_id": entity_id,
+            "state": state.state,
+            "domain": state.domain,
+            "attributes": json.dumps(dict(state.attributes), cls=JSONEncoder),
+            "last_changed": state.last_changed,
+            "last_updated": state.last_updated,
+        }
 
     def to_native(self, validate_entity_id=True):
         """Convert to an HA state object."""
+        attributes = self.attributes
+        # States recorded since schema 13 share their attributes
+        if attributes is None and self.state_attributes is not None:
+            attributes = self.state_attributes.shared_attrs
         try:
             return State(
                 self.entity_id,
                 self.state,
-                json.loads(self.attributes),
+                json.loads(attributes) if attributes else {},
                 process_timestamp(self.last_changed),
                 process_timestamp(self.last_updated),
                 # Join the events table on event_id to get the context instead
@@ -193,6 +362,101 @@ class States(Base):  # type: ignore
             return None
 
 
+class StateAttributes(Base):  # type: ignore
+    """State attribute change history, shared between states."""
+
+    __table_args__ = {
+        "mysql_default_charset": "utf8mb4",
+        "mysql_collate": "utf8mb4_unicode_ci",
+    }
+    __tablename__ = TABLE_STATE_ATTRIBUTES
+    attributes_id = Column(Integer, primary_key=True)
+    hash = Column(BigInteger, index=True)
+    # Note that this is not named attributes to avoid confusion with the states table
+    shared_attrs = Column(Text().with_variant(mysql.LONGTEXT, "mysql"))
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.StateAttributes("
+            f"id={self.attributes_id}, hash='{self.hash}', attributes='{self.shared_attrs}'"
+            f")>"
+        )
+
+    @staticmethod
+    def shared_row(shared_attrs):
+        """Create the column values for a new shared row."""
+        return {"hash": hash_shared_json(shared_attrs), "shared_attrs": shared_attrs}
+
+    @staticmethod
+    def find_shared_id(session, shared_attrs):
+        """Return the id of a stored copy of the attributes if there is one."""
+        return (
+            session.query(StateAttributes.attributes_id)
+            .filter(StateAttributes.hash == hash_shared_json(shared_attrs))
+            .filter(StateAttributes.shared_attrs == shared_attrs)
+            .limit(1)
+            .scalar()
+        )
+
+
+class StatisticsMeta(Base):  # type: ignore
+    """Statistics meta data."""
+
+    __tablename__ = TABLE_STATISTICS_META
+    id = Column(Integer, primary_key=True)
+    statistic_id = Column(String(255), index=True, unique=True)
+    unit_of_measurement = Column(String(255))
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.StatisticsMeta("
+            f"id={self.id}, statistic_id='{self.statistic_id}', "
+            f"unit_of_measurement='{self.unit_of_measurement}'"
+            f")>"
+        )
+
+
+class StatisticsBase:
+    """Statistics base class."""
+
+    id = Column(Integer, primary_key=True)
+    created = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    start = Column(DateTime(timezone=True))
+    mean = Column(Float())
+    min = Column(Float())
+    max = Column(Float())
+
+    @declared_attr
+    def metadata_id(self):
+        """Define the metadata_id column for sub classes."""
+        return Column(
+            Integer,
+            ForeignKey(f"{TABLE_STATISTICS_META}.id", ondelete="CASCADE"),
+        )
+
+
+class Statistics(Base, StatisticsBase):  # type: ignore
+    """Hourly statistics."""
+
+    __tablename__ = TABLE_STATISTICS
+    __table_args__ = (
+        # Used for fetching statistics for a certain entity at a specific time
+        Index("ix_statistics_metadata_id_start", "metadata_id", "start"),
+    )
+
+
+class StatisticsShortTerm(Base, StatisticsBase):  # type: ignore
+    """Five minute statistics."""
+
+    __tablename__ = TABLE_STATISTICS_SHORT_TERM
+    __table_args__ = (
+        # Used for fetching statistics for a certain entity at a specific time
+        Index("ix_statistics_short_term_metadata_id_start", "metadata_id", "start"),
+    )
+
+
 class RecorderRuns(Base):  # type: ignore
     """Representation of recorder run."""
 
@@ -241,6 +505,40 @@ class RecorderRuns(Base):  # type: ignore
         return self
 
 
+class RecorderPurge(Base):  # type: ignore
+    """Progress of the running purge, so it resumes after a restart.
+
+    The purge deletes old states and events by ranges of their primary
+    keys, from the cursor up to the last id that was older than
+    purge_before when the purge started.
+    """
+
+    __tablename__ = TABLE_RECORDER_PURGE
+    purge_id = Column(Integer, primary_key=True)
+    keep_days = Column(Integer)
+    repack = Column(Boolean, default=False)
+    apply_filter = Column(Boolean, default=False)
+    purge_before = Column(DateTime(timezone=True))
+    started = Column(DateTime(timezone=True), default=dt_util.utcnow)
+    first_state_id = Column(Integer)
+    last_state_id = Column(Integer)
+    state_cursor = Column(Integer)
+    states_deleted = Column(Integer, default=0)
+    first_event_id = Column(Integer)
+    last_event_id = Column(Integer)
+    event_cursor = Column(Integer)
+    events_deleted = Column(Integer, default=0)
+
+    def __repr__(self) -> str:
+        """Return string representation of instance for debugging."""
+        return (
+            f"<recorder.RecorderPurge("
+            f"id={self.purge_id}, keep_days={self.keep_days}, "
+            f"state_cursor={self.state_cursor}, event_cursor={self.event_cursor}"
+            f")>"
+        )
+
+
 class SchemaChanges(Base):  # type: ignore
     """Representation of schema version changes."""
 
@@ -259,6 +557,15 @@ class SchemaChanges(Base):  # type: ignore
         )
 
 
+def hash_shared_json(shared_json):
+    """Return the hash of a json string stored in a shared table.
+
+    The hash is only used to find candidates, rows are
+    compared on their content as well.
+    """
+    return zlib.crc32(shared_json.encode("utf-8"))
+
+
 def process_timestamp(ts):
     """Process a timestamp into datetime object."""
     if ts is None:
@@ -1,19 +1,37 @@
 """Purge old data helper."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from datetime import datetime, timedelta
+import fnmatch
 import logging
+import re
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Iterable
 
+from sqlalchemy import func
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.orm.session import Session
 from sqlalchemy.sql.expression import distinct
 
+from homeassistant.const import CONF_DOMAINS, CONF_ENTITIES
+from homeassistant.core import split_entity_id
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entityfilter import CONF_ENTITY_GLOBS
 import homeassistant.util.dt as dt_util
 
-from .const import MAX_ROWS_TO_PURGE
-from .models import Events, RecorderRuns, States
+from .const import MAX_ROWS_TO_PURGE, SIGNAL_PURGE_PROGRESS
+from .models import (
+    EventData,
+    EventEntities,
+    Events,
+    EventTypes,
+    RecorderPurge,
+    RecorderRuns,
+    StateAttributes,
+    States,
+    process_timestamp,
+)
 from .repack import repack_database
 from .util import session_scope
 
@@ -22,37 +40,58 @@ if TYPE_CHECKING:
 
 _LOGGER = logging.getLogger(__name__)
 
+# Keep the IN clauses of the retention purge below
+# the bound parameter limit of older SQLite versions
+RETENTION_ENTITIES_PER_QUERY = 100
+
 
 def purge_old_data(
     instance: Recorder, purge_days: int, repack: bool, apply_filter: bool = False
 ) -> bool:
     """Purge events and states older than purge_days ago.
 
-    Cleans up an timeframe of an hour, based on the oldest record.
+    Deletes one chunk of old states and events by ranges of their primary
+    keys per call and returns False until the purge has finished. The
+    progress is stored in the database, so the purge resumes where it
+    stopped after a restart.
     """
-    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
-    _LOGGER.debug(
-        "Purging states and events before target %s",
-        purge_before.isoformat(sep=" ", timespec="seconds"),
-    )
     try:
         with session_scope(session=instance.get_session()) as session:  # type: ignore
-            # Purge a max of MAX_ROWS_TO_PURGE, based on the oldest states or events record
-            event_ids = _select_event_ids_to_purge(session, purge_before)
-            state_ids = _select_state_ids_to_purge(session, purge_before, event_ids)
-            if state_ids:
-                _purge_state_ids(session, state_ids)
-            if event_ids:
-                _purge_event_ids(session, event_ids)
-                # If states or events purging isn't processing the purge_before yet,
-                # return false, as we are not done yet.
-                _LOGGER.debug("Purging hasn't fully completed yet")
-                return False
-            if apply_filter and _purge_filtered_data(instance, session) is False:
-                _LOGGER.debug("Cleanup filtered data hasn't fully completed yet")
-                return False
-            _purge_old_recorder_runs(instance, session, purge_before)
-        if repack:
+            progress = _purge_progress(session, purge_days, repack, apply_filter)
+            purge_before = process_timestamp(progress.purge_before)
+            _LOGGER.debug(
+                "Purging states and events before target %s",
+                purge_before.isoformat(sep=" ", timespec="seconds"),
+            )
+            # Delete the states first as they reference the events
+            purged_states = _purge_state_range(instance, session, progress)
+            purged_events = _purge_event_range(instance, session, progress)
+            finished = not (purged_states or purged_events)
+            if finished:
+                if instance.retention is not None and not _purge_retention_data(
+                    instance, session, progress
+                ):
+                    _LOGGER.debug("Purging by retention hasn't fully completed yet")
+                    return False
+                if progress.apply_filter and not _purge_filtered_data(
+                    instance, session
+                ):
+                    _LOGGER.debug("Cleanup filtered data hasn't fully completed yet")
+                    return False
+                _purge_old_recorder_runs(instance, session, purge_before)
+                session.delete(progress)
+            progress_info = _progress_info(progress, finished)
+        instance.purge_progress = progress_info
+        # Do not wait for the event loop, the purge runs in the recorder thread
+        instance.hass.add_job(
+            async_dispatcher_send, instance.hass, SIGNAL_PURGE_PROGRESS, progress_info
+        )
+        if not finished:
+            # If states or events purging isn't processing the purge_before yet,
+            # return false, as we are not done yet.
+            _LOGGER.debug("Purging hasn't fully completed yet")
+            return False
+        if progress_info["repack"]:
             repack_database(instance)
     except OperationalError as err:
         # Retry when one of the following MySQL errors occurred:
@@ -74,36 +113,242 @@ def purge_old_data(
     return True
 
 
-def _select_event_ids_to_purge(session: Session, purge_before: datetime) -> list[int]:
-    """Return a list of event ids to purge."""
-    events = (
-        session.query(Events.event_id)
+def _purge_progress(
+    session: Session, purge_days: int, repack: bool, apply_filter: bool
+) -> RecorderPurge:
+    """Return the progress of the running purge or start a new one.
+
+    The last ids older than purge_before are looked up once when the purge
+    starts, the chunks only seek the primary keys from the cursors.
+    """
+    progress = session.query(RecorderPurge).first()
+    if progress is not None:
+        # The running purge also removes everything a purge
+        # that keeps more days would remove
+        if progress.keep_days <= purge_days:
+            progress.repack = bool(progress.repack or repack)
+            progress.apply_filter = bool(progress.apply_filter or apply_filter)
+            return progress
+        _LOGGER.debug("Replacing the running purge of %s days", progress.keep_days)
+        session.delete(progress)
+
+    purge_before = dt_util.utcnow() - timedelta(days=purge_days)
+    first_state_id = session.query(func.min(States.state_id)).scalar() or 0
+    first_event_id = session.query(func.min(Events.event_id)).scalar() or 0
+    progress = RecorderPurge(
+        keep_days=purge_days,
+        repack=bool(repack),
+        apply_filter=bool(apply_filter),
+        purge_before=purge_before,
+        started=dt_util.utcnow(),
+        first_state_id=first_state_id,
+        last_state_id=session.query(func.max(States.state_id))
+        .filter(States.last_updated < purge_before)
+        .scalar()
+        or 0,
+        state_cursor=first_state_id,
+        states_deleted=0,
+        first_event_id=first_event_id,
+        last_event_id=session.query(func.max(Events.event_id))
         .filter(Events.time_fired < purge_before)
-        .limit(MAX_ROWS_TO_PURGE)
-        .all()
+        .scalar()
+        or 0,
+        event_cursor=first_event_id,
+        events_deleted=0,
     )
-    _LOGGER.debug("Selected %s event ids to remove", len(events))
-    return [event.event_id for event in events]
+    session.add(progress)
+    return progress
 
 
-def _select_state_ids_to_purge(
-    session: Session, purge_before: datetime, event_ids: list[int]
-) -> list[int]:
-    """Return a list of state ids to purge."""
-    if not event_ids:
-        return []
-    states = (
-        session.query(States.state_id)
-        .filter(States.last_updated < purge_before)
-        .filter(States.event_id.in_(event_ids))
-        .all()
+def _progress_info(progress: RecorderPurge, finished: bool) -> dict[str, Any]:
+    """Return the progress of a purge to show in the purge sensor."""
+    total = (progress.last_state_id + 1 - progress.first_state_id) + (
+        progress.last_event_id + 1 - progress.first_event_id
     )
-    _LOGGER.debug("Selected %s state ids to remove", len(states))
-    return [state.state_id for state in states]
+    done = (
+        min(progress.state_cursor, progress.last_state_id + 1)
+        - progress.first_state_id
+        + min(progress.event_cursor, progress.last_event_id + 1)
+        - progress.first_event_id
+    )
+    return {
+        "percentage": 100 if finished or total <= 0 else round(100 * done / total),
+        "finished": finished,
+        "keep_days": progress.keep_days,
+        "repack": progress.repack,
+        "purge_before": process_timestamp(progress.purge_before),
+        "started": process_timestamp(progress.started),
+        "states_deleted": progress.states_deleted,
+        "events_deleted": progress.events_deleted,
+    }
+
 
+def _next_id_ranges(
+    session: Session,
+    column: Any,
+    time_column: Any,
+    cursor: int,
+    last_id: int,
+    purge_before: datetime,
+) -> Iterable[tuple[int, int]]:
+    """Yield the ranges of old ids from the cursor until the chunk is full.
 
-def _purge_state_ids(session: Session, state_ids: list[int]) -> None:
+    Every query walks the primary key from the start of a range and stops
+    at the first matching row. Rows that are newer than purge_before end a
+    range early and are skipped, together the ranges span no more than
+    MAX_ROWS_TO_PURGE ids.
+    """
+    budget = MAX_ROWS_TO_PURGE
+    while budget > 0:
+        first = (
+            session.query(column)
+            .filter(column >= cursor)
+            .filter(column <= last_id)
+            .filter(time_column < purge_before)
+            .order_by(column)
+            .limit(1)
+            .scalar()
+        )
+        if first is None:
+            return
+        end = min(first + budget, last_id + 1)
+        kept = (
+            session.query(column)
+            .filter(column > first)
+            .filter(column < end)
+            .filter(time_column >= purge_before)
+            .order_by(column)
+            .limit(1)
+            .scalar()
+        )
+        if kept is not None:
+            end = kept
+        yield first, end
+        budget -= end - first
+        cursor = end
+
+
+def _purge_state_range(
+    instance: Recorder, session: Session, progress: RecorderPurge
+) -> bool:
+    """Delete the next chunk of old states, return False if none are left."""
+    id_ranges = list(
+        _next_id_ranges(
+            session,
+            States.state_id,
+            States.last_updated,
+            progress.state_cursor,
+            progress.last_state_id,
+            process_timestamp(progress.purge_before),
+        )
+    )
+    if not id_ranges:
+        progress.state_cursor = progress.last_state_id + 1
+        return False
+
+    attributes_ids: set[int] = set()
+    for start, end in id_ranges:
+        in_range = (States.state_id >= start) & (States.state_id < end)
+        attributes_ids.update(
+            attributes_id
+            for (attributes_id,) in session.query(
+                distinct(States.attributes_id)
+            ).filter(in_range)
+            if attributes_id is not None
+        )
+
+        # Update old_state_id to NULL before deleting to ensure
+        # the delete does not fail due to a foreign key constraint
+        # since some databases (MSSQL) cannot do the ON DELETE SET NULL
+        # for us.
+        disconnected_rows = session.execute(
+            States.__table__.update()
+            .where(States.old_state_id >= start)
+            .where(States.old_state_id < end)
+            .values(old_state_id=None)
+        ).rowcount
+        _LOGGER.debug("Updated %s states to remove old_state_id", disconnected_rows)
+
+        deleted_rows = session.execute(
+            States.__table__.delete().where(in_range)
+        ).rowcount
+        _LOGGER.debug(
+            "Deleted %s states with ids %s to %s", deleted_rows, start, end - 1
+        )
+        progress.states_deleted += deleted_rows
+
+        # Evict the purged states from the old state ids the recorder
+        # links new states to, so it does not reference deleted rows
+        # pylint: disable=protected-access
+        for entity_id, old_state_id in list(instance._old_states.items()):
+            if start <= old_state_id < end:
+                del instance._old_states[entity_id]
+
+    if attributes_ids:
+        _purge_unused_attributes_ids(instance, session, attributes_ids)
+
+    progress.state_cursor = id_ranges[-1][1]
+    return True
+
+
+def _purge_event_range(
+    instance: Recorder, session: Session, progress: RecorderPurge
+) -> bool:
+    """Delete the next chunk of old events, return False if none are left."""
+    id_ranges = list(
+        _next_id_ranges(
+            session,
+            Events.event_id,
+            Events.time_fired,
+            progress.event_cursor,
+            progress.last_event_id,
+            process_timestamp(progress.purge_before),
+        )
+    )
+    if not id_ranges:
+        progress.event_cursor = progress.last_event_id + 1
+        return False
+
+    data_ids: set[int] = set()
+    for start, end in id_ranges:
+        in_range = (Events.event_id >= start) & (Events.event_id < end)
+        data_ids.update(
+            data_id
+            for (data_id,) in session.query(distinct(Events.data_id)).filter(in_range)
+            if data_id is not None
+        )
+
+        session.execute(
+            EventEntities.__table__.delete()
+            .where(EventEntities.event_id >= start)
+            .where(EventEntities.event_id < end)
+        )
+        deleted_rows = session.execute(
+            Events.__table__.delete().where(in_range)
+        ).rowcount
+        _LOGGER.debug(
+            "Deleted %s events with ids %s to %s", deleted_rows, start, end - 1
+        )
+        progress.events_deleted += deleted_rows
+
+    if data_ids:
+        _purge_unused_data_ids(instance, session, data_ids)
+
+    progress.event_cursor = id_ranges[-1][1]
+    return True
+
+
+def _purge_state_ids(
+    instance: Recorder, session: Session, state_ids: list[int]
+) -> None:
     """Disconnect states and delete by state id."""
+    attributes_ids = {
+        attributes_id
+        for (attributes_id,) in session.query(distinct(States.attributes_id)).filter(
+            States.state_id.in_(state_ids)
+        )
+        if attributes_id is not None
+    }
 
     # Update old_state_id to NULL before deleting to ensure
     # the delete does not fail due to a foreign key constraint
@@ -123,9 +368,59 @@ def _purge_state_ids(session: Session, state_ids: list[int]) -> None:
     )
     _LOGGER.debug("Deleted %s states", deleted_rows)
 
+    # Evict the purged states from the old state ids the recorder
+    # links new states to, so it does not reference deleted rows
+    # pylint: disable=protected-access
+    purged_state_ids = set(state_ids)
+    for entity_id, old_state_id in list(instance._old_states.items()):
+        if old_state_id in purged_state_ids:
+            del instance._old_states[entity_id]
+
+    if attributes_ids:
+        _purge_unused_attributes_ids(instance, session, attributes_ids)
 
-def _purge_event_ids(session: Session, event_ids: list[int]) -> None:
+
+def _purge_unused_attributes_ids(
+    instance: Recorder, session: Session, attributes_ids: set[int]
+) -> None:
+    """Delete the shared attributes no state references anymore."""
+    used_attributes_ids = {
+        attributes_id
+        for (attributes_id,) in session.query(distinct(States.attributes_id)).filter(
+            States.attributes_id.in_(attributes_ids)
+        )
+    }
+    unused_attributes_ids = attributes_ids - used_attributes_ids
+    if not unused_attributes_ids:
+        return
+
+    deleted_rows = (
+        session.query(StateAttributes)
+        .filter(StateAttributes.attributes_id.in_(unused_attributes_ids))
+        .delete(synchronize_session=False)
+    )
+    _LOGGER.debug("Deleted %s attribute rows", deleted_rows)
+
+    # The cache is keyed by the attributes, it is cheaper
+    # to rebuild it than to search it for the deleted ids
+    instance._shared_ids[StateAttributes].clear()  # pylint: disable=protected-access
+
+
+def _purge_event_ids(
+    instance: Recorder, session: Session, event_ids: list[int]
+) -> None:
     """Delete by event id."""
+    data_ids = {
+        data_id
+        for (data_id,) in session.query(distinct(Events.data_id)).filter(
+            Events.event_id.in_(event_ids)
+        )
+        if data_id is not None
+    }
+
+    session.query(EventEntities).filter(EventEntities.event_id.in_(event_ids)).delete(
+        synchronize_session=False
+    )
     deleted_rows = (
         session.query(Events)
         .filter(Events.event_id.in_(event_ids))
@@ -133,6 +428,33 @@ def _purge_event_ids(session: Session, event_ids: list[int]) -> None:
     )
     _LOGGER.debug("Deleted %s events", deleted_rows)
 
+    if data_ids:
+        _purge_unused_data_ids(instance, session, data_ids)
+
+
+def _purge_unused_data_ids(
+    instance: Recorder, session: Session, data_ids: set[int]
+) -> None:
+    """Delete the shared event data no event references anymore."""
+    used_data_ids = {
+        data_id
+        for (data_id,) in session.query(distinct(Events.data_id)).filter(
+            Events.data_id.in_(data_ids)
+        )
+    }
+    unused_data_ids = data_ids - used_data_ids
+    if not unused_data_ids:
+        return
+
+    deleted_rows = (
+        session.query(EventData)
+        .filter(EventData.data_id.in_(unused_data_ids))
+        .delete(synchronize_session=False)
+    )
+    _LOGGER.debug("Deleted %s event data rows", deleted_rows)
+
+    instance._shared_ids[EventData].clear()  # pylint: disable=protected-access
+
 
 def _purge_old_recorder_runs(
     instance: Recorder, session: Session, purge_before: datetime
@@ -148,6 +470,96 @@ def _purge_old_recorder_runs(
     _LOGGER.debug("Deleted %s recorder_runs", deleted_rows)
 
 
+def convert_retention(config: dict[str, Any]) -> Callable[[str], int | None] | None:
+    """Convert the retention config into a function that returns keep days.
+
+    Entities take precedence over entity globs and entity globs over domains.
+    If multiple entity globs match, the longest retention wins. Returns None
+    if no retention policies are configured.
+    """
+    entities: dict[str, int] = config[CONF_ENTITIES]
+    domains: dict[str, int] = config[CONF_DOMAINS]
+    globs: list[tuple[re.Pattern, int]] = [
+        (re.compile(fnmatch.translate(glob)), days)
+        for glob, days in config[CONF_ENTITY_GLOBS].items()
+    ]
+    if not (entities or domains or globs):
+        return None
+
+    def retention(entity_id: str) -> int | None:
+        """Return the days to keep the states of an entity."""
+        if entity_id in entities:
+            return entities[entity_id]
+        matched = [days for pattern, days in globs if pattern.match(entity_id)]
+        if matched:
+            return max(matched)
+        return domains.get(split_entity_id(entity_id)[0])
+
+    return retention
+
+
+def _retention_groups(
+    instance: Recorder, session: Session, progress: RecorderPurge
+) -> dict[int, list[str]]:
+    """Return the recorded entity ids grouped by their retention.
+
+    The entity ids are looked up once per purge and reused by its chunks.
+    """
+    key = (progress.keep_days, process_timestamp(progress.started))
+    # pylint: disable=protected-access
+    if instance._retention_groups is not None and instance._retention_groups[0] == key:
+        return instance._retention_groups[1]
+
+    groups: dict[int, list[str]] = {}
+    for (entity_id,) in session.query(distinct(States.entity_id)):
+        days = instance.retention(entity_id)  # type: ignore
+        if days is not None and days < progress.keep_days:
+            groups.setdefault(days, []).append(entity_id)
+    instance._retention_groups = (key, groups)
+    return groups
+
+
+def _purge_retention_data(
+    instance: Recorder, session: Session, progress: RecorderPurge
+) -> bool:
+    """Remove states and linked events older than their retention policy.
+
+    Every query seeks the entity_id and last_updated index of the states,
+    only one chunk of rows is deleted per call.
+    """
+    groups = _retention_groups(instance, session, progress)
+    now = dt_util.utcnow()
+    for days, entity_ids in groups.items():
+        purge_before = now - timedelta(days=days)
+        for idx in range(0, len(entity_ids), RETENTION_ENTITIES_PER_QUERY):
+            rows = (
+                session.query(States.state_id, States.event_id)
+                .filter(
+                    States.entity_id.in_(
+                        entity_ids[idx : idx + RETENTION_ENTITIES_PER_QUERY]
+                    )
+                )
+                .filter(States.last_updated < purge_before)
+                .limit(MAX_ROWS_TO_PURGE)
+                .all()
+            )
+            if not rows:
+                continue
+            state_ids = [state_id for state_id, _ in rows]
+            event_ids = [event_id for _, event_id in rows if event_id is not None]
+            _LOGGER.debug(
+                "Selected %s state_ids to remove older than %s days",
+                len(state_ids),
+                days,
+            )
+            _purge_state_ids(instance, session, state_ids)
+            _purge_event_ids(instance, session, event_ids)
+            progress.states_deleted += len(state_ids)
+            progress.events_deleted += len(event_ids)
+            return False
+    return True
+
+
 def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
     """Remove filtered states and events that shouldn't be in the database."""
     _LOGGER.debug("Cleanup filtered data")
@@ -159,7 +571,7 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
         if not instance.entity_filter(entity_id)
     ]
     if len(excluded_entity_ids) > 0:
-        _purge_filtered_states(session, excluded_entity_ids)
+        _purge_filtered_states(instance, session, excluded_entity_ids)
         return False
 
     # Check if excluded event_types are in database
@@ -168,14 +580,33 @@ def _purge_filtered_data(instance: Recorder, session: Session) -> bool:
         for (event_type,) in session.query(distinct(Events.event_type)).all()
         if event_type in instance.exclude_t
     ]
-    if len(excluded_event_types) > 0:
-        _purge_filtered_events(session, excluded_event_types)
+    # Event types are never purged from the event_types table,
+    # so check if there are events left that use them
+    excluded_event_type_ids: list[int] = [
+        event_type_id
+        for (event_type_id, event_type) in session.query(
+            EventTypes.event_type_id, EventTypes.event_type
+        ).all()
+        if event_type in instance.exclude_t
+    ]
+    if excluded_event_type_ids and not (
+        session.query(Events.event_id)
+        .filter(Events.event_type_id.in_(excluded_event_type_ids))
+        .first()
+    ):
+        excluded_event_type_ids = []
+    if len(excluded_event_types) > 0 or len(excluded_event_type_ids) > 0:
+        _purge_filtered_events(
+            instance, session, excluded_event_types, excluded_event_type_ids
+        )
         return False
 
     return True
 
 
-def _purge_filtered_states(session: Session, excluded_entity_ids: list[str]) -> None:
+def _purge_filtered_states(
+    instance: Recorder, session: Session, excluded_entity_ids: list[str]
+) -> None:
     """Remove filtered states and linked events."""
     state_ids: list[int]
     event_ids: list[int | None]
@@ -191,15 +622,23 @@ def _purge_filtered_states(session: Session, excluded_entity_ids: list[str]) ->
     _LOGGER.debug(
         "Selected %s state_ids to remove that should be filtered", len(state_ids)
     )
-    _purge_state_ids(session, state_ids)
-    _purge_event_ids(session, event_ids)  # type: ignore  # type of event_ids already narrowed to 'list[int]'
+    _purge_state_ids(instance, session, state_ids)
+    _purge_event_ids(instance, session, event_ids)  # type: ignore  # type of event_ids already narrowed to 'list[int]'
 
 
-def _purge_filtered_events(session: Session, excluded_event_types: list[str]) -> None:
+def _purge_filtered_events(
+    instance: Recorder,
+    session: Session,
+    excluded_event_types: list[str],
+    excluded_event_type_ids: list[int],
+) -> None:
     """Remove filtered events and linked states."""
     events: list[Events] = (
         session.query(Events.event_id)
-        .filter(Events.event_type.in_(excluded_event_types))
+        .filter(
+            Events.event_type.in_(excluded_event_types)
+            | Events.event_type_id.in_(excluded_event_type_ids)
+        )
         .limit(MAX_ROWS_TO_PURGE)
         .all()
     )
@@ -211,5 +650,5 @@ def _purge_filtered_events(session: Session, excluded_event_types: list[str]) ->
         session.query(States.state_id).filter(States.event_id.in_(event_ids)).all()
     )
     state_ids: list[int] = [state.state_id for state in states]
-    _purge_state_ids(session, state_ids)
-    _purge_event_ids(session, event_ids)
+    _purge_state_ids(instance, session, state_ids)
+    _purge_event_ids(instance, session, event_ids)
@@ -0,0 +1,95 @@
+"""Sensor showing the progress of the recorder purge."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.const import PERCENTAGE
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import Entity
+
+from .const import DATA_INSTANCE, SIGNAL_PURGE_PROGRESS
+
+ATTR_FINISHED = "finished"
+ATTR_KEEP_DAYS = "keep_days"
+ATTR_PURGE_BEFORE = "purge_before"
+ATTR_STARTED = "started"
+ATTR_STATES_DELETED = "states_deleted"
+ATTR_EVENTS_DELETED = "events_deleted"
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the recorder purge sensor."""
+    if discovery_info is None:
+        return
+
+    async_add_entities([RecorderPurgeSensor(hass.data[DATA_INSTANCE])])
+
+
+class RecorderPurgeSensor(Entity):
+    """Representation of the progress of the recorder purge."""
+
+    def __init__(self, instance) -> None:
+        """Initialize the sensor."""
+        self._instance = instance
+        self._progress: dict[str, Any] | None = instance.purge_progress
+
+    @property
+    def name(self) -> str:
+        """Return the name of the sensor."""
+        return "Recorder purge"
+
+    @property
+    def should_poll(self) -> bool:
+        """No polling needed, the recorder pushes the progress."""
+        return False
+
+    @property
+    def icon(self) -> str:
+        """Return the icon of the sensor."""
+        return "mdi:database-remove"
+
+    @property
+    def unit_of_measurement(self) -> str:
+        """Return the unit of the progress."""
+        return PERCENTAGE
+
+    @property
+    def state(self) -> int | None:
+        """Return the percentage of the purge that is done."""
+        if self._progress is None:
+            return None
+        return self._progress["percentage"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the details of the purge."""
+        if self._progress is None:
+            return None
+        return {
+            ATTR_FINISHED: self._progress["finished"],
+            ATTR_KEEP_DAYS: self._progress["keep_days"],
+            ATTR_PURGE_BEFORE: self._progress["purge_before"].isoformat(),
+            ATTR_STARTED: self._progress["started"].isoformat(),
+            ATTR_STATES_DELETED: self._progress["states_deleted"],
+            ATTR_EVENTS_DELETED: self._progress["events_deleted"],
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the purge progress."""
+        self._instance.purge_sensor_entity_id = self.entity_id
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_PURGE_PROGRESS, self._async_update_progress
+            )
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Record the sensor again once it is removed."""
+        self._instance.purge_sensor_entity_id = None
+
+    @callback
+    def _async_update_progress(self, progress: dict[str, Any]) -> None:
+        """Update the progress of the purge."""
+        self._progress = progress
+        self.async_write_ha_state()
@@ -0,0 +1,300 @@
+"""Long-term statistics of numeric sensors."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import logging
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import Event, split_entity_id
+
+from .models import (
+    Statistics,
+    StatisticsMeta,
+    StatisticsShortTerm,
+    process_timestamp,
+)
+from .util import session_scope
+
+if TYPE_CHECKING:
+    from . import Recorder
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_5MINUTE = "5minute"
+PERIOD_HOUR = "hour"
+
+STATISTIC_PERIODS = {
+    PERIOD_5MINUTE: (StatisticsShortTerm, timedelta(minutes=5)),
+    PERIOD_HOUR: (Statistics, timedelta(hours=1)),
+}
+
+STATISTICS_DOMAIN = "sensor"
+
+
+def period_start(period: timedelta, point_in_time: datetime) -> datetime:
+    """Return the start of the period point_in_time falls in."""
+    midnight = point_in_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + period * ((point_in_time - midnight) // period)
+
+
+class StatisticsBucket:
+    """Time weighted min, max and mean of a sensor over one period."""
+
+    __slots__ = [
+        "start",
+        "end",
+        "value",
+        "value_since",
+        "min",
+        "max",
+        "_sum",
+        "_seconds",
+    ]
+
+    def __init__(
+        self, start: datetime, end: datetime, value: float | None = None
+    ) -> None:
+        """Initialize the bucket, carrying over the value of the previous one."""
+        self.start = start
+        self.end = end
+        self.value = value
+        self.value_since = start
+        self.min = value
+        self.max = value
+        self._sum = 0.0
+        self._seconds = 0.0
+
+    def add(self, value: float | None, point_in_time: datetime) -> None:
+        """Add the value the sensor changed to at point_in_time."""
+        self._close_segment(point_in_time)
+        self.value = value
+        self.value_since = point_in_time
+        if value is None:
+            return
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def finish(self) -> dict[str, Any] | None:
+        """Close the bucket and return the columns of its statistics row."""
+        self._close_segment(self.end)
+        if not self._seconds:
+            return None
+        return {
+            "start": self.start,
+            "mean": self._sum / self._seconds,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    def _close_segment(self, point_in_time: datetime) -> None:
+        """Account for the time the current value was held."""
+        if self.value is not None and point_in_time > self.value_since:
+            seconds = (point_in_time - self.value_since).total_seconds()
+            self._sum += self.value * seconds
+            self._seconds += seconds
+        self.value_since = point_in_time
+
+
+class StatisticsCollector:
+    """Collect statistics of numeric sensors as their states are recorded.
+
+    Only used from the recorder thread.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the collector."""
+        self._buckets: dict[str, dict[str, StatisticsBucket]] = {
+            period: {} for period in STATISTIC_PERIODS
+        }
+        self._units: dict[str, str] = {}
+        self._finished: list[tuple[str, str, dict[str, Any]]] = []
+
+    def add_state_changed(self, event: Event) -> None:
+        """Add the new state of a state_changed event."""
+        entity_id = event.data["entity_id"]
+        new_state = event.data.get("new_state")
+        value = None
+        unit = None
+        if new_state is not None:
+            unit = new_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+            if unit is not None:
+                try:
+                    value = float(new_state.state)
+                except ValueError:
+                    pass
+
+        if entity_id not in self._units:
+            if (
+                unit is None
+                or value is None
+                or split_entity_id(entity_id)[0] != STATISTICS_DOMAIN
+            ):
+                return
+            self._units[entity_id] = unit
+        elif unit is not None:
+            self._units[entity_id] = unit
+
+        point_in_time = event.time_fired
+        for period, (_, duration) in STATISTIC_PERIODS.items():
+            buckets = self._buckets[period]
+            bucket = buckets.get(entity_id)
+            if bucket is not None:
+                bucket = self._roll_bucket(period, entity_id, bucket, point_in_time)
+            if bucket is None:
+                if value is None:
+                    continue
+                start = period_start(duration, point_in_time)
+                bucket = buckets[entity_id] = StatisticsBucket(start, start + duration)
+            bucket.add(value, point_in_time)
+
+    def compile(self, now: datetime) -> list[tuple[str, str, dict[str, Any]]]:
+        """Close all buckets that ended before now.
+
+        Returns the period, statistic_id and columns of the rows to write.
+        """
+        for period, buckets in self._buckets.items():
+            for entity_id, bucket in list(buckets.items()):
+                self._roll_bucket(period, entity_id, bucket, now)
+        finished = self._finished
+        self._finished = []
+        return finished
+
+    def unit_of_measurement(self, statistic_id: str) -> str | None:
+        """Return the last seen unit of a statistic."""
+        return self._units.get(statistic_id)
+
+    def _roll_bucket(
+        self,
+        period: str,
+        entity_id: str,
+        bucket: StatisticsBucket,
+        point_in_time: datetime,
+    ) -> StatisticsBucket | None:
+        """Finish the bucket and its successors up to point_in_time."""
+        buckets = self._buckets[period]
+        while bucket.end <= point_in_time:
+            row = bucket.finish()
+            if row is not None:
+                self._finished.append((period, entity_id, row))
+            if bucket.value is None:
+                # Nothing to carry over, a new bucket is started
+                # when the sensor has a numeric state again
+                del buckets[entity_id]
+                return None
+            bucket = buckets[entity_id] = StatisticsBucket(
+                bucket.end, bucket.end + (bucket.end - bucket.start), bucket.value
+            )
+        return bucket
+
+
+def compile_statistics(instance: Recorder, now: datetime) -> None:
+    """Write the statistics of all periods that ended before now."""
+    finished = instance.statistics_collector.compile(now)
+    if not finished:
+        return
+
+    try:
+        with session_scope(session=instance.get_session()) as session:  # type: ignore
+            metadata_ids = _update_metadata(
+                instance, session, {statistic_id for _, statistic_id, _ in finished}
+            )
+            rows: dict[str, list[dict[str, Any]]] = {
+                period: [] for period in STATISTIC_PERIODS
+            }
+            for period, statistic_id, row in finished:
+                row["metadata_id"] = metadata_ids[statistic_id]
+                row["created"] = now
+                rows[period].append(row)
+            for period, period_rows in rows.items():
+                if period_rows:
+                    table = STATISTIC_PERIODS[period][0].__table__
+                    session.execute(table.insert(), period_rows)
+    except SQLAlchemyError as err:
+        _LOGGER.warning("Error compiling statistics: %s", err)
+        return
+
+    _LOGGER.debug("Compiled %s statistics rows", len(finished))
+
+
+def _update_metadata(
+    instance: Recorder, session, statistic_ids: set[str]
+) -> dict[str, int]:
+    """Create or update the metadata of the statistics and return their ids."""
+    collector = instance.statistics_collector
+    existing = {
+        meta.statistic_id: meta
+        for meta in session.query(StatisticsMeta).filter(
+            StatisticsMeta.statistic_id.in_(statistic_ids)
+        )
+    }
+    for statistic_id in statistic_ids:
+        unit = collector.unit_of_measurement(statistic_id)
+        meta = existing.get(statistic_id)
+        if meta is None:
+            meta = StatisticsMeta(statistic_id=statistic_id, unit_of_measurement=unit)
+            session.add(meta)
+        elif unit is not None and meta.unit_of_measurement != unit:
+            meta.unit_of_measurement = unit
+        existing[statistic_id] = meta
+    session.flush()
+    return {statistic_id: meta.id for statistic_id, meta in existing.items()}
+
+
+def list_statistic_ids(hass) -> list[dict[str, str | None]]:
+    """Return the ids and units of all statistics."""
+    with session_scope(hass=hass) as session:
+        return [
+            {
+                "statistic_id": meta.statistic_id,
+                "unit_of_measurement": meta.unit_of_measurement,
+            }
+            for meta in session.query(StatisticsMeta).order_by(
+                StatisticsMeta.statistic_id
+            )
+        ]
+
+
+def statistics_during_period(
+    hass,
+    start_time: datetime,
+    end_time: datetime | None = None,
+    statistic_ids: list[str] | None = None,
+    period: str = PERIOD_HOUR,
+) -> dict[str, list[dict[str, Any]]]:
+    """Return the statistics of a period, grouped by statistic_id."""
+    model = STATISTIC_PERIODS[period][0]
+    with session_scope(hass=hass) as session:
+        query = (
+            session.query(
+                StatisticsMeta.statistic_id,
+                model.start,
+                model.mean,
+                model.min,
+                model.max,
+            )
+            .join(StatisticsMeta, model.metadata_id == StatisticsMeta.id)
+            .filter(model.start >= start_time)
+        )
+        if end_time is not None:
+            query = query.filter(model.start < end_time)
+        if statistic_ids is not None:
+            query = query.filter(StatisticsMeta.statistic_id.in_(statistic_ids))
+        query = query.order_by(StatisticsMeta.statistic_id, model.start)
+
+        result: dict[str, list[dict[str, Any]]] = {}
+        for row in query:
+            result.setdefault(row.statistic_id, []).append(
+                {
+                    "statistic_id": row.statistic_id,
+                    "start": process_timestamp(row.start),
+                    "mean": row.mean,
+                    "min": row.min,
+                    "max": row.max,
+                }
+            )
+        return result
@@ -0,0 +1,29 @@
+"""The Recorder websocket API."""
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_INSTANCE, MAX_BATCH_SIZE
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Set up the recorder websocket API."""
+    websocket_api.async_register_command(hass, ws_info)
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): "recorder/info"})
+@callback
+def ws_info(hass: HomeAssistant, connection, msg: dict) -> None:
+    """Return status of the recorder."""
+    instance = hass.data[DATA_INSTANCE]
+    connection.send_result(
+        msg["id"],
+        {
+            "backlog": instance.backlog,
+            "max_batch_size": MAX_BATCH_SIZE,
+            "thread_running": instance.is_alive(),
+        },
+    )
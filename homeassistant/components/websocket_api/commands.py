@@ -28,6 +28,7 @@ def async_register_commands(hass, async_reg):
     """Register commands."""
     async_reg(hass, handle_subscribe_events)
     async_reg(hass, handle_unsubscribe_events)
+    async_reg(hass, handle_subscribe_entities)
     async_reg(hass, handle_call_service)
     async_reg(hass, handle_get_states)
     async_reg(hass, handle_get_services)
@@ -115,6 +116,57 @@ def handle_unsubscribe_events(hass, connection, msg):
         )
 
 
+@callback
+@decorators.websocket_command(
+    {
+        vol.Required("type"): "subscribe_entities",
+        vol.Optional("entity_ids"): cv.entity_ids,
+    }
+)
+def handle_subscribe_entities(hass, connection, msg):
+    """Handle subscribe entities command.
+
+    Sends the compact states of the entities and
+    then only the changes of their states.
+    """
+    entity_ids = set(msg.get("entity_ids", []))
+
+    @callback
+    def forward_entity_changes(event):
+        """Forward the changes of the entity states to websocket."""
+        if not connection.user.permissions.check_entity(
+            event.data["entity_id"], POLICY_READ
+        ):
+            return
+
+        connection.send_message(messages.cached_state_diff_message(msg["id"], event))
+
+    # The bus routes the state changes of the entities to the subscription
+    if entity_ids:
+        unsub = hass.bus.async_listen_keyed(
+            EVENT_STATE_CHANGED, "entity_id", entity_ids, forward_entity_changes
+        )
+    else:
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, forward_entity_changes)
+    connection.subscriptions[msg["id"]] = unsub
+
+    connection.send_message(messages.result_message(msg["id"]))
+
+    states = _async_get_allowed_states(hass, connection)
+    connection.send_message(
+        messages.event_message(
+            msg["id"],
+            {
+                const.ENTITY_EVENT_ADD: {
+                    state.entity_id: messages.compressed_state_dict(state)
+                    for state in states
+                    if not entity_ids or state.entity_id in entity_ids
+                }
+            },
+        )
+    )
+
+
 @decorators.websocket_command(
     {
         vol.Required("type"): "call_service",
@@ -182,17 +234,21 @@ async def handle_call_service(hass, connection, msg):
 @decorators.websocket_command({vol.Required("type"): "get_states"})
 def handle_get_states(hass, connection, msg):
     """Handle get states command."""
-    if connection.user.permissions.access_all_entities("read"):
-        states = hass.states.async_all()
-    else:
-        entity_perm = connection.user.permissions.check_entity
-        states = [
-            state
-            for state in hass.states.async_all()
-            if entity_perm(state.entity_id, "read")
-        ]
+    states = _async_get_allowed_states(hass, connection)
+    connection.send_message(messages.states_result_message(msg["id"], states))
+
 
-    connection.send_message(messages.result_message(msg["id"], states))
+@callback
+def _async_get_allowed_states(hass, connection):
+    """Return the states the user of the connection is allowed to read."""
+    if connection.user.permissions.access_all_entities("read"):
+        return hass.states.async_all()
+    entity_perm = connection.user.permissions.check_entity
+    return [
+        state
+        for state in hass.states.async_all()
+        if entity_perm(state.entity_id, "read")
+    ]
 
 
 @decorators.websocket_command({vol.Required("type"): "get_services"})
@@ -2,11 +2,11 @@
 
 from functools import lru_cache
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List, Union
 
 import voluptuous as vol
 
-from homeassistant.core import Event
+from homeassistant.core import Context, Event, State
 from homeassistant.helpers import config_validation as cv
 from homeassistant.util.json import (
     find_paths_unserializable_data,
@@ -55,23 +55,140 @@ def event_message(iden: JSON_TYPE, event: Any) -> Dict:
 def cached_event_message(iden: int, event: Event) -> str:
     """Return an event message.
 
-    Serialize to json once per message.
+    Serialize to json once per event.
 
     Since we can have many clients connected that are
     all getting many of the same events (mostly state changed)
     we can avoid serializing the same data for each connection.
+    The event keeps its json, which is shared with the other
+    consumers of the event, like the API event stream.
     """
-    return _cached_event_message(event).replace(IDEN_JSON_TEMPLATE, str(iden), 1)
+    try:
+        event_json = event.as_json()
+    except (ValueError, TypeError):
+        return message_to_json(event_message(iden, event))
+    return f'{{"id": {iden}, "type": "event", "event": {event_json}}}'
+
+
+def states_result_message(iden: int, states: List[State]) -> str:
+    """Return a result message with states.
+
+    Reuses the json of every state.
+    """
+    try:
+        states_json = ", ".join(state.as_json() for state in states)
+    except (ValueError, TypeError):
+        return message_to_json(result_message(iden, states))
+    return (
+        f'{{"id": {iden}, "type": "{const.TYPE_RESULT}", "success": true, '
+        f'"result": [{states_json}]}}'
+    )
+
+
+def cached_state_diff_message(iden: int, event: Event) -> str:
+    """Return an event message with the difference of a state_changed event.
+
+    Serialize to json once per message, like cached_event_message.
+    """
+    return _cached_state_diff_message(event).replace(IDEN_JSON_TEMPLATE, str(iden), 1)
 
 
 @lru_cache(maxsize=128)
-def _cached_event_message(event: Event) -> str:
-    """Cache and serialize the event to json.
+def _cached_state_diff_message(event: Event) -> str:
+    """Cache and serialize the state difference of an event to json.
 
     The IDEN_TEMPLATE is used which will be replaced
-    with the actual iden in cached_event_message
+    with the actual iden in cached_state_diff_message
     """
-    return message_to_json(event_message(IDEN_TEMPLATE, event))
+    return message_to_json(event_message(IDEN_TEMPLATE, _state_diff_event(event)))
+
+
+def _state_diff_event(event: Event) -> Dict:
+    """Convert a state_changed event to the minimal difference.
+
+    An entity without an old state is added and
+    an entity without a new state is removed.
+    """
+    entity_id = event.data["entity_id"]
+    new_state = event.data["new_state"]
+    if new_state is None:
+        return {const.ENTITY_EVENT_REMOVE: [entity_id]}
+    old_state = event.data["old_state"]
+    if old_state is None:
+        return {const.ENTITY_EVENT_ADD: {entity_id: compressed_state_dict(new_state)}}
+    return {const.ENTITY_EVENT_CHANGE: {entity_id: _state_diff(old_state, new_state)}}
+
+
+def _compressed_context(context: Context) -> Union[str, Dict]:
+    """Return the context id or the full context if it has a parent or user."""
+    if context.parent_id is None and context.user_id is None:
+        return context.id
+    return context.as_dict()
+
+
+def compressed_state_dict(state: State) -> Dict[str, Any]:
+    """Return a compact dict of a state with epoch timestamps.
+
+    The last updated time is left out if it equals the last changed time.
+    """
+    compressed = {
+        const.COMPRESSED_STATE_STATE: state.state,
+        const.COMPRESSED_STATE_ATTRIBUTES: dict(state.attributes),
+        const.COMPRESSED_STATE_CONTEXT: _compressed_context(state.context),
+        const.COMPRESSED_STATE_LAST_CHANGED: state.last_changed.timestamp(),
+    }
+    if state.last_changed != state.last_updated:
+        compressed[const.COMPRESSED_STATE_LAST_UPDATED] = state.last_updated.timestamp()
+    return compressed
+
+
+def _state_diff(old_state: State, new_state: State) -> Dict[str, Dict]:
+    """Return the changes between two states of an entity.
+
+    Changed values, including added and changed attributes, are listed
+    under additions, the names of removed attributes under removals.
+    """
+    additions: Dict[str, Any] = {}
+    if old_state.state != new_state.state:
+        additions[const.COMPRESSED_STATE_STATE] = new_state.state
+    if old_state.last_changed != new_state.last_changed:
+        additions[
+            const.COMPRESSED_STATE_LAST_CHANGED
+        ] = new_state.last_changed.timestamp()
+        if new_state.last_changed != new_state.last_updated:
+            additions[
+                const.COMPRESSED_STATE_LAST_UPDATED
+            ] = new_state.last_updated.timestamp()
+    elif old_state.last_updated != new_state.last_updated:
+        additions[
+            const.COMPRESSED_STATE_LAST_UPDATED
+        ] = new_state.last_updated.timestamp()
+    if old_state.context != new_state.context:
+        additions[const.COMPRESSED_STATE_CONTEXT] = _compressed_context(
+            new_state.context
+        )
+
+    diff: Dict[str, Dict] = {}
+    old_attributes = old_state.attributes
+    new_attributes = new_state.attributes
+    if old_attributes != new_attributes:
+        changed_attributes = {
+            key: value
+            for key, value in new_attributes.items()
+            if key not in old_attributes or old_attributes[key] != value
+        }
+        if changed_attributes:
+            additions[const.COMPRESSED_STATE_ATTRIBUTES] = changed_attributes
+        removed_attributes: List[str] = [
+            key for key in old_attributes if key not in new_attributes
+        ]
+        if removed_attributes:
+            diff[const.STATE_DIFF_REMOVALS] = {
+                const.COMPRESSED_STATE_ATTRIBUTES: removed_attributes
+            }
+    if additions:
+        diff[const.STATE_DIFF_ADDITIONS] = additions
+    return diff
 
 
 def message_to_json(message: Any) -> str:
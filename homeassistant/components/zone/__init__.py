@@ -2,7 +2,8 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, Optional, cast
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
 
 import voluptuous as vol
 
@@ -18,6 +19,7 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_RADIUS,
     EVENT_CORE_CONFIG_UPDATE,
+    EVENT_STATE_CHANGED,
     SERVICE_RELOAD,
     STATE_UNAVAILABLE,
 )
@@ -88,6 +90,16 @@ RELOAD_SERVICE_SCHEMA = vol.Schema({})
 STORAGE_KEY = DOMAIN
 STORAGE_VERSION = 1
 
+DATA_ZONE_INDEX = "zone_index"
+
+# Size in degrees of the cells of the zone index
+GRID_SIZE = 0.05
+# Zones and locations covering more cells are checked without the grid
+MAX_GRID_CELLS = 400
+# Less than the length of a degree of latitude anywhere,
+# so the boxes around circles are never too small
+METERS_PER_DEGREE = 110000
+
 
 @bind_hass
 def async_active_zone(
@@ -95,21 +107,18 @@ def async_active_zone(
 ) -> Optional[State]:
     """Find the active zone for given latitude, longitude.
 
+    Only the zones near the location are checked, they are looked up in
+    an index of the active zones that is rebuilt when a zone changes.
+
     This method must be run in the event loop.
     """
-    # Sort entity IDs so that we are deterministic if equal distance to 2 zones
-    zones = (
-        cast(State, hass.states.get(entity_id))
-        for entity_id in sorted(hass.states.async_entity_ids(DOMAIN))
-    )
+    if latitude is None or longitude is None:
+        return None
 
     min_dist = None
     closest = None
 
-    for zone in zones:
-        if zone.state == STATE_UNAVAILABLE or zone.attributes.get(ATTR_PASSIVE):
-            continue
-
+    for zone in _async_get_zone_index(hass).nearby_zones(latitude, longitude, radius):
         zone_dist = distance(
             latitude,
             longitude,
@@ -135,6 +144,128 @@ def async_active_zone(
     return closest
 
 
+def _grid_cells(
+    latitude: float, longitude: float, radius: float
+) -> Optional[List[Tuple[int, int]]]:
+    """Return the grid cells of the box around a circle.
+
+    Returns None if the box covers too many cells, a pole or the
+    antimeridian.
+    """
+    delta_lat = radius * 1.01 / METERS_PER_DEGREE
+    lat_min = latitude - delta_lat
+    lat_max = latitude + delta_lat
+    if lat_min < -89 or lat_max > 89:
+        return None
+    delta_lon = delta_lat / math.cos(math.radians(max(abs(lat_min), abs(lat_max))))
+    lon_min = longitude - delta_lon
+    lon_max = longitude + delta_lon
+    if lon_min < -180 or lon_max > 180:
+        return None
+
+    lat_cells = range(
+        math.floor(lat_min / GRID_SIZE), math.floor(lat_max / GRID_SIZE) + 1
+    )
+    lon_cells = range(
+        math.floor(lon_min / GRID_SIZE), math.floor(lon_max / GRID_SIZE) + 1
+    )
+    if len(lat_cells) * len(lon_cells) > MAX_GRID_CELLS:
+        return None
+    return [(lat_cell, lon_cell) for lat_cell in lat_cells for lon_cell in lon_cells]
+
+
+class ZoneIndex:
+    """Grid of the active zones to find the zones near a location.
+
+    Every zone is added to the cells that its circle may touch. The zones
+    are kept in entity id order, so the closest zone is deterministic if
+    two zones are at the same distance.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Build the index from the zone states."""
+        self.zones: List[State] = [
+            zone
+            for zone in (
+                cast(State, hass.states.get(entity_id))
+                for entity_id in sorted(hass.states.async_entity_ids(DOMAIN))
+            )
+            if zone.state != STATE_UNAVAILABLE and not zone.attributes.get(ATTR_PASSIVE)
+        ]
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        # Zones that are checked for every location
+        self._everywhere: List[int] = []
+
+        for idx, zone in enumerate(self.zones):
+            try:
+                cells = _grid_cells(
+                    zone.attributes[ATTR_LATITUDE],
+                    zone.attributes[ATTR_LONGITUDE],
+                    zone.attributes[ATTR_RADIUS],
+                )
+            except (KeyError, TypeError):
+                cells = None
+            if cells is None:
+                self._everywhere.append(idx)
+                continue
+            for cell in cells:
+                self._cells.setdefault(cell, []).append(idx)
+
+    def nearby_zones(
+        self, latitude: float, longitude: float, radius: float
+    ) -> List[State]:
+        """Return the zones a location with an accuracy radius may be in."""
+        cells = _grid_cells(latitude, longitude, max(radius, 0))
+        if cells is None:
+            return self.zones
+
+        indexes: Set[int] = set(self._everywhere)
+        for cell in cells:
+            indexes.update(self._cells.get(cell, ()))
+        return [self.zones[idx] for idx in sorted(indexes)]
+
+
+@callback
+def _async_reset_zone_index(hass: HomeAssistant) -> None:
+    """Rebuild the index of the active zones on the next lookup."""
+    if DATA_ZONE_INDEX in hass.data:
+        hass.data[DATA_ZONE_INDEX] = None
+
+
+@callback
+def _async_get_zone_index(hass: HomeAssistant) -> ZoneIndex:
+    """Return the index of the active zones, build it if a zone changed.
+
+    Zone entities reset the index when they write or remove their state, so
+    a lookup in the same tick rebuilds it. Zone states set by other means
+    are picked up once their state changed event has been handled.
+    """
+    index: Optional[ZoneIndex] = hass.data.get(DATA_ZONE_INDEX)
+    if index is not None:
+        return index
+
+    if DATA_ZONE_INDEX not in hass.data:
+
+        @callback
+        def _async_zone_changed_filter(event: Event) -> bool:
+            """Filter state changed events of zones."""
+            return cast(str, event.data["entity_id"]).startswith(f"{DOMAIN}.")
+
+        @callback
+        def _async_zone_changed(event: Event) -> None:
+            """Rebuild the index on the next lookup."""
+            _async_reset_zone_index(hass)
+
+        hass.bus.async_listen(
+            EVENT_STATE_CHANGED,
+            _async_zone_changed,
+            event_filter=_async_zone_changed_filter,
+        )
+
+    index = hass.data[DATA_ZONE_INDEX] = ZoneIndex(hass)
+    return index
+
+
 def in_zone(zone: State, latitude: float, longitude: float, radius: float = 0) -> bool:
     """Test if given latitude, longitude is in given zone.
 
@@ -332,6 +463,17 @@ class Zone(entity.Entity):
         self._generate_attrs()
         self.async_write_ha_state()
 
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state and rebuild the zone index on the next lookup."""
+        super().async_write_ha_state()
+        _async_reset_zone_index(self.hass)
+
+    async def async_remove(self, *, force_remove: bool = False) -> None:
+        """Remove the zone and rebuild the zone index on the next lookup."""
+        await super().async_remove(force_remove=force_remove)
+        _async_reset_zone_index(self.hass)
+
     @callback
     def _generate_attrs(self) -> None:
         """Generate new attrs based on config."""
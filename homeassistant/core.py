@@ -8,6 +8,9 @@ import asyncio
 import datetime
 import enum
 import functools
+import heapq
+import itertools
+import json
 import logging
 import os
 import pathlib
@@ -70,6 +73,7 @@ from homeassistant.exceptions import (
     ServiceNotFound,
     Unauthorized,
 )
+from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util import location
 from homeassistant.util.async_ import (
     fire_coroutine_threadsafe,
@@ -140,6 +144,25 @@ def valid_state(state: str) -> bool:
     return len(state) < 256
 
 
+def _json_dumps(obj: Any) -> str:
+    """Serialize an object to JSON the way the API sends it."""
+    return json.dumps(obj, cls=JSONEncoder, allow_nan=False)
+
+
+def _json_data(data: Mapping[str, Any]) -> str:
+    """Serialize event data to JSON, reusing the JSON of states."""
+    if not any(isinstance(value, State) for value in data.values()) or not all(
+        isinstance(key, str) for key in data
+    ):
+        return _json_dumps(data)
+    items = ", ".join(
+        f"{_json_dumps(key)}: "
+        f"{value.as_json() if isinstance(value, State) else _json_dumps(value)}"
+        for key, value in data.items()
+    )
+    return f"{{{items}}}"
+
+
 def callback(func: CALLABLE_T) -> CALLABLE_T:
     """Annotation to mark method as safe to call from within the event loop."""
     setattr(func, "_hass_callback", True)
@@ -605,7 +628,7 @@ class EventOrigin(enum.Enum):
 class Event:
     """Representation of an event within the bus."""
 
-    __slots__ = ["event_type", "data", "origin", "time_fired", "context"]
+    __slots__ = ["event_type", "data", "origin", "time_fired", "context", "_as_json"]
 
     def __init__(
         self,
@@ -621,6 +644,7 @@ class Event:
         self.origin = origin
         self.time_fired = time_fired or dt_util.utcnow()
         self.context: Context = context or Context()
+        self._as_json: Optional[str] = None
 
     def __hash__(self) -> int:
         """Make hashable."""
@@ -640,6 +664,24 @@ class Event:
             "context": self.context.as_dict(),
         }
 
+    def as_json(self) -> str:
+        """Return a JSON representation of this Event.
+
+        The JSON is serialized once and shared by everyone sending the
+        event. States in the event data reuse their own JSON.
+
+        Async friendly.
+        """
+        if self._as_json is None:
+            self._as_json = (
+                f'{{"event_type": {_json_dumps(self.event_type)}, '
+                f'"data": {_json_data(self.data)}, '
+                f'"origin": {_json_dumps(str(self.origin.value))}, '
+                f'"time_fired": {_json_dumps(self.time_fired.isoformat())}, '
+                f'"context": {_json_dumps(self.context.as_dict())}}}'
+            )
+        return self._as_json
+
     def __repr__(self) -> str:
         """Return the representation."""
         if self.data:
@@ -665,6 +707,10 @@ class EventBus:
     def __init__(self, hass: HomeAssistant) -> None:
         """Initialize a new event bus."""
         self._listeners: Dict[str, List[Tuple[HassJob, Optional[Callable]]]] = {}
+        # Listeners indexed by event type, data key and data value
+        self._keyed_listeners: Dict[
+            str, Dict[str, Dict[Any, List[Tuple[HassJob, Optional[Callable]]]]]
+        ] = {}
         self._hass = hass
 
     @callback
@@ -673,7 +719,17 @@ class EventBus:
 
         This method must be run in the event loop.
         """
-        return {key: len(self._listeners[key]) for key in self._listeners}
+        listeners = {key: len(self._listeners[key]) for key in self._listeners}
+        for event_type, keyed_listeners in self._keyed_listeners.items():
+            # A keyed listener is indexed once for every value it listens to
+            keyed_jobs = {
+                id(filterable_job)
+                for value_listeners in keyed_listeners.values()
+                for filterable_jobs in value_listeners.values()
+                for filterable_job in filterable_jobs
+            }
+            listeners[event_type] = listeners.get(event_type, 0) + len(keyed_jobs)
+        return listeners
 
     @property
     def listeners(self) -> Dict[str, int]:
@@ -712,6 +768,10 @@ class EventBus:
         if match_all_listeners is not None and event_type != EVENT_HOMEASSISTANT_CLOSE:
             listeners = match_all_listeners + listeners
 
+        keyed_listeners = self._keyed_listeners.get(event_type)
+        if keyed_listeners is not None and event_data:
+            listeners = listeners + _async_keyed_jobs(keyed_listeners, event_data)
+
         event = Event(event_type, event_data, origin, time_fired, context)
 
         if event_type != EVENT_TIME_CHANGED:
@@ -770,6 +830,47 @@ class EventBus:
             event_type, (HassJob(listener), event_filter)
         )
 
+    @callback
+    def async_listen_keyed(
+        self,
+        event_type: str,
+        key: str,
+        values: Union[str, Iterable[Any]],
+        listener: Callable,
+        event_filter: Optional[Callable] = None,
+    ) -> CALLBACK_TYPE:
+        """Listen for events of a specific type with matching data.
+
+        The listener only runs for events where the value of ``key`` in the
+        event data is one of ``values``, or a list containing one of them.
+        The listeners are indexed by the values, so firing an event only
+        looks at the listeners that match it.
+
+        An optional event_filter is applied to the matching events.
+
+        This method must be run in the event loop.
+        """
+        if event_type == MATCH_ALL:
+            raise HomeAssistantError("Keyed listeners need a specific event type")
+        if event_filter is not None and not is_callback(event_filter):
+            raise HomeAssistantError(f"Event filter {event_filter} is not a callback")
+        if isinstance(values, str):
+            values = [values]
+        values = set(values)
+
+        filterable_job = (HassJob(listener), event_filter)
+        key_listeners = self._keyed_listeners.setdefault(event_type, {}).setdefault(
+            key, {}
+        )
+        for value in values:
+            key_listeners.setdefault(value, []).append(filterable_job)
+
+        def remove_listener() -> None:
+            """Remove the listener."""
+            self._async_remove_keyed_listener(event_type, key, values, filterable_job)
+
+        return remove_listener
+
     @callback
     def _async_listen_filterable_job(
         self, event_type: str, filterable_job: Tuple[HassJob, Optional[Callable]]
@@ -854,6 +955,67 @@ class EventBus:
                 "Unable to remove unknown job listener %s", filterable_job
             )
 
+    @callback
+    def _async_remove_keyed_listener(
+        self,
+        event_type: str,
+        key: str,
+        values: Iterable[Any],
+        filterable_job: Tuple[HassJob, Optional[Callable]],
+    ) -> None:
+        """Remove a keyed listener of a specific event_type.
+
+        This method must be run in the event loop.
+        """
+        try:
+            keyed_listeners = self._keyed_listeners[event_type]
+            key_listeners = keyed_listeners[key]
+            for value in values:
+                key_listeners[value].remove(filterable_job)
+                if not key_listeners[value]:
+                    key_listeners.pop(value)
+        except (KeyError, ValueError):
+            _LOGGER.exception(
+                "Unable to remove unknown job listener %s", filterable_job
+            )
+            return
+
+        # delete the indexes if empty
+        if not key_listeners:
+            keyed_listeners.pop(key)
+        if not keyed_listeners:
+            self._keyed_listeners.pop(event_type)
+
+
+def _async_keyed_jobs(
+    keyed_listeners: Dict[str, Dict[Any, List[Tuple[HassJob, Optional[Callable]]]]],
+    event_data: Dict[str, Any],
+) -> List[Tuple[HassJob, Optional[Callable]]]:
+    """Return the keyed listeners that match the event data."""
+    jobs: List[Tuple[HassJob, Optional[Callable]]] = []
+    for key, key_listeners in keyed_listeners.items():
+        value = event_data.get(key)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            # Run a listener once even if it matches several values
+            for item in value:
+                try:
+                    matched = key_listeners.get(item)
+                except TypeError:
+                    continue
+                if matched:
+                    jobs.extend(job for job in matched if job not in jobs)
+            continue
+        try:
+            matched = key_listeners.get(value)
+        except TypeError:
+            # Unhashable values can not match
+            continue
+        if matched:
+            jobs.extend(matched)
+    return jobs
+
 
 class State:
     """Object to represent a state within the state machine.
@@ -878,6 +1040,7 @@ class State:
         "domain",
         "object_id",
         "_as_dict",
+        "_as_json",
     ]
 
     def __init__(
@@ -913,6 +1076,7 @@ class State:
         self.context = context or Context()
         self.domain, self.object_id = split_entity_id(self.entity_id)
         self._as_dict: Optional[Dict[str, Collection[Any]]] = None
+        self._as_json: Optional[str] = None
 
     @property
     def name(self) -> str:
@@ -945,6 +1109,17 @@ class State:
             }
         return self._as_dict
 
+    def as_json(self) -> str:
+        """Return a JSON representation of the State.
+
+        The JSON is serialized once and shared by everyone sending the state.
+
+        Async friendly.
+        """
+        if self._as_json is None:
+            self._as_json = _json_dumps(self.as_dict())
+        return self._as_json
+
     @classmethod
     def from_dict(cls, json_dict: Dict) -> Any:
         """Initialize a state from a dict.
@@ -1005,6 +1180,11 @@ class StateMachine:
     def __init__(self, bus: EventBus, loop: asyncio.events.AbstractEventLoop) -> None:
         """Initialize state machine."""
         self._states: Dict[str, State] = {}
+        # The states of _states by domain, in the same order
+        self._domain_states: Dict[str, Dict[str, State]] = {}
+        # The position of each entity_id in _states, to merge domains in order
+        self._state_order: Dict[str, int] = {}
+        self._next_state_order = itertools.count()
         self._reservations: Set[str] = set()
         self._bus = bus
         self._loop = loop
@@ -1027,14 +1207,7 @@ class StateMachine:
         if domain_filter is None:
             return list(self._states)
 
-        if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
-
-        return [
-            state.entity_id
-            for state in self._states.values()
-            if state.domain in domain_filter
-        ]
+        return list(self._async_filter_domains(domain_filter))
 
     @callback
     def async_entity_ids_count(
@@ -1048,10 +1221,10 @@ class StateMachine:
             return len(self._states)
 
         if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
+            return len(self._domain_states.get(domain_filter.lower(), {}))
 
-        return len(
-            [None for state in self._states.values() if state.domain in domain_filter]
+        return sum(
+            len(self._domain_states.get(domain, {})) for domain in set(domain_filter)
         )
 
     def all(self, domain_filter: Optional[Union[str, Iterable]] = None) -> List[State]:
@@ -1071,12 +1244,35 @@ class StateMachine:
         if domain_filter is None:
             return list(self._states.values())
 
-        if isinstance(domain_filter, str):
-            domain_filter = (domain_filter.lower(),)
+        return list(self._async_filter_domains(domain_filter).values())
 
-        return [
-            state for state in self._states.values() if state.domain in domain_filter
-        ]
+    @callback
+    def _async_filter_domains(
+        self, domain_filter: Union[str, Iterable]
+    ) -> Mapping[str, State]:
+        """Return the states of the domains in domain_filter by entity_id.
+
+        This method must be run in the event loop.
+        """
+        if isinstance(domain_filter, str):
+            return self._domain_states.get(domain_filter.lower(), {})
+
+        domains = set(domain_filter)
+        if len(domains) == 1:
+            return self._domain_states.get(domains.pop(), {})
+
+        # States of multiple domains are returned in the order of _states
+        state_order = self._state_order
+        return dict(
+            heapq.merge(
+                *(
+                    self._domain_states[domain].items()
+                    for domain in domains
+                    if domain in self._domain_states
+                ),
+                key=lambda item: state_order[item[0]],
+            )
+        )
 
     def get(self, entity_id: str) -> Optional[State]:
         """Retrieve state of entity_id or None if not found.
@@ -1119,6 +1315,12 @@ class StateMachine:
         if old_state is None:
             return False
 
+        del self._state_order[entity_id]
+        domain_states = self._domain_states[old_state.domain]
+        del domain_states[entity_id]
+        if not domain_states:
+            del self._domain_states[old_state.domain]
+
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": None},
@@ -1223,7 +1425,10 @@ class StateMachine:
             context,
             old_state is None,
         )
+        if old_state is None:
+            self._state_order[entity_id] = next(self._next_state_order)
         self._states[entity_id] = state
+        self._domain_states.setdefault(state.domain, {})[entity_id] = state
         self._bus.async_fire(
             EVENT_STATE_CHANGED,
             {"entity_id": entity_id, "old_state": old_state, "new_state": state},
@@ -13,9 +13,22 @@ import math
 from operator import attrgetter
 import random
 import re
-from typing import Any, Dict, Generator, Iterable, Optional, Type, Union, cast
+import threading
+from types import CodeType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    cast,
+)
 from urllib.parse import urlencode as urllib_urlencode
-import weakref
 
 import jinja2
 from jinja2 import contextfilter, contextfunction
@@ -38,6 +51,7 @@ from homeassistant.helpers.typing import HomeAssistantType, TemplateVarsType
 from homeassistant.loader import bind_hass
 from homeassistant.util import convert, dt as dt_util, location as loc_util
 from homeassistant.util.async_ import run_callback_threadsafe
+from homeassistant.util.lru import LRU
 from homeassistant.util.thread import ThreadWithException
 
 # mypy: allow-untyped-defs, no-check-untyped-defs
@@ -72,6 +86,8 @@ _COLLECTABLE_STATE_ATTRIBUTES = {
 ALL_STATES_RATE_LIMIT = timedelta(minutes=1)
 DOMAIN_STATES_RATE_LIMIT = timedelta(seconds=1)
 
+COMPILE_CACHE_SIZE = 4096
+
 
 @bind_hass
 def attach(hass: HomeAssistantType, obj: Any) -> None:
@@ -1317,6 +1333,122 @@ def urlencode(value):
     return urllib_urlencode(value).encode("utf-8")
 
 
+class CompileCache:
+    """Bounded cache of compiled template code shared by all environments.
+
+    Entries are keyed by the template source and the kind of environment
+    that compiled it. Each entry remembers the filters and tests of that
+    environment, which are checked when compiling, so a change to them
+    makes the entry stale.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the cache."""
+        self._cache: LRU[
+            Tuple[str, Optional[bool]], Tuple[FrozenSet[str], CodeType]
+        ] = LRU(maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, key: Tuple[str, Optional[bool]], signature: FrozenSet[str]
+    ) -> Optional[CodeType]:
+        """Return the compiled code for a key if it is still valid."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(
+        self,
+        key: Tuple[str, Optional[bool]],
+        signature: FrozenSet[str],
+        code: CodeType,
+    ) -> None:
+        """Store the compiled code for a key."""
+        with self._lock:
+            self._cache[key] = (signature, code)
+
+    def clear(self) -> None:
+        """Remove all compiled code and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        """Return the usage of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+            }
+
+
+_COMPILE_CACHE = CompileCache(COMPILE_CACHE_SIZE)
+
+
+class _NotifyingDict(dict):
+    """Dict of filters or tests that reports changes to its environment."""
+
+    def __init__(self, data: Dict[str, Any], on_change: Callable[[], None]) -> None:
+        """Initialize the dict."""
+        super().__init__(data)
+        self._on_change = on_change
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        """Set an item and report the change."""
+        super().__setitem__(key, value)
+        self._on_change()
+
+    def __delitem__(self, key: str) -> None:
+        """Delete an item and report the change."""
+        super().__delitem__(key)
+        self._on_change()
+
+    def pop(self, *args: Any) -> Any:
+        """Pop an item and report the change."""
+        try:
+            return super().pop(*args)
+        finally:
+            self._on_change()
+
+    def popitem(self) -> Tuple[str, Any]:
+        """Pop the last item and report the change."""
+        try:
+            return super().popitem()
+        finally:
+            self._on_change()
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        """Set an item if missing and report the change."""
+        try:
+            return super().setdefault(key, default)
+        finally:
+            self._on_change()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        """Update the items and report the change."""
+        super().update(*args, **kwargs)
+        self._on_change()
+
+    def clear(self) -> None:
+        """Remove all items and report the change."""
+        super().clear()
+        self._on_change()
+
+
+def compile_cache_info() -> Dict[str, int]:
+    """Return the hits, misses and size of the shared compile cache."""
+    return _COMPILE_CACHE.info()
+
+
 class TemplateEnvironment(ImmutableSandboxedEnvironment):
     """The Home Assistant template environment."""
 
@@ -1324,7 +1456,13 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
         """Initialise template environment."""
         super().__init__()
         self.hass = hass
-        self.template_cache = weakref.WeakValueDictionary()
+        # Environments without hass lack the hass filters, so their code
+        # is cached apart from the code of the full and limited environments.
+        self.compile_cache_kind = None if hass is None else bool(limited)
+        # The signature is computed again after filters or tests changed
+        self._compile_signature: Optional[FrozenSet[str]] = None
+        self.filters = _NotifyingDict(self.filters, self._reset_compile_signature)
+        self.tests = _NotifyingDict(self.tests, self._reset_compile_signature)
         self.filters["round"] = forgiving_round
         self.filters["multiply"] = multiply
         self.filters["log"] = logarithm
@@ -1463,12 +1601,28 @@ class TemplateEnvironment(ImmutableSandboxedEnvironment):
             # any instance of this.
             return super().compile(source, name, filename, raw, defer_init)
 
-        cached = self.template_cache.get(source)
+        key = (source, self.compile_cache_kind)
+        signature = self.compile_signature()
+        cached = _COMPILE_CACHE.get(key, signature)
 
         if cached is None:
-            cached = self.template_cache[source] = super().compile(source)
+            cached = super().compile(source)
+            _COMPILE_CACHE.set(key, signature, cached)
 
         return cached
 
+    def compile_signature(self) -> FrozenSet[str]:
+        """Return the names compiled code depends on in this environment."""
+        signature = self._compile_signature
+        if signature is None:
+            signature = self._compile_signature = frozenset(self.filters).union(
+                f"test:{name}" for name in self.tests
+            )
+        return signature
+
+    def _reset_compile_signature(self) -> None:
+        """Forget the signature after the filters or tests changed."""
+        self._compile_signature = None
+
 
 _NO_HASS_ENV = TemplateEnvironment(None)  # type: ignore[no-untyped-call]
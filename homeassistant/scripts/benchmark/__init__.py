@@ -2,16 +2,25 @@
 import argparse
 import asyncio
 import collections
-from contextlib import suppress
-from datetime import datetime
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta
+import itertools
 import json
 import logging
+import os
+import platform
+import tempfile
 from timeit import default_timer as timer
 from typing import Callable, Dict, TypeVar
 
 from homeassistant import core
 from homeassistant.components.websocket_api.const import JSON_DUMP
-from homeassistant.const import ATTR_NOW, EVENT_STATE_CHANGED, EVENT_TIME_CHANGED
+from homeassistant.const import (
+    ATTR_NOW,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+    __version__,
+)
 from homeassistant.helpers.entityfilter import convert_include_exclude_filter
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.util import dt as dt_util
@@ -23,31 +32,69 @@ CALLABLE_T = TypeVar("CALLABLE_T", bound=Callable)  # pylint: disable=invalid-na
 
 BENCHMARKS: Dict[str, Callable] = {}
 
+# Number of events queued to the recorder before waiting for it to catch up
+RECORDER_QUEUE_BATCH = 10 ** 4
+
+# Multiplier for the size of the generated data, set from the command line
+_scale = 1.0  # pylint: disable=invalid-name
+
 
 def run(args):
     """Handle benchmark commandline script."""
+    global _scale  # pylint: disable=global-statement,invalid-name
+
     # Disable logging
     logging.getLogger("homeassistant.core").setLevel(logging.CRITICAL)
 
     parser = argparse.ArgumentParser(description=("Run a Home Assistant benchmark."))
     parser.add_argument("name", choices=BENCHMARKS)
     parser.add_argument("--script", choices=["benchmark"])
+    parser.add_argument(
+        "--runs", type=int, help="Number of runs, runs until interrupted if not set"
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for the size of the generated data",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the result of each run as JSON"
+    )
 
     args = parser.parse_args()
 
     bench = BENCHMARKS[args.name]
-    print("Using event loop:", asyncio.get_event_loop_policy().loop_name)
+    _scale = args.scale
+    if not args.json:
+        print("Using event loop:", asyncio.get_event_loop_policy().loop_name)
 
+    runs = itertools.count() if args.runs is None else range(args.runs)
     with suppress(KeyboardInterrupt):
-        while True:
-            asyncio.run(run_benchmark(bench))
+        for _ in runs:
+            asyncio.run(run_benchmark(bench, args.json))
 
 
-async def run_benchmark(bench):
+async def run_benchmark(bench, json_output=False):
     """Run a benchmark."""
     hass = core.HomeAssistant()
     runtime = await bench(hass)
-    print(f"Benchmark {bench.__name__} done in {runtime}s")
+    if json_output:
+        print(
+            json.dumps(
+                {
+                    "benchmark": bench.__name__,
+                    "runtime": runtime,
+                    "scale": _scale,
+                    "version": __version__,
+                    "python": platform.python_version(),
+                    "event_loop": asyncio.get_event_loop_policy().loop_name,
+                }
+            ),
+            flush=True,
+        )
+    else:
+        print(f"Benchmark {bench.__name__} done in {runtime}s")
     await hass.async_stop()
 
 
@@ -116,6 +163,35 @@ async def fire_events_with_filter(hass):
     return timer() - start
 
 
+@benchmark
+async def fire_events_with_keyed_listeners(hass):
+    """Fire a million events with 1000 listeners keyed by device_id."""
+    count = 0
+    event_name = "benchmark_event"
+    events_to_fire = 10 ** 6
+
+    @core.callback
+    def listener(_):
+        """Handle event."""
+        nonlocal count
+        count += 1
+
+    for idx in range(1000):
+        hass.bus.async_listen_keyed(event_name, "device_id", f"device_{idx}", listener)
+
+    event_data = {"device_id": "device_500"}
+    for _ in range(events_to_fire):
+        hass.bus.async_fire(event_name, event_data)
+
+    start = timer()
+
+    await hass.async_block_till_done()
+
+    assert count == events_to_fire
+
+    return timer() - start
+
+
 @benchmark
 async def time_changed_helper(hass):
     """Run a million events through time changed helper."""
@@ -388,6 +464,302 @@ async def json_serialize_states(hass):
     return timer() - start
 
 
+@benchmark
+async def recorder_ingest(hass):
+    """Record 100k state changes of 1000 entities."""
+    entity_count = 1000
+    changes = _scaled(10 ** 5)
+
+    async with _async_recorder(hass) as instance:
+        start = timer()
+
+        for idx in range(changes):
+            hass.states.async_set(f"switch.benchmark_{idx % entity_count}", idx)
+            if not idx % RECORDER_QUEUE_BATCH:
+                await hass.async_block_till_done()
+
+        await _async_commit_recorder(hass, instance)
+
+        return timer() - start
+
+
+@benchmark
+async def history_significant_states(hass):
+    """Get the significant states of 100 entities changing every 5 minutes for 7 days."""
+    # pylint: disable=import-outside-toplevel
+    from sqlalchemy.ext import baked
+
+    from homeassistant.components import history
+
+    hass.data[history.HISTORY_BAKERY] = baked.bakery()
+    end = dt_util.utcnow()
+    start = end - timedelta(days=7)
+
+    async with _async_recorder(hass) as instance:
+        await _async_record_state_changes(
+            hass, instance, _scaled(100), start, end, timedelta(minutes=5)
+        )
+
+        start_time = timer()
+        states = await hass.async_add_executor_job(
+            history.get_significant_states, hass, start, end
+        )
+        runtime = timer() - start_time
+
+        assert len(states) == _scaled(100)
+        return runtime
+
+
+@benchmark
+async def logbook_get_events(hass):
+    """Get a day of logbook events of 100 entities changing every minute."""
+    return await _logbook_get_events(hass, None)
+
+
+@benchmark
+async def logbook_get_events_entity_filter(hass):
+    """Get a day of logbook events of 1 of 100 entities changing every minute."""
+    return await _logbook_get_events(hass, ["switch.benchmark_0"])
+
+
+async def _logbook_get_events(hass, entity_ids):
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import logbook
+
+    hass.data[logbook.DOMAIN] = {}
+    end = dt_util.utcnow()
+    start = end - timedelta(days=1)
+
+    async with _async_recorder(hass) as instance:
+        await _async_record_state_changes(
+            hass, instance, _scaled(100), start, end, timedelta(minutes=1)
+        )
+
+        start_time = timer()
+        events = await hass.async_add_executor_job(
+            # pylint: disable=protected-access
+            logbook._get_events,
+            hass,
+            start,
+            end,
+            entity_ids,
+        )
+        runtime = timer() - start_time
+
+        assert events
+        return runtime
+
+
+@benchmark
+async def recorder_purge(hass):
+    """Purge 10M states and their events."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components import recorder
+    from homeassistant.components.recorder.const import SIGNAL_PURGE_PROGRESS
+    from homeassistant.helpers.dispatcher import (
+        async_dispatcher_connect,
+        async_dispatcher_send,
+    )
+
+    entity_count = 1000
+    changes = _scaled(10 ** 7)
+    end = dt_util.utcnow() - timedelta(days=2)
+    interval = timedelta(seconds=1)
+    start = end - interval * (changes // entity_count)
+
+    async with _async_recorder(hass) as instance:
+        await _async_record_state_changes(
+            hass, instance, entity_count, start, end, interval
+        )
+
+        # The recorder sets up its purge sensor on the first purge progress,
+        # set it up before the purge so it is not timed
+        async_dispatcher_send(hass, SIGNAL_PURGE_PROGRESS, instance.purge_progress)
+        await hass.async_block_till_done()
+
+        finished = hass.loop.create_future()
+
+        @core.callback
+        def purge_progress(progress):
+            """Resolve when the recorder reports the purge has finished."""
+            if progress["finished"] and not finished.done():
+                finished.set_result(None)
+
+        unsub = async_dispatcher_connect(hass, SIGNAL_PURGE_PROGRESS, purge_progress)
+
+        start_time = timer()
+        await hass.services.async_call(
+            recorder.DOMAIN,
+            recorder.SERVICE_PURGE,
+            {recorder.ATTR_KEEP_DAYS: 1},
+            blocking=True,
+        )
+        await finished
+        runtime = timer() - start_time
+
+        unsub()
+        return runtime
+
+
+@benchmark
+async def template_render_states(hass):
+    """Render a template over 5000 states a hundred times."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.helpers.template import Template
+
+    for idx in range(5000):
+        hass.states.async_set(f"light.benchmark_{idx}", "on" if idx % 2 else "off")
+
+    template = Template(
+        "{{ states | selectattr('state', 'eq', 'on') | list | count }}", hass
+    )
+
+    start = timer()
+
+    for _ in range(100):
+        result = template.async_render()
+
+    assert result == 2500
+
+    return timer() - start
+
+
+@benchmark
+async def mqtt_dispatch(hass):
+    """Dispatch 100k MQTT messages with 5000 subscriptions."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import config_entries
+    from homeassistant.components import mqtt
+    from homeassistant.components.mqtt.models import Message
+
+    count = 0
+    messages_to_handle = 10 ** 5
+    hass.state = core.CoreState.running
+    conf = mqtt.CONFIG_SCHEMA({mqtt.DOMAIN: {mqtt.CONF_BROKER: "localhost"}})
+    config_entry = config_entries.ConfigEntry(
+        1,
+        mqtt.DOMAIN,
+        "Benchmark",
+        {},
+        config_entries.SOURCE_USER,
+        config_entries.CONN_CLASS_LOCAL_PUSH,
+        {},
+    )
+    mqtt_client = mqtt.MQTT(hass, config_entry, conf[mqtt.DOMAIN])
+
+    @core.callback
+    def listener(_):
+        """Handle message."""
+        nonlocal count
+        count += 1
+
+    for idx in range(5000):
+        await mqtt_client.async_subscribe(f"benchmark/{idx}/state", listener, 0)
+    await mqtt_client.async_subscribe("benchmark/+/state", listener, 0)
+
+    messages = [
+        Message(f"benchmark/{idx}/state", b"on", 0, False) for idx in range(5000)
+    ]
+
+    start = timer()
+
+    for idx in range(messages_to_handle):
+        # pylint: disable=protected-access
+        mqtt_client._mqtt_handle_message(messages[idx % 5000])
+
+    await hass.async_block_till_done()
+
+    assert count == 2 * messages_to_handle
+
+    return timer() - start
+
+
+def _scaled(count):
+    """Scale the size of the generated data."""
+    return max(1, int(count * _scale))
+
+
+@asynccontextmanager
+async def _async_recorder(hass):
+    """Set up the recorder with a new SQLite database."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import config_entries
+    from homeassistant.components import recorder
+    from homeassistant.helpers import area_registry, device_registry, entity_registry
+    from homeassistant.setup import async_setup_component
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        hass.config.skip_pip = True
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        hass.state = core.CoreState.running
+        # Entity platforms the recorder loads, like its purge sensor, need them
+        await asyncio.gather(
+            device_registry.async_load(hass),
+            entity_registry.async_load(hass),
+            area_registry.async_load(hass),
+        )
+        db_url = f"sqlite:///{os.path.join(config_dir, 'benchmark.db')}"
+        assert await async_setup_component(
+            hass,
+            recorder.DOMAIN,
+            {recorder.DOMAIN: {recorder.CONF_DB_URL: db_url, "auto_purge": False}},
+        )
+        try:
+            yield hass.data[recorder.DATA_INSTANCE]
+        finally:
+            await hass.async_stop()
+
+
+async def _async_commit_recorder(hass, instance):
+    """Wait until the recorder has written all queued events."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant.components.recorder import CommitTask
+
+    await hass.async_block_till_done()
+    instance.queue.put(CommitTask())
+    await hass.async_add_executor_job(instance.block_till_done)
+
+
+async def _async_record_state_changes(
+    hass, instance, entity_count, start, end, interval
+):
+    """Record a state change of each entity every interval between start and end."""
+    old_states = {}
+    point_in_time = start
+    queued = 0
+
+    while point_in_time < end:
+        state = "on" if queued // entity_count % 2 else "off"
+        for idx in range(entity_count):
+            entity_id = f"switch.benchmark_{idx}"
+            new_state = core.State(
+                entity_id,
+                state,
+                {"friendly_name": f"Benchmark {idx}"},
+                last_changed=point_in_time,
+                last_updated=point_in_time,
+            )
+            instance.queue.put(
+                core.Event(
+                    EVENT_STATE_CHANGED,
+                    {
+                        "entity_id": entity_id,
+                        "old_state": old_states.get(entity_id),
+                        "new_state": new_state,
+                    },
+                    time_fired=point_in_time,
+                )
+            )
+            old_states[entity_id] = new_state
+            queued += 1
+            if not queued % RECORDER_QUEUE_BATCH:
+                await hass.async_add_executor_job(instance.block_till_done)
+        point_in_time += interval
+
+    await _async_commit_recorder(hass, instance)
+
+
 def _create_state_changed_event_from_old_new(
     entity_id, event_time_fired, old_state, new_state
 ):
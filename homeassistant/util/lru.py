@@ -0,0 +1,81 @@
+"""A bounded least recently used mapping."""
+from collections import OrderedDict
+from typing import Generic, Hashable, List, Optional, Tuple, TypeVar, Union, overload
+
+_KT = TypeVar("_KT", bound=Hashable)
+_VT = TypeVar("_VT")
+_T = TypeVar("_T")
+
+
+class LRU(Generic[_KT, _VT]):
+    """Mapping that evicts the least recently used item when full.
+
+    Not thread safe, callers must only use it from one thread
+    or from the event loop.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the mapping."""
+        self.maxsize = maxsize
+        self._data: "OrderedDict[_KT, _VT]" = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return the number of items."""
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        """Return if the key is present without marking it as used."""
+        return key in self._data
+
+    def __setitem__(self, key: _KT, value: _VT) -> None:
+        """Set an item and evict the least recently used one if full."""
+        data = self._data
+        data[key] = value
+        data.move_to_end(key)
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    @overload
+    def get(self, key: _KT) -> Optional[_VT]:
+        ...
+
+    @overload
+    def get(self, key: _KT, default: _T) -> Union[_VT, _T]:
+        ...
+
+    def get(self, key, default=None):  # type: ignore
+        """Return an item and mark it as recently used."""
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            return default
+        data.move_to_end(key)
+        return value
+
+    def setdefault(self, key: _KT, default: _VT) -> _VT:
+        """Return an item, setting it to default if it is missing."""
+        value = self.get(key, self)
+        if value is self:
+            self[key] = value = default
+        return value  # type: ignore
+
+    @overload
+    def pop(self, key: _KT) -> Optional[_VT]:
+        ...
+
+    @overload
+    def pop(self, key: _KT, default: _T) -> Union[_VT, _T]:
+        ...
+
+    def pop(self, key, default=None):  # type: ignore
+        """Remove an item and return it."""
+        return self._data.pop(key, default)
+
+    def items(self) -> List[Tuple[_KT, _VT]]:
+        """Return the items from the least to the most recently used."""
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        """Remove all items."""
+        self._data.clear()
@@ -248,3 +248,56 @@ async def test_loading_race_condition(hass):
         mock_dev_registry.assert_called_once_with(hass)
         mock_load.assert_called_once_with()
         assert results[0] == results[1]
+
+
+async def test_refresh_token_index(hass, hass_storage):
+    """Test refresh tokens are looked up by id and token."""
+    hass_storage[auth_store.STORAGE_KEY] = {
+        "version": 1,
+        "data": {
+            "credentials": [],
+            "users": [
+                {
+                    "id": "user-id",
+                    "is_active": True,
+                    "is_owner": True,
+                    "name": "Paulus",
+                    "system_generated": False,
+                }
+            ],
+            "refresh_tokens": [
+                {
+                    "access_token_expiration": 1800.0,
+                    "client_id": "http://localhost:8123/",
+                    "created_at": "2018-10-03T13:43:19.774637+00:00",
+                    "id": "user-token-id",
+                    "jwt_key": "some-key",
+                    "token": "some-token",
+                    "user_id": "user-id",
+                }
+            ],
+        },
+    }
+
+    store = auth_store.AuthStore(hass)
+    loaded_token = await store.async_get_refresh_token("user-token-id")
+    assert loaded_token.token == "some-token"
+    assert await store.async_get_refresh_token_by_token("some-token") is loaded_token
+    assert await store.async_get_refresh_token_by_token("other-token") is None
+
+    user = await store.async_get_user("user-id")
+    refresh_token = await store.async_create_refresh_token(user, "http://client")
+    assert await store.async_get_refresh_token(refresh_token.id) is refresh_token
+    assert (
+        await store.async_get_refresh_token_by_token(refresh_token.token)
+        is refresh_token
+    )
+
+    await store.async_remove_refresh_token(refresh_token)
+    assert refresh_token.id not in user.refresh_tokens
+    assert await store.async_get_refresh_token(refresh_token.id) is None
+    assert await store.async_get_refresh_token_by_token(refresh_token.token) is None
+
+    await store.async_remove_user(user)
+    assert await store.async_get_refresh_token("user-token-id") is None
+    assert await store.async_get_refresh_token_by_token("some-token") is None
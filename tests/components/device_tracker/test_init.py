@@ -42,6 +42,12 @@ TEST_PLATFORM = {device_tracker.DOMAIN: {CONF_PLATFORM: "test"}}
 _LOGGER = logging.getLogger(__name__)
 
 
+@pytest.fixture(autouse=True)
+def mock_known_devices_storage(hass_storage):
+    """Keep the known devices store off the disk."""
+    yield hass_storage
+
+
 @pytest.fixture(name="yaml_devices")
 def mock_yaml_devices(hass):
     """Get a path for storing yaml devices."""
@@ -76,50 +82,185 @@ async def test_reading_broken_yaml_config(hass):
         "allok.yaml": "My Device:\n  name: Device",
         "oneok.yaml": ("My Device!:\n  name: Device\nbad_device:\n  nme: Device"),
     }
-    args = {"hass": hass, "consider_home": timedelta(seconds=60)}
     with patch_yaml_files(files):
-        assert await legacy.async_load_config("empty.yaml", **args) == []
-        assert await legacy.async_load_config("nodict.yaml", **args) == []
-        assert await legacy.async_load_config("noname.yaml", **args) == []
-        assert await legacy.async_load_config("badkey.yaml", **args) == []
-
-        res = await legacy.async_load_config("allok.yaml", **args)
-        assert len(res) == 1
-        assert res[0].name == "Device"
-        assert res[0].dev_id == "my_device"
-
-        res = await legacy.async_load_config("oneok.yaml", **args)
-        assert len(res) == 1
-        assert res[0].name == "Device"
-        assert res[0].dev_id == "my_device"
+        assert await legacy._async_load_yaml_devices("empty.yaml", hass) == ({}, True)
+        assert await legacy._async_load_yaml_devices("nodict.yaml", hass) == (
+            {},
+            False,
+        )
+        assert await legacy._async_load_yaml_devices("noname.yaml", hass) == (
+            {},
+            False,
+        )
+        assert await legacy._async_load_yaml_devices("badkey.yaml", hass) == (
+            {},
+            False,
+        )
+
+        res, valid = await legacy._async_load_yaml_devices("allok.yaml", hass)
+        assert valid
+        assert list(res) == ["my_device"]
+        assert res["my_device"]["name"] == "Device"
+
+        res, valid = await legacy._async_load_yaml_devices("oneok.yaml", hass)
+        assert not valid
+        assert list(res) == ["my_device"]
+        assert res["my_device"]["name"] == "Device"
 
 
 async def test_reading_yaml_config(hass, yaml_devices):
     """Test the rendering of the YAML configuration."""
-    dev_id = "test"
-    device = legacy.Device(
-        hass,
-        timedelta(seconds=180),
-        True,
-        dev_id,
-        "AB:CD:EF:GH:IJ",
-        "Test name",
-        picture="http://test.picture",
-        icon="mdi:kettle",
+    _write_known_devices(
+        yaml_devices,
+        "test:\n"
+        "  name: Test name\n"
+        "  mac: ab:cd:ef:gh:ij\n"
+        "  picture: http://test.picture\n"
+        "  icon: mdi:kettle\n"
+        "  track: true\n"
+        "  consider_home: 120\n",
     )
-    await hass.async_add_executor_job(
-        legacy.update_config, yaml_devices, dev_id, device
+    devices = await legacy.async_load_known_devices(hass, timedelta(seconds=180))
+    config = devices[0]
+    assert config.dev_id == "test"
+    assert config.name == "Test name"
+    assert config.track
+    assert config.mac == "AB:CD:EF:GH:IJ"
+    assert config.config_picture == "http://test.picture"
+    assert config.consider_home == timedelta(seconds=120)
+    assert config.icon == "mdi:kettle"
+
+
+def _write_known_devices(path, content):
+    """Write a known_devices.yaml file."""
+    with open(path, "w") as fil:
+        fil.write(content)
+
+
+def _known_devices_storage(devices, yaml_mtime=None, yaml_dev_ids=()):
+    """Return stored known devices."""
+    return {
+        "version": legacy.STORAGE_VERSION,
+        "key": legacy.STORAGE_KEY,
+        "data": {
+            "devices": [
+                {
+                    "dev_id": dev_id,
+                    "name": dev_id,
+                    "mac": None,
+                    "icon": None,
+                    "picture": None,
+                    "track": track,
+                }
+                for dev_id, track in devices.items()
+            ],
+            "yaml_mtime": yaml_mtime,
+            "yaml_dev_ids": list(yaml_dev_ids),
+        },
+    }
+
+
+async def test_import_known_devices_yaml(hass, hass_storage, yaml_devices):
+    """Test known_devices.yaml is imported into the store."""
+    _write_known_devices(
+        yaml_devices,
+        "phone:\n"
+        "  name: Phone\n"
+        "  mac: aa:bb:cc:dd:ee:ff\n"
+        "  gravatar: test@example.com\n"
+        "  track: true\n"
+        "  consider_home: 60\n"
+        "tablet:\n"
+        "  name: Tablet\n",
     )
-    assert await async_setup_component(hass, device_tracker.DOMAIN, TEST_PLATFORM)
-    config = (await legacy.async_load_config(yaml_devices, hass, device.consider_home))[
-        0
+    devices = await legacy.async_load_known_devices(hass, timedelta(seconds=180))
+
+    assert [device.dev_id for device in devices] == ["phone", "tablet"]
+    phone, tablet = devices
+    assert phone.mac == "AA:BB:CC:DD:EE:FF"
+    assert phone.track
+    assert phone.consider_home == timedelta(seconds=60)
+    assert phone.config_picture == legacy.get_gravatar_for_email("test@example.com")
+    assert not tablet.track
+    assert tablet.consider_home == timedelta(seconds=180)
+
+    await hass.async_stop(force=True)
+    data = hass_storage[legacy.STORAGE_KEY]["data"]
+    assert data["yaml_mtime"] == os.path.getmtime(yaml_devices)
+    assert data["yaml_dev_ids"] == ["phone", "tablet"]
+    assert data["devices"] == [
+        {
+            "dev_id": "phone",
+            "name": "Phone",
+            "mac": "AA:BB:CC:DD:EE:FF",
+            "icon": None,
+            "picture": legacy.get_gravatar_for_email("test@example.com"),
+            "track": True,
+            "consider_home": 60,
+        },
+        {
+            "dev_id": "tablet",
+            "name": "Tablet",
+            "mac": None,
+            "icon": None,
+            "picture": None,
+            "track": False,
+        },
     ]
-    assert device.dev_id == config.dev_id
-    assert device.track == config.track
-    assert device.mac == config.mac
-    assert device.config_picture == config.config_picture
-    assert device.consider_home == config.consider_home
-    assert device.icon == config.icon
+
+
+async def test_known_devices_yaml_overrides_storage(hass, hass_storage, yaml_devices):
+    """Test a modified known_devices.yaml is merged over the store."""
+    hass_storage[legacy.STORAGE_KEY] = _known_devices_storage(
+        {"phone": False, "removed": True, "discovered": False},
+        yaml_mtime=0,
+        yaml_dev_ids=["phone", "removed"],
+    )
+    _write_known_devices(yaml_devices, "phone:\n  name: Phone\n  track: true\n")
+
+    assert await async_setup_component(hass, device_tracker.DOMAIN, {})
+    await hass.async_block_till_done()
+
+    devices = await legacy.async_load_known_devices(hass, timedelta(seconds=180))
+    assert {device.dev_id: device.track for device in devices} == {
+        "phone": True,
+        "discovered": False,
+    }
+    assert hass.states.get("device_tracker.phone") is not None
+    assert hass.states.get("device_tracker.removed") is None
+
+
+async def test_known_devices_yaml_not_parsed_when_unchanged(
+    hass, hass_storage, yaml_devices
+):
+    """Test known_devices.yaml is only parsed again after it was modified."""
+    _write_known_devices(yaml_devices, "phone:\n  name: Phone\n  track: true\n")
+    hass_storage[legacy.STORAGE_KEY] = _known_devices_storage(
+        {"phone": False},
+        yaml_mtime=os.path.getmtime(yaml_devices),
+        yaml_dev_ids=["phone"],
+    )
+
+    with patch(
+        "homeassistant.components.device_tracker.legacy.load_yaml_config_file"
+    ) as mock_load:
+        devices = await legacy.async_load_known_devices(hass, timedelta(seconds=180))
+
+    assert not mock_load.called
+    assert [(device.dev_id, device.track) for device in devices] == [("phone", False)]
+
+
+async def test_invalid_known_devices_yaml_not_saved(hass, hass_storage, yaml_devices):
+    """Test known devices are not saved while known_devices.yaml has errors."""
+    _write_known_devices(
+        yaml_devices, "phone:\n  name: Phone\nbad_device:\n  nme: Device\n"
+    )
+
+    devices = await legacy.async_load_known_devices(hass, timedelta(seconds=180))
+    assert [device.dev_id for device in devices] == ["phone"]
+
+    await hass.async_stop(force=True)
+    assert legacy.STORAGE_KEY not in hass_storage
 
 
 @patch("homeassistant.components.device_tracker.const.LOGGER.warning")
@@ -415,7 +556,7 @@ async def test_see_state(hass, yaml_devices):
     common.async_see(hass, **params)
     await hass.async_block_till_done()
 
-    config = await legacy.async_load_config(yaml_devices, hass, timedelta(seconds=0))
+    config = await legacy.async_load_known_devices(hass, timedelta(seconds=0))
     assert len(config) == 1
 
     state = hass.states.get("device_tracker.example_com")
@@ -433,6 +574,35 @@ async def test_see_state(hass, yaml_devices):
     assert attrs["number"] == 1
 
 
+async def test_new_devices_saved_in_batch(hass, hass_storage, yaml_devices):
+    """Test newly seen devices are written to the store with one delayed save."""
+    assert await async_setup_component(hass, device_tracker.DOMAIN, TEST_PLATFORM)
+
+    common.async_see(hass, mac="AA:BB:CC:DD:EE:01", host_name="one")
+    common.async_see(hass, mac="AA:BB:CC:DD:EE:02", host_name="two")
+    await hass.async_block_till_done()
+
+    assert legacy.STORAGE_KEY not in hass_storage
+    yaml_devices_data, valid = await legacy._async_load_yaml_devices(yaml_devices, hass)
+    assert valid
+    assert list(yaml_devices_data) == ["one", "two"]
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=legacy.SAVE_DELAY)
+    )
+    await hass.async_block_till_done()
+
+    data = hass_storage[legacy.STORAGE_KEY]["data"]
+    assert data["yaml_mtime"] == os.path.getmtime(yaml_devices)
+    assert data["yaml_dev_ids"] == ["one", "two"]
+    devices = data["devices"]
+    assert [device["dev_id"] for device in devices] == ["one", "two"]
+    assert [device["mac"] for device in devices] == [
+        "AA:BB:CC:DD:EE:01",
+        "AA:BB:CC:DD:EE:02",
+    ]
+
+
 async def test_see_passive_zone_state(hass, mock_device_tracker_conf):
     """Test that the device tracker sets gps for passive trackers."""
     now = dt_util.utcnow()
@@ -528,7 +698,7 @@ async def test_see_failures(mock_warning, hass, mock_device_tracker_conf):
     assert len(devices) == 4
 
 
-async def test_async_added_to_hass(hass):
+async def test_async_added_to_hass(hass, yaml_devices):
     """Test restoring state."""
     attr = {
         ATTR_LONGITUDE: 18,
@@ -539,11 +709,8 @@ async def test_async_added_to_hass(hass):
     }
     mock_restore_cache(hass, [State("device_tracker.jk", "home", attr)])
 
-    path = hass.config.path(legacy.YAML_DEVICES)
-
-    files = {path: "jk:\n  name: JK Phone\n  track: True"}
-    with patch_yaml_files(files):
-        assert await async_setup_component(hass, device_tracker.DOMAIN, {})
+    _write_known_devices(yaml_devices, "jk:\n  name: JK Phone\n  track: True")
+    assert await async_setup_component(hass, device_tracker.DOMAIN, {})
 
     state = hass.states.get("device_tracker.jk")
     assert state
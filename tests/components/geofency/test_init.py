@@ -127,7 +127,9 @@ async def geofency_client(loop, hass, aiohttp_client):
     )
     await hass.async_block_till_done()
 
-    with patch("homeassistant.components.device_tracker.legacy.update_config"):
+    with patch(
+        "homeassistant.components.device_tracker.legacy.DeviceTracker.async_update_config"
+    ):
         return await aiohttp_client(hass.http.app)
 
 
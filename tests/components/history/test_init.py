@@ -7,7 +7,12 @@ import unittest
 from unittest.mock import patch, sentinel
 
 from homeassistant.components import history, recorder
-from homeassistant.components.recorder.models import process_timestamp
+from homeassistant.components.recorder.models import (
+    Statistics,
+    StatisticsMeta,
+    process_timestamp,
+)
+from homeassistant.components.recorder.util import session_scope
 import homeassistant.core as ha
 from homeassistant.helpers.json import JSONEncoder
 from homeassistant.setup import async_setup_component, setup_component
@@ -18,7 +23,11 @@ from tests.common import (
     init_recorder_component,
     mock_state_change_event,
 )
-from tests.components.recorder.common import trigger_db_commit, wait_recording_done
+from tests.components.recorder.common import (
+    async_wait_recording_done_without_instance,
+    trigger_db_commit,
+    wait_recording_done,
+)
 
 
 class TestComponentHistory(unittest.TestCase):
@@ -793,6 +802,251 @@ async def test_fetch_period_api_with_minimal_response(hass, hass_client):
     assert response.status == 200
 
 
+async def test_fetch_period_api_stream(hass, hass_client):
+    """Test streaming the fetch period view returns the same states."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("sensor.a", "1", {"unit_of_measurement": "W"})
+    hass.states.async_set("light.b", "on")
+    await async_wait_recording_done_without_instance(hass)
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.a", "2", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.a", "3", {"unit_of_measurement": "W"})
+    hass.states.async_set("switch.c", "on")
+    await async_wait_recording_done_without_instance(hass)
+
+    client = await hass_client()
+    for params in ({}, {"minimal_response": ""}):
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}", params=params
+        )
+        assert response.status == 200
+        expected = await response.json()
+
+        response = await client.get(
+            f"/api/history/period/{start.isoformat()}", params={**params, "stream": ""}
+        )
+        assert response.status == 200
+        assert response.headers["Transfer-Encoding"] == "chunked"
+        streamed = await response.json()
+
+        assert [states[0]["entity_id"] for states in streamed] == [
+            "light.b",
+            "sensor.a",
+            "switch.c",
+        ]
+        assert streamed == sorted(expected, key=lambda states: states[0]["entity_id"])
+
+    response = await client.get(
+        f"/api/history/period/{dt_util.utcnow().isoformat()}",
+        params={"filter_entity_id": "light.none", "stream": ""},
+    )
+    assert response.status == 200
+    assert await response.json() == []
+
+
+async def test_fetch_period_api_compact(hass, hass_client, hass_ws_client):
+    """Test the compact history format of the view and websocket."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    hass.states.async_set("sensor.a", "1", {"unit_of_measurement": "W"})
+    hass.states.async_set("light.b", "on")
+    await async_wait_recording_done_without_instance(hass)
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.a", "2", {"unit_of_measurement": "W"})
+    hass.states.async_set("sensor.a", "2", {"unit_of_measurement": "kW"})
+    hass.states.async_set("sensor.a", "3", {"unit_of_measurement": "kW"})
+    await async_wait_recording_done_without_instance(hass)
+
+    ws_client = await hass_ws_client()
+    client = await hass_client()
+    response = await client.get(
+        f"/api/history/period/{start.isoformat()}",
+        params={"compact": "", "significant_changes_only": "0"},
+    )
+    assert response.status == 200
+    history = await response.json()
+    assert history["light.b"] == {
+        "start": start.timestamp(),
+        "offsets": [0],
+        "states": ["on"],
+        "attributes": [[0, {}]],
+    }
+    sensor = history["sensor.a"]
+    assert sensor["start"] == start.timestamp()
+    assert sensor["states"] == ["1", "2", "2", "3"]
+    assert len(sensor["offsets"]) == 4
+    assert sensor["offsets"][0] == 0
+    assert sensor["offsets"] == sorted(sensor["offsets"])
+    assert sensor["attributes"] == [
+        [0, {"unit_of_measurement": "W"}],
+        [2, {"unit_of_measurement": "kW"}],
+    ]
+
+    await ws_client.send_json(
+        {
+            "id": 1,
+            "type": "history/history_during_period",
+            "start_time": start.isoformat(),
+            "entity_ids": ["sensor.a"],
+            "significant_changes_only": False,
+            "minimal_response": True,
+        }
+    )
+    response = await ws_client.receive_json()
+    assert response["success"]
+    assert list(response["result"]) == ["sensor.a"]
+    sensor = response["result"]["sensor.a"]
+    assert sensor["states"] == ["1", "2", "3"]
+    assert sensor["attributes"] == [[0, {"unit_of_measurement": "W"}]]
+
+    await ws_client.send_json(
+        {"id": 2, "type": "history/history_during_period", "start_time": "no time"}
+    )
+    response = await ws_client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_start_time"
+
+
+async def test_history_stream_websocket(hass, hass_ws_client):
+    """Test the history stream backfills and then forwards live changes."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    start = dt_util.utcnow()
+    hass.states.async_set("sensor.a", "1", {"unit_of_measurement": "W"})
+    hass.states.async_set("light.b", "on")
+    await async_wait_recording_done_without_instance(hass)
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/stream",
+            "start_time": start.isoformat(),
+            "entity_ids": ["sensor.a", "sun.sun"],
+            "minimal_response": True,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] is None
+
+    response = await client.receive_json()
+    assert response["type"] == "event"
+    assert list(response["event"]["states"]) == ["sensor.a"]
+    assert response["event"]["states"]["sensor.a"][0]["state"] == "1"
+
+    hass.states.async_set("light.b", "off")
+    hass.states.async_set("sensor.a", "1", {"unit_of_measurement": "kW"})
+    hass.states.async_set("sensor.a", "2", {"unit_of_measurement": "kW"})
+    hass.states.async_set("sun.sun", "below_horizon")
+    await hass.async_block_till_done()
+
+    response = await client.receive_json()
+    assert response["id"] == 1
+    states = response["event"]["states"]
+    assert list(states) == ["sensor.a", "sun.sun"]
+    assert [state["state"] for state in states["sensor.a"]] == ["2"]
+    assert states["sun.sun"][0]["state"] == "below_horizon"
+    assert set(states["sensor.a"][0]) == {"state", "last_changed"}
+
+    await client.send_json({"id": 2, "type": "history/stream", "start_time": "no time"})
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_start_time"
+
+
+async def test_history_stream_websocket_uncommitted_states(hass, hass_ws_client):
+    """Test the history stream sends uncommitted states once."""
+    await hass.async_add_executor_job(
+        init_recorder_component, hass, {"commit_interval": 30}
+    )
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    start = dt_util.utcnow()
+    client = await hass_ws_client()
+    hass.states.async_set("sensor.a", "1")
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/stream",
+            "start_time": start.isoformat(),
+            "entity_ids": ["sensor.a"],
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+
+    # Changed while the stream waits for the recorder
+    hass.states.async_set("sensor.a", "2")
+
+    response = await client.receive_json()
+    assert [state["state"] for state in response["event"]["states"]["sensor.a"]] == [
+        "1"
+    ]
+    response = await client.receive_json()
+    assert [state["state"] for state in response["event"]["states"]["sensor.a"]] == [
+        "2"
+    ]
+
+
+async def test_history_stream_websocket_error(hass, hass_ws_client):
+    """Test the history stream stops when the states cannot be read."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_ws_client()
+    with patch(
+        "homeassistant.components.history.get_significant_states",
+        side_effect=ValueError,
+    ):
+        await client.send_json(
+            {
+                "id": 1,
+                "type": "history/stream",
+                "start_time": dt_util.utcnow().isoformat(),
+            }
+        )
+        response = await client.receive_json()
+        assert response["success"]
+        response = await client.receive_json()
+        assert response["id"] == 1
+        assert not response["success"]
+        assert response["error"]["code"] == "unknown_error"
+
+    hass.states.async_set("sensor.a", "1")
+    await hass.async_block_till_done()
+    await client.send_json({"id": 2, "type": "ping"})
+    response = await client.receive_json()
+    assert response == {"id": 2, "type": "pong"}
+
+
+def test_filters_included_entity():
+    """Test the in-memory include and exclude rules of the history filters."""
+    filters = history.Filters()
+    filters.excluded_domains = ["light"]
+    filters.excluded_entity_globs = ["sensor.*_power"]
+    assert filters.included_entity("switch.a", "switch")
+    assert not filters.included_entity("light.a", "light")
+    assert not filters.included_entity("sensor.kitchen_power", "sensor")
+    assert filters.included_entity("sensor.kitchen_energy", "sensor")
+
+    filters = history.Filters()
+    filters.included_entities = ["light.a"]
+    filters.included_domains = ["switch"]
+    assert filters.included_entity("light.a", "light")
+    assert filters.included_entity("switch.b", "switch")
+    assert not filters.included_entity("light.b", "light")
+
+
 async def test_fetch_period_api_with_no_timestamp(hass, hass_client):
     """Test the fetch period view for history with no timestamp."""
     await hass.async_add_executor_job(init_recorder_component, hass)
@@ -1008,3 +1262,110 @@ async def test_entity_ids_limit_via_api_with_skip_initial_state(hass, hass_clien
     assert len(response_json) == 2
     assert response_json[0][0]["entity_id"] == "light.kitchen"
     assert response_json[1][0]["entity_id"] == "light.cow"
+
+
+def _add_hourly_statistics(hass, start):
+    """Add two hours of statistics for a sensor."""
+    with session_scope(hass=hass) as session:
+        meta = StatisticsMeta(
+            statistic_id="sensor.temperature", unit_of_measurement="°C"
+        )
+        session.add(meta)
+        session.flush()
+        for hours in range(2):
+            session.add(
+                Statistics(
+                    metadata_id=meta.id,
+                    start=start + timedelta(hours=hours),
+                    mean=15.0 + hours,
+                    min=10.0,
+                    max=20.0 + hours,
+                )
+            )
+
+
+async def test_fetch_statistics_api(hass, hass_client):
+    """Test the statistics view for history."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=3
+    )
+    await hass.async_add_executor_job(_add_hourly_statistics, hass, start)
+
+    client = await hass_client()
+    end = start + timedelta(hours=1)
+    response = await client.get(
+        f"/api/history/statistics/{start.isoformat()}",
+        params={"end_time": end.isoformat(), "statistic_ids": "sensor.temperature"},
+    )
+    assert response.status == 200
+    assert await response.json() == {
+        "sensor.temperature": [
+            {
+                "statistic_id": "sensor.temperature",
+                "start": start.isoformat(),
+                "mean": 15.0,
+                "min": 10.0,
+                "max": 20.0,
+            }
+        ]
+    }
+
+    response = await client.get(
+        f"/api/history/statistics/{start.isoformat()}", params={"period": "5minute"}
+    )
+    assert response.status == 200
+    assert await response.json() == {}
+
+    response = await client.get(
+        f"/api/history/statistics/{start.isoformat()}", params={"period": "day"}
+    )
+    assert response.status == 400
+
+
+async def test_statistics_during_period_websocket(hass, hass_ws_client):
+    """Test the statistics websocket commands."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "history", {})
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+    start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=3
+    )
+    await hass.async_add_executor_job(_add_hourly_statistics, hass, start)
+
+    client = await hass_ws_client()
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "history/statistics_during_period",
+            "start_time": start.isoformat(),
+            "statistic_ids": ["sensor.temperature"],
+            "period": "hour",
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    assert [row["mean"] for row in response["result"]["sensor.temperature"]] == [
+        15.0,
+        16.0,
+    ]
+
+    await client.send_json(
+        {
+            "id": 2,
+            "type": "history/statistics_during_period",
+            "start_time": "not a time",
+        }
+    )
+    response = await client.receive_json()
+    assert not response["success"]
+    assert response["error"]["code"] == "invalid_start_time"
+
+    await client.send_json({"id": 3, "type": "history/list_statistic_ids"})
+    response = await client.receive_json()
+    assert response["success"]
+    assert response["result"] == [
+        {"statistic_id": "sensor.temperature", "unit_of_measurement": "°C"}
+    ]
@@ -16,6 +16,7 @@ from homeassistant.components.http.ban import (
     KEY_BANNED_IPS,
     KEY_FAILED_LOGIN_ATTEMPTS,
     IpBan,
+    IpBanMatcher,
     setup_bans,
 )
 from homeassistant.components.http.view import request_handler_factory
@@ -70,6 +71,51 @@ async def test_access_from_banned_ip(hass, aiohttp_client):
         assert resp.status == HTTP_FORBIDDEN
 
 
+async def test_access_from_banned_network(hass, aiohttp_client):
+    """Test accessing to server from an address in a banned network."""
+    app = web.Application()
+    app["hass"] = hass
+    setup_bans(hass, app, 5)
+    set_real_ip = mock_real_ip(app)
+
+    with patch(
+        "homeassistant.components.http.ban.async_load_ip_bans_config",
+        return_value=[IpBan("10.0.0.0/8"), IpBan("2001:db8::/32")],
+    ):
+        client = await aiohttp_client(app)
+
+    for remote_addr in ("10.1.2.3", "2001:db8::1"):
+        set_real_ip(remote_addr)
+        resp = await client.get("/")
+        assert resp.status == HTTP_FORBIDDEN
+
+    for remote_addr in ("11.1.2.3", "2001:db9::1"):
+        set_real_ip(remote_addr)
+        resp = await client.get("/")
+        assert resp.status == 404
+
+
+def test_ip_ban_matcher():
+    """Test matching addresses against banned addresses and networks."""
+    matcher = IpBanMatcher([IpBan("192.168.1.5"), IpBan("172.16.0.0/12")])
+    assert len(matcher) == 2
+    assert str(list(matcher)[0]) == "192.168.1.5"
+    assert str(list(matcher)[1]) == "172.16.0.0/12"
+
+    assert matcher.is_banned(ip_address("192.168.1.5"))
+    assert not matcher.is_banned(ip_address("192.168.1.6"))
+    assert matcher.is_banned(ip_address("172.31.255.255"))
+    assert not matcher.is_banned(ip_address("172.32.0.0"))
+    assert not matcher.is_banned(ip_address("::1"))
+
+    matcher.add(IpBan("192.168.1.0/24"))
+    assert len(matcher) == 3
+    assert matcher.is_banned(ip_address("192.168.1.6"))
+
+    matcher.add(IpBan(ip_address("::1")))
+    assert matcher.is_banned(ip_address("::1"))
+
+
 @pytest.mark.parametrize(
     "remote_addr, bans, status",
     list(
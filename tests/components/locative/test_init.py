@@ -27,7 +27,9 @@ async def locative_client(loop, hass, hass_client):
     assert await async_setup_component(hass, DOMAIN, {DOMAIN: {}})
     await hass.async_block_till_done()
 
-    with patch("homeassistant.components.device_tracker.legacy.update_config"):
+    with patch(
+        "homeassistant.components.device_tracker.legacy.DeviceTracker.async_update_config"
+    ):
         return await hass_client()
 
 
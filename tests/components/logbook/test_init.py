@@ -11,7 +11,14 @@ import voluptuous as vol
 from homeassistant.components import logbook, recorder
 from homeassistant.components.alexa.smart_home import EVENT_ALEXA_SMART_HOME
 from homeassistant.components.automation import EVENT_AUTOMATION_TRIGGERED
-from homeassistant.components.recorder.models import process_timestamp_to_utc_isoformat
+from homeassistant.components.recorder.models import (
+    SCHEMA_VERSION,
+    EventEntities,
+    Events,
+    SchemaChanges,
+    process_timestamp_to_utc_isoformat,
+)
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.components.script import EVENT_SCRIPT_STARTED
 from homeassistant.const import (
     ATTR_DOMAIN,
@@ -19,6 +26,7 @@ from homeassistant.const import (
     ATTR_FRIENDLY_NAME,
     ATTR_NAME,
     ATTR_SERVICE,
+    ATTR_UNIT_OF_MEASUREMENT,
     CONF_DOMAINS,
     CONF_ENTITIES,
     CONF_EXCLUDE,
@@ -1289,6 +1297,114 @@ async def test_logbook_entity_matches_only(hass, hass_client):
     assert json_dict[1]["context_user_id"] == "9400facee45711eaa9308bfd3d19e474"
 
 
+async def test_logbook_entity_matches_only_referenced_events(hass, hass_client):
+    """Test entity_matches_only finds events by their referenced entities."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    start_date = dt_util.utcnow() - timedelta(hours=2)
+
+    def _add_legacy_event():
+        """Add an event recorded before the event_entities table existed."""
+        with session_scope(hass=hass) as session:
+            session.add(
+                Events(
+                    event_type=logbook.EVENT_LOGBOOK_ENTRY,
+                    event_data=json.dumps(
+                        {
+                            logbook.ATTR_NAME: "Legacy",
+                            logbook.ATTR_MESSAGE: "was recorded",
+                            logbook.ATTR_ENTITY_ID: "switch.test_state",
+                        }
+                    ),
+                    origin="LOCAL",
+                    time_fired=start_date + timedelta(hours=1),
+                )
+            )
+
+    await hass.async_add_executor_job(_add_legacy_event)
+
+    logbook.async_log_entry(
+        hass, "Alarm", "is triggered", "switch", "switch.test_state"
+    )
+    logbook.async_log_entry(hass, "Other", "is triggered", "switch", "switch.other")
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    def _event_entities():
+        with session_scope(hass=hass) as session:
+            return sorted(row.entity_id for row in session.query(EventEntities))
+
+    assert await hass.async_add_executor_job(_event_entities) == [
+        "switch.other",
+        "switch.test_state",
+    ]
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/logbook/{start_date.isoformat()}?entity=switch.test_state&entity_matches_only"
+    )
+    assert response.status == 200
+    json_dict = await response.json()
+
+    assert [entry["name"] for entry in json_dict] == ["Legacy", "Alarm"]
+
+
+async def test_logbook_entity_matches_only_service_context(hass, hass_client):
+    """Test entity_matches_only keeps the service call context of an entity."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    start = dt_util.utcnow().date()
+    start_date = datetime(start.year, start.month, start.day)
+
+    def _add_schema_changes():
+        """Record that the event_entities table existed before start_date."""
+        with session_scope(hass=hass) as session:
+            session.add(
+                SchemaChanges(
+                    schema_version=SCHEMA_VERSION,
+                    changed=start_date - timedelta(days=1),
+                )
+            )
+
+    await hass.async_add_executor_job(_add_schema_changes)
+
+    hass.states.async_set("switch.test_state", STATE_OFF)
+
+    async def _turn_on(call):
+        hass.states.async_set("switch.test_state", STATE_ON, context=call.context)
+
+    hass.services.async_register("switch", "turn_on", _turn_on)
+    await hass.services.async_call(
+        "switch", "turn_on", {ATTR_ENTITY_ID: "switch.test_state"}, blocking=True
+    )
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_client()
+    response = await client.get(
+        f"/api/logbook/{start_date.isoformat()}?entity=switch.test_state&entity_matches_only"
+    )
+    assert response.status == 200
+    json_dict = await response.json()
+
+    assert len(json_dict) == 1
+    assert json_dict[0]["entity_id"] == "switch.test_state"
+    assert json_dict[0]["state"] == STATE_ON
+    assert json_dict[0]["context_event_type"] == EVENT_CALL_SERVICE
+    assert json_dict[0]["context_domain"] == "switch"
+    assert json_dict[0]["context_service"] == "turn_on"
+
+
 async def test_logbook_entity_matches_only_multiple(hass, hass_client):
     """Test the logbook view with a multiple entities and entity_matches_only."""
     await hass.async_add_executor_job(init_recorder_component, hass)
@@ -1882,6 +1998,141 @@ def _assert_entry(
         assert state == entry["state"]
 
 
+async def test_logbook_event_stream(hass, hass_ws_client):
+    """Test the event stream sends the past entries and then the new ones."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    hass.states.async_set("switch.test_state", STATE_ON)
+    hass.states.async_set("switch.test_state", STATE_OFF)
+    hass.states.async_set("sensor.power", "10", {ATTR_UNIT_OF_MEASUREMENT: "W"})
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(trigger_db_commit, hass)
+    await hass.async_block_till_done()
+    await hass.async_add_executor_job(hass.data[recorder.DATA_INSTANCE].block_till_done)
+
+    client = await hass_ws_client(hass)
+    start_time = (dt_util.utcnow() - timedelta(hours=1)).isoformat()
+    await client.send_json(
+        {"id": 1, "type": "logbook/event_stream", "start_time": start_time}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    response = await client.receive_json()
+    assert response["id"] == 1
+    entries = response["event"]["events"]
+    assert [
+        (entry["entity_id"], entry["state"]) for entry in entries if "state" in entry
+    ] == [("switch.test_state", STATE_OFF)]
+
+    await client.send_json(
+        {
+            "id": 2,
+            "type": "logbook/event_stream",
+            "start_time": start_time,
+            "entity_ids": ["switch.other"],
+            "entity_matches_only": True,
+        }
+    )
+    response = await client.receive_json()
+    assert response["success"]
+    response = await client.receive_json()
+    assert response["id"] == 2
+    assert response["event"]["events"] == []
+
+    context = ha.Context(user_id="9400facee45711eaa9308bfd3d19e474")
+    hass.states.async_set("switch.test_state", STATE_ON, context=context)
+    hass.states.async_set("sensor.power", "20", {ATTR_UNIT_OF_MEASUREMENT: "W"})
+    logbook.async_log_entry(hass, "Other", "is triggered", "switch", "switch.other")
+    await hass.async_block_till_done()
+
+    response = await client.receive_json()
+    assert response["id"] == 1
+    entries = response["event"]["events"]
+    assert len(entries) == 2
+    assert entries[0]["entity_id"] == "switch.test_state"
+    assert entries[0]["state"] == STATE_ON
+    assert entries[0]["context_user_id"] == "9400facee45711eaa9308bfd3d19e474"
+    assert entries[1]["name"] == "Other"
+
+    response = await client.receive_json()
+    assert response["id"] == 2
+    entries = response["event"]["events"]
+    assert [entry["name"] for entry in entries] == ["Other"]
+
+    await client.send_json({"id": 3, "type": "unsubscribe_events", "subscription": 1})
+    response = await client.receive_json()
+    assert response["success"]
+
+    hass.states.async_set("switch.test_state", STATE_OFF)
+    logbook.async_log_entry(hass, "Other", "is off", "switch", "switch.other")
+    await hass.async_block_till_done()
+
+    response = await client.receive_json()
+    assert response["id"] == 2
+    assert [entry["message"] for entry in response["event"]["events"]] == ["is off"]
+
+
+async def test_logbook_event_stream_uncommitted_events(hass, hass_ws_client):
+    """Test the event stream sends uncommitted events once."""
+    await hass.async_add_executor_job(
+        init_recorder_component, hass, {"commit_interval": 30}
+    )
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_start()
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    start_time = dt_util.utcnow().isoformat()
+    logbook.async_log_entry(hass, "Alarm", "is armed", "switch", "switch.alarm")
+    await client.send_json(
+        {"id": 1, "type": "logbook/event_stream", "start_time": start_time}
+    )
+    response = await client.receive_json()
+    assert response["success"]
+
+    # Fired while the stream waits for the recorder
+    logbook.async_log_entry(hass, "Alarm", "is disarmed", "switch", "switch.alarm")
+
+    response = await client.receive_json()
+    assert [entry["message"] for entry in response["event"]["events"]] == ["is armed"]
+    response = await client.receive_json()
+    assert [entry["message"] for entry in response["event"]["events"]] == [
+        "is disarmed"
+    ]
+
+
+async def test_logbook_event_stream_error(hass, hass_ws_client):
+    """Test the event stream stops when the events cannot be read."""
+    await hass.async_add_executor_job(init_recorder_component, hass)
+    await async_setup_component(hass, "logbook", {})
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    with patch("homeassistant.components.logbook._get_events", side_effect=ValueError):
+        await client.send_json(
+            {
+                "id": 1,
+                "type": "logbook/event_stream",
+                "start_time": dt_util.utcnow().isoformat(),
+            }
+        )
+        response = await client.receive_json()
+        assert response["success"]
+        response = await client.receive_json()
+        assert response["id"] == 1
+        assert not response["success"]
+        assert response["error"]["code"] == "unknown_error"
+
+    logbook.async_log_entry(hass, "Alarm", "is armed", "switch", "switch.alarm")
+    await hass.async_block_till_done()
+    await client.send_json({"id": 2, "type": "ping"})
+    response = await client.receive_json()
+    assert response == {"id": 2, "type": "pong"}
+
+
 class MockLazyEventPartialState(ha.Event):
     """Minimal mock of a Lazy event."""
 
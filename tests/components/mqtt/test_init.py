@@ -11,6 +11,7 @@ import voluptuous as vol
 from homeassistant.components import mqtt, websocket_api
 from homeassistant.components.mqtt import debug_info
 from homeassistant.components.mqtt.mixins import MQTT_ENTITY_DEVICE_INFO_SCHEMA
+from homeassistant.components.mqtt.models import Message
 from homeassistant.const import (
     ATTR_DOMAIN,
     ATTR_SERVICE,
@@ -913,6 +914,49 @@ async def test_message_callback_exception_gets_logged(hass, caplog, mqtt_mock):
     )
 
 
+async def test_received_messages_handled_in_batches(
+    hass, hass_ws_client, mqtt_client_mock
+):
+    """Test messages received by the client thread are handled in batches."""
+    assert await async_setup_component(
+        hass, mqtt.DOMAIN, {mqtt.DOMAIN: {mqtt.CONF_BROKER: "mock-broker"}}
+    )
+    await hass.async_block_till_done()
+    calls = []
+
+    @callback
+    def record_calls(msg):
+        """Record calls."""
+        calls.append(msg.payload)
+
+    await mqtt.async_subscribe(hass, "test-topic", record_calls)
+    mqtt_component = hass.data["mqtt"]
+
+    def receive_messages():
+        """Receive messages on the client thread."""
+        for payload in ("test1", "test2", "test3"):
+            mqtt_component._mqtt_on_message(
+                None, None, Message("test-topic", payload.encode(), 0, False)
+            )
+
+    with patch("homeassistant.components.mqtt.MAX_MESSAGES_PER_BATCH", 2):
+        await hass.async_add_executor_job(receive_messages)
+        await hass.async_block_till_done()
+
+    assert calls == ["test1", "test2", "test3"]
+
+    client = await hass_ws_client(hass)
+    await client.send_json({"id": 5, "type": "mqtt/message_stats"})
+    response = await client.receive_json()
+    assert response["success"]
+    stats = response["result"]
+    assert stats["batches"] == 2
+    assert stats["messages"] == 3
+    assert stats["last_batch_size"] == 1
+    assert stats["max_batch_size"] == 2
+    assert stats["max_latency"] >= stats["last_latency"] >= 0
+
+
 async def test_mqtt_ws_subscription(hass, hass_ws_client, mqtt_mock):
     """Test MQTT websocket subscription."""
     client = await hass_ws_client(hass)
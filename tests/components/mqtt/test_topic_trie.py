@@ -0,0 +1,77 @@
+"""The tests for the MQTT topic trie."""
+from paho.mqtt.matcher import MQTTMatcher
+import pytest
+
+from homeassistant.components.mqtt.topic_trie import TopicTrie
+
+TOPIC_FILTERS = [
+    "#",
+    "+",
+    "a",
+    "a/",
+    "a/#",
+    "a/+",
+    "a/b",
+    "a/b/#",
+    "a/+/c",
+    "+/b/c",
+    "+/+/+",
+    "/#",
+    "/+",
+    "$SYS/#",
+    "$SYS/+/uptime",
+]
+
+TOPICS = [
+    "a",
+    "a/",
+    "a/b",
+    "a/b/c",
+    "a/x/c",
+    "a/b/c/d",
+    "x/b/c",
+    "/",
+    "/a",
+    "b",
+    "$SYS",
+    "$SYS/broker/uptime",
+    "$SYS/broker/load",
+]
+
+
+@pytest.mark.parametrize("topic", TOPICS)
+def test_match_like_paho(topic):
+    """Test the trie matches the same filters as paho's matcher."""
+    trie = TopicTrie()
+    matcher = MQTTMatcher()
+    for topic_filter in TOPIC_FILTERS:
+        trie.add(topic_filter, topic_filter)
+        matcher[topic_filter] = topic_filter
+
+    assert sorted(trie.match(topic)) == sorted(matcher.iter_match(topic))
+
+
+def test_add_and_remove():
+    """Test values are added and removed per topic filter."""
+    trie = TopicTrie()
+    trie.add("a/+/c", 1)
+    trie.add("a/+/c", 2)
+    trie.add("a/b/c", 3)
+
+    assert sorted(trie.match("a/b/c")) == [1, 2, 3]
+
+    trie.remove("a/+/c", 1)
+    assert sorted(trie.match("a/b/c")) == [2, 3]
+
+    trie.remove("a/+/c", 2)
+    trie.remove("a/b/c", 3)
+    assert trie.match("a/b/c") == []
+    assert trie._root.children == {}
+
+    with pytest.raises(KeyError):
+        trie.remove("a/+/c", 1)
+    trie.add("a/b", 4)
+    with pytest.raises(KeyError):
+        trie.remove("a/b", 5)
+    with pytest.raises(KeyError):
+        trie.remove("a/b/c", 4)
@@ -1,12 +1,7 @@
 """Common test utils for working with recorder."""
-from datetime import timedelta
-
 from homeassistant import core as ha
 from homeassistant.components import recorder
 from homeassistant.helpers.typing import HomeAssistantType
-from homeassistant.util import dt as dt_util
-
-from tests.common import async_fire_time_changed, fire_time_changed
 
 
 def wait_recording_done(hass: HomeAssistantType) -> None:
@@ -25,9 +20,7 @@ async def async_wait_recording_done_without_instance(hass: HomeAssistantType) ->
 
 def trigger_db_commit(hass: HomeAssistantType) -> None:
     """Force the recorder to commit."""
-    for _ in range(recorder.DEFAULT_COMMIT_INTERVAL):
-        # We only commit on time change
-        fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    hass.add_job(async_trigger_db_commit, hass)
 
 
 async def async_wait_recording_done(
@@ -45,8 +38,10 @@ async def async_wait_recording_done(
 @ha.callback
 def async_trigger_db_commit(hass: HomeAssistantType) -> None:
     """Fore the recorder to commit. Async friendly."""
-    for _ in range(recorder.DEFAULT_COMMIT_INTERVAL):
-        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    # Queue the commit after the events that are waiting to be recorded
+    hass.loop.call_soon(
+        hass.data[recorder.DATA_INSTANCE].queue.put, recorder.CommitTask()
+    )
 
 
 async def async_recorder_block_till_done(
@@ -1,8 +1,10 @@
 """The tests for the Recorder component."""
 # pylint: disable=protected-access
 from datetime import datetime, timedelta
+import time
 from unittest.mock import patch
 
+import pytest
 from sqlalchemy.exc import OperationalError
 
 from homeassistant.components.recorder import (
@@ -19,7 +21,15 @@ from homeassistant.components.recorder import (
     run_information_from_instance,
     run_information_with_session,
 )
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.const import ADAPTIVE_COMMIT_BUSY_RATE
+from homeassistant.components.recorder.models import (
+    EventData,
+    Events,
+    EventTypes,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
@@ -101,15 +111,11 @@ def test_saving_state_with_exception(hass, hass_recorder, caplog):
     attributes = {"test_attr": 5, "test_attr_10": "nice"}
 
     def _throw_if_state_in_session(*args, **kwargs):
-        for obj in hass.data[DATA_INSTANCE].event_session:
-            if isinstance(obj, States):
-                raise OperationalError(
-                    "insert the state", "fake params", "forced to fail"
-                )
+        raise OperationalError("insert the state", "fake params", "forced to fail")
 
     with patch("time.sleep"), patch.object(
         hass.data[DATA_INSTANCE].event_session,
-        "flush",
+        "execute",
         side_effect=_throw_if_state_in_session,
     ):
         hass.states.set(entity_id, "fail", attributes)
@@ -157,7 +163,11 @@ def test_saving_event(hass, hass_recorder):
     hass.data[DATA_INSTANCE].block_till_done()
 
     with session_scope(hass=hass) as session:
-        db_events = list(session.query(Events).filter_by(event_type=event_type))
+        db_events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == event_type)
+        )
         assert len(db_events) == 1
         db_event = db_events[0].to_native()
 
@@ -396,6 +406,73 @@ async def test_defaults_set(hass):
     assert recorder_config["purge_keep_days"] == 10
 
 
+def test_commit_without_time_changed(hass_recorder):
+    """Test pending rows are committed once the commit interval has passed."""
+    hass = hass_recorder({"commit_interval": 1})
+    instance = hass.data[DATA_INSTANCE]
+
+    hass.states.set("test.recorder", "on")
+    hass.block_till_done()
+    instance.block_till_done()
+    assert instance.backlog == 0
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        with session_scope(hass=hass) as session:
+            if session.query(States).count():
+                break
+        time.sleep(0.1)
+    else:
+        pytest.fail("State was not committed")
+
+    # Time changed events are not queued for the recorder
+    fire_time_changed(hass, dt_util.utcnow())
+    hass.block_till_done()
+    assert instance.backlog == 0
+
+
+def test_keepalive_without_time_changed(hass_recorder):
+    """Test the recorder sends keepalives on its own deadline."""
+    with patch("homeassistant.components.recorder.KEEPALIVE_TIME", 0.1), patch.object(
+        Recorder, "_send_keep_alive", autospec=True
+    ) as keep_alive:
+        hass_recorder()
+        deadline = time.monotonic() + 10
+        while keep_alive.call_count < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    assert keep_alive.call_count >= 2
+
+
+def test_adaptive_commit_interval(hass_recorder):
+    """Test the commit interval grows under load and shrinks when idle."""
+    hass = hass_recorder({"commit_interval": 1, "max_commit_interval": 5})
+    instance = hass.data[DATA_INSTANCE]
+    assert instance.current_commit_interval == 1
+
+    instance._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE)
+    assert instance.current_commit_interval == 2
+    instance._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE * 10)
+    instance._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE * 10)
+    assert instance.current_commit_interval == 5
+    instance._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE * 3 / 4)
+    assert instance.current_commit_interval == 5
+    instance._adapt_commit_interval(0)
+    assert instance.current_commit_interval == 2.5
+    instance._adapt_commit_interval(0)
+    instance._adapt_commit_interval(0)
+    assert instance.current_commit_interval == 1
+
+
+def test_fixed_commit_interval(hass_recorder):
+    """Test the commit interval is fixed without a max commit interval."""
+    hass = hass_recorder({"commit_interval": 2})
+    instance = hass.data[DATA_INSTANCE]
+
+    instance._adapt_commit_interval(ADAPTIVE_COMMIT_BUSY_RATE * 10)
+    assert instance.current_commit_interval == 2
+
+
 def run_tasks_at_time(hass, test_time):
     """Advance the clock and wait for any callbacks to finish."""
     fire_time_changed(hass, test_time)
@@ -477,6 +554,160 @@ def test_saving_sets_old_state(hass_recorder):
         assert states[3].old_state_id == states[1].state_id
 
 
+def test_saving_sets_old_state_in_same_batch(hass_recorder):
+    """Test old states are linked when written in the same batch."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {})
+    hass.states.set("test.one", "off", {})
+    hass.states.set("test.one", "on", {})
+    hass.states.remove("test.one")
+    hass.states.set("test.one", "off", {})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert len(states) == 5
+
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert states[2].old_state_id == states[1].state_id
+        assert states[3].old_state_id == states[2].state_id
+        assert states[3].state is None
+        assert states[4].old_state_id is None
+        assert [state.event_id for state in states] == sorted(
+            state.event_id for state in states
+        )
+
+
+def test_saving_states_without_id_allocation(hass_recorder):
+    """Test rows are written one by one for databases we cannot allocate ids for."""
+    with patch("homeassistant.components.recorder.ID_ALLOCATION_DIALECTS", ()):
+        hass = hass_recorder()
+
+        hass.states.set("test.one", "on", {})
+        hass.states.set("test.one", "off", {})
+        hass.bus.fire("custom_event", {"some": "data"})
+        wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert len(states) == 2
+        assert states[0].old_state_id is None
+        assert states[1].old_state_id == states[0].state_id
+        assert states[1].event_id > states[0].event_id
+        events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == "custom_event")
+        )
+        assert len(events) == 1
+
+
+def test_saving_states_reads_ids_once(hass_recorder):
+    """Test the ids are read when the session opens and after a conflicting insert."""
+    hass = hass_recorder()
+    instance = hass.data[DATA_INSTANCE]
+
+    with patch.object(
+        instance, "_setup_id_allocation", wraps=instance._setup_id_allocation
+    ) as mock_setup:
+        hass.states.set("test.one", "on", {})
+        wait_recording_done(hass)
+        hass.states.set("test.one", "off", {})
+        wait_recording_done(hass)
+        assert not mock_setup.called
+
+        # A row written outside of the recorder takes the next event id
+        with session_scope(hass=hass) as session:
+            session.add(Events(origin="LOCAL", time_fired=dt_util.utcnow()))
+
+        hass.states.set("test.one", "on", {})
+        wait_recording_done(hass)
+        assert len(mock_setup.mock_calls) == 1
+
+    with session_scope(hass=hass) as session:
+        assert session.query(States).count() == 3
+
+
+def test_saving_state_shares_attributes(hass_recorder):
+    """Test identical attributes are stored once."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {"big": "attributes"})
+    hass.states.set("test.one", "off", {"big": "attributes"})
+    wait_recording_done(hass)
+    hass.states.set("test.two", "on", {"big": "attributes"})
+    hass.states.set("test.two", "off", {"other": "attributes"})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert len(states) == 4
+        assert all(state.attributes is None for state in states)
+        assert (
+            states[0].attributes_id
+            == states[1].attributes_id
+            == states[2].attributes_id
+        )
+        assert states[3].attributes_id != states[0].attributes_id
+        assert session.query(StateAttributes).count() == 2
+        assert states[2].to_native().attributes == {"big": "attributes"}
+        assert states[3].to_native().attributes == {"other": "attributes"}
+
+
+def test_saving_state_reuses_stored_attributes(hass_recorder):
+    """Test attributes stored before the cache was cleared are reused."""
+    hass = hass_recorder()
+
+    hass.states.set("test.one", "on", {"big": "attributes"})
+    wait_recording_done(hass)
+    hass.data[DATA_INSTANCE]._shared_ids[StateAttributes].clear()
+    hass.states.set("test.one", "off", {"big": "attributes"})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        states = list(session.query(States))
+        assert len(states) == 2
+        assert states[0].attributes_id == states[1].attributes_id
+        assert session.query(StateAttributes).count() == 1
+
+
+def test_saving_event_shares_type_and_data(hass_recorder):
+    """Test event types and identical event data are stored once."""
+    hass = hass_recorder()
+
+    hass.bus.fire("test_event", {"big": "data"})
+    hass.bus.fire("test_event", {"big": "data"})
+    wait_recording_done(hass)
+    hass.data[DATA_INSTANCE]._shared_ids[EventTypes].clear()
+    hass.data[DATA_INSTANCE]._shared_ids[EventData].clear()
+    hass.bus.fire("test_event", {"big": "data"})
+    hass.bus.fire("test_event", {"other": "data"})
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == "test_event")
+        )
+        assert len(events) == 4
+        assert all(event.event_type is None for event in events)
+        assert all(event.event_data is None for event in events)
+        assert len({event.event_type_id for event in events}) == 1
+        assert events[0].data_id == events[1].data_id == events[2].data_id
+        assert events[3].data_id != events[0].data_id
+        assert events[2].to_native().data == {"big": "data"}
+        assert events[3].to_native().data == {"other": "data"}
+        assert (
+            session.query(EventTypes)
+            .filter(EventTypes.event_type == "test_event")
+            .count()
+            == 1
+        )
+
+
 def test_saving_state_with_serializable_data(hass_recorder, caplog):
     """Test saving data that cannot be serialized does not crash."""
     hass = hass_recorder()
@@ -571,7 +802,11 @@ def test_service_disable_events_not_recording(hass, hass_recorder):
     event = events[0]
 
     with session_scope(hass=hass) as session:
-        db_events = list(session.query(Events).filter_by(event_type=event_type))
+        db_events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == event_type)
+        )
         assert len(db_events) == 0
 
     assert hass.services.call(
@@ -590,7 +825,11 @@ def test_service_disable_events_not_recording(hass, hass_recorder):
     assert events[0].data != events[1].data
 
     with session_scope(hass=hass) as session:
-        db_events = list(session.query(Events).filter_by(event_type=event_type))
+        db_events = list(
+            session.query(Events)
+            .join(EventTypes)
+            .filter(EventTypes.event_type == event_type)
+        )
         assert len(db_events) == 1
         db_event = db_events[0].to_native()
 
@@ -1,11 +1,23 @@
 """Test data purging."""
 from datetime import datetime, timedelta
 import json
+from unittest.mock import patch
 
+import pytest
 from sqlalchemy.orm.session import Session
+import voluptuous as vol
 
 from homeassistant.components import recorder
-from homeassistant.components.recorder.models import Events, RecorderRuns, States
+from homeassistant.components.recorder.models import (
+    EventData,
+    EventEntities,
+    Events,
+    EventTypes,
+    RecorderPurge,
+    RecorderRuns,
+    StateAttributes,
+    States,
+)
 from homeassistant.components.recorder.purge import purge_old_data
 from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import EVENT_STATE_CHANGED
@@ -71,6 +83,101 @@ async def test_purge_old_events(
         assert events.count() == 2
 
 
+async def test_purge_in_chunks(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test the purge deletes ranges of ids and keeps its progress."""
+    instance = await async_setup_recorder_instance(hass)
+
+    await _add_test_states(hass, instance)
+
+    with patch(
+        "homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2
+    ), session_scope(hass=hass) as session:
+        states = session.query(States).filter(States.entity_id == "test.recorder2")
+        assert states.count() == 6
+
+        assert not purge_old_data(instance, 4, repack=False)
+        assert states.count() == 4
+        progress = session.query(RecorderPurge).one()
+        assert progress.keep_days == 4
+        assert progress.states_deleted == 2
+        last_state_id = progress.last_state_id
+        assert progress.state_cursor <= last_state_id
+        assert instance.purge_progress["percentage"] < 100
+        assert not instance.purge_progress["finished"]
+
+        assert not purge_old_data(instance, 4, repack=False)
+        assert states.count() == 2
+        session.expire_all()
+        progress = session.query(RecorderPurge).one()
+        assert progress.last_state_id == last_state_id
+        assert progress.states_deleted == 4
+
+        # A purge keeping more days continues the running purge
+        while not purge_old_data(instance, 10, repack=False):
+            pass
+        assert states.count() == 2
+        assert session.query(RecorderPurge).count() == 0
+        assert instance.purge_progress["finished"]
+        assert instance.purge_progress["percentage"] == 100
+        assert instance.purge_progress["states_deleted"] == 4
+
+
+async def test_purge_resumes_after_restart(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test an unfinished purge is queued again when the recorder starts."""
+    instance = await async_setup_recorder_instance(hass)
+
+    await _add_test_states(hass, instance)
+
+    with patch("homeassistant.components.recorder.purge.MAX_ROWS_TO_PURGE", 2):
+        assert not await hass.async_add_executor_job(purge_old_data, instance, 4, False)
+
+        await hass.async_add_executor_job(instance._resume_purge)
+        await async_wait_recording_done(hass, instance)
+        await async_wait_recording_done(hass, instance)
+
+    with session_scope(hass=hass) as session:
+        states = session.query(States).filter(States.entity_id == "test.recorder2")
+        assert states.count() == 2
+        assert session.query(RecorderPurge).count() == 0
+
+
+async def test_purge_progress_sensor(
+    hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
+):
+    """Test the purge reports its progress with a sensor that is not recorded."""
+    instance = await async_setup_recorder_instance(hass)
+
+    await _add_test_states(hass, instance)
+    assert hass.states.get("sensor.recorder_purge") is None
+
+    await hass.services.async_call(
+        recorder.DOMAIN, recorder.SERVICE_PURGE, {"keep_days": 4}
+    )
+    await hass.async_block_till_done()
+    # The purge queues itself again until it has finished
+    await async_wait_recording_done(hass, instance)
+    await async_wait_recording_done(hass, instance)
+
+    state = hass.states.get("sensor.recorder_purge")
+    assert state.state == "100"
+    assert state.attributes["unit_of_measurement"] == "%"
+    assert state.attributes["finished"] is True
+    assert state.attributes["keep_days"] == 4
+    assert state.attributes["states_deleted"] == 4
+
+    with session_scope(hass=hass) as session:
+        assert (
+            session.query(States)
+            .filter(States.entity_id == "sensor.recorder_purge")
+            .count()
+            == 0
+        )
+
+
 async def test_purge_old_recorder_runs(
     hass: HomeAssistantType, async_setup_recorder_instance: SetupRecorderInstanceT
 ):
@@ -214,6 +321,164 @@ async def test_purge_edge_case(
         assert events.count() == 0
 
 
+async def test_purge_unused_state_attributes(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+):
+    """Test shared attributes are purged once no state references them."""
+
+    def _add_db_entries(hass: HomeAssistantType) -> None:
+        old = dt_util.utcnow() - timedelta(days=3)
+        new = dt_util.utcnow()
+        with recorder.session_scope(hass=hass) as session:
+            session.add(StateAttributes(attributes_id=1001, shared_attrs='{"a": 1}'))
+            session.add(StateAttributes(attributes_id=1002, shared_attrs='{"a": 2}'))
+            for event_id, timestamp, attributes_id in (
+                (1001, old, 1001),
+                (1002, old, 1002),
+                (1003, new, 1002),
+            ):
+                session.add(
+                    Events(
+                        event_id=event_id,
+                        event_type=EVENT_STATE_CHANGED,
+                        event_data="{}",
+                        origin="LOCAL",
+                        created=timestamp,
+                        time_fired=timestamp,
+                    )
+                )
+                session.add(
+                    States(
+                        entity_id="sensor.attributes",
+                        domain="sensor",
+                        state="on",
+                        attributes_id=attributes_id,
+                        last_changed=timestamp,
+                        last_updated=timestamp,
+                        created=timestamp,
+                        event_id=event_id,
+                    )
+                )
+
+    instance = await async_setup_recorder_instance(hass)
+    await hass.async_add_executor_job(_add_db_entries, hass)
+
+    await hass.services.async_call(
+        recorder.DOMAIN, recorder.SERVICE_PURGE, {"keep_days": 2}
+    )
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass, instance)
+
+    with session_scope(hass=hass) as session:
+        states = session.query(States).filter(States.entity_id == "sensor.attributes")
+        assert states.count() == 1
+        assert states.first().to_native().attributes == {"a": 2}
+        attributes_ids = [
+            row.attributes_id for row in session.query(StateAttributes).all()
+        ]
+        assert 1001 not in attributes_ids
+        assert 1002 in attributes_ids
+
+
+async def test_purge_unused_event_data(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+):
+    """Test shared event data is purged once no event references it."""
+
+    def _add_db_entries(hass: HomeAssistantType) -> None:
+        old = dt_util.utcnow() - timedelta(days=3)
+        new = dt_util.utcnow()
+        with recorder.session_scope(hass=hass) as session:
+            session.add(EventTypes(event_type_id=1001, event_type="EVENT_SHARED"))
+            session.add(EventData(data_id=1001, shared_data='{"a": 1}'))
+            session.add(EventData(data_id=1002, shared_data='{"a": 2}'))
+            for event_id, timestamp, data_id in (
+                (1001, old, 1001),
+                (1002, old, 1002),
+                (1003, new, 1002),
+            ):
+                session.add(
+                    Events(
+                        event_id=event_id,
+                        event_type_id=1001,
+                        data_id=data_id,
+                        origin="LOCAL",
+                        created=timestamp,
+                        time_fired=timestamp,
+                    )
+                )
+                session.add(EventEntities(event_id=event_id, entity_id="light.test"))
+
+    instance = await async_setup_recorder_instance(hass)
+    await hass.async_add_executor_job(_add_db_entries, hass)
+
+    await hass.services.async_call(
+        recorder.DOMAIN, recorder.SERVICE_PURGE, {"keep_days": 2}
+    )
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass, instance)
+
+    with session_scope(hass=hass) as session:
+        events = session.query(Events).filter(Events.event_type_id == 1001)
+        assert events.count() == 1
+        event = events.first().to_native()
+        assert event.event_type == "EVENT_SHARED"
+        assert event.data == {"a": 2}
+        data_ids = [row.data_id for row in session.query(EventData).all()]
+        assert 1001 not in data_ids
+        assert 1002 in data_ids
+        event_ids = [row.event_id for row in session.query(EventEntities).all()]
+        assert event_ids == [1003]
+
+
+async def test_purge_filtered_shared_event_types(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+):
+    """Test filtered events stored with a shared event type are purged."""
+    config: ConfigType = {"exclude": {"event_types": ["EVENT_PURGE"]}}
+    instance = await async_setup_recorder_instance(hass, config)
+
+    def _add_db_entries(hass: HomeAssistantType) -> None:
+        timestamp = dt_util.utcnow() - timedelta(days=1)
+        with recorder.session_scope(hass=hass) as session:
+            session.add(EventTypes(event_type_id=1001, event_type="EVENT_PURGE"))
+            session.add(EventTypes(event_type_id=1002, event_type="EVENT_KEEP"))
+            for event_id in range(1000, 1020):
+                session.add(
+                    Events(
+                        event_id=event_id,
+                        event_type_id=1001 if event_id % 2 else 1002,
+                        origin="LOCAL",
+                        created=timestamp,
+                        time_fired=timestamp,
+                    )
+                )
+
+    await hass.async_add_executor_job(_add_db_entries, hass)
+
+    with session_scope(hass=hass) as session:
+        events_purge = session.query(Events).filter(Events.event_type_id == 1001)
+        events_keep = session.query(Events).filter(Events.event_type_id == 1002)
+        assert events_purge.count() == 10
+        assert events_keep.count() == 10
+
+        await hass.services.async_call(
+            recorder.DOMAIN,
+            recorder.SERVICE_PURGE,
+            {"keep_days": 10, "apply_filter": True},
+        )
+        await hass.async_block_till_done()
+
+        await async_recorder_block_till_done(hass, instance)
+        await async_wait_recording_done(hass, instance)
+
+        assert events_purge.count() == 0
+        assert events_keep.count() == 10
+
+
 async def test_purge_filtered_states(
     hass: HomeAssistantType,
     async_setup_recorder_instance: SetupRecorderInstanceT,
@@ -359,6 +624,83 @@ async def test_purge_filtered_states(
         session.query(States).get(73).old_state_id == 62  # should have been keeped
 
 
+async def test_purge_retention(
+    hass: HomeAssistantType,
+    async_setup_recorder_instance: SetupRecorderInstanceT,
+):
+    """Test states are purged by their retention policies."""
+    config: ConfigType = {
+        "retention": {
+            "domains": {"sensor": 2},
+            "entity_globs": {"binary_sensor.*_motion": 1},
+            "entities": {"sensor.important": 5},
+        }
+    }
+    instance = await async_setup_recorder_instance(hass, config)
+    assert instance.retention("sensor.temperature") == 2
+    assert instance.retention("sensor.important") == 5
+    assert instance.retention("binary_sensor.hall_motion") == 1
+    assert instance.retention("light.kitchen") is None
+
+    def _add_db_entries(hass: HomeAssistantType) -> None:
+        with recorder.session_scope(hass=hass) as session:
+            event_id = 1000
+            for entity_id, ages in (
+                ("sensor.temperature", (1, 3)),
+                ("sensor.important", (3, 6)),
+                ("binary_sensor.hall_motion", (0, 2)),
+                ("light.kitchen", (3, 6)),
+            ):
+                for age in ages:
+                    timestamp = dt_util.utcnow() - timedelta(days=age, hours=1)
+                    for _ in range(5):
+                        _add_state_and_state_changed_event(
+                            session, entity_id, "on", timestamp, event_id
+                        )
+                        event_id += 1
+
+    _add_db_entries(hass)
+
+    with session_scope(hass=hass) as session:
+        states = session.query(States)
+        events = session.query(Events).filter(Events.event_type == EVENT_STATE_CHANGED)
+        assert states.count() == 40
+        assert events.count() == 40
+
+        # The policies are applied in chunks after the regular purge
+        with patch.object(recorder.purge, "MAX_ROWS_TO_PURGE", 2):
+            calls = 1
+            while not purge_old_data(instance, 10, repack=False):
+                calls += 1
+        assert calls > 7
+
+        assert states.count() == 25
+        assert events.count() == 25
+        for entity_id, count in (
+            ("sensor.temperature", 5),
+            ("sensor.important", 5),
+            ("binary_sensor.hall_motion", 5),
+            ("light.kitchen", 10),
+        ):
+            assert states.filter(States.entity_id == entity_id).count() == count
+
+
+def test_retention_longer_than_purge_keep_days():
+    """Test retention policies can not keep more days than purge_keep_days."""
+    recorder.CONFIG_SCHEMA(
+        {"recorder": {"purge_keep_days": 5, "retention": {"domains": {"sensor": 5}}}}
+    )
+    with pytest.raises(vol.Invalid):
+        recorder.CONFIG_SCHEMA(
+            {
+                "recorder": {
+                    "purge_keep_days": 5,
+                    "retention": {"entities": {"sensor.important": 6}},
+                }
+            }
+        )
+
+
 async def test_purge_filtered_events(
     hass: HomeAssistantType,
     async_setup_recorder_instance: SetupRecorderInstanceT,
@@ -0,0 +1,157 @@
+"""The tests for the recorder statistics."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from pytest import approx
+
+from homeassistant.components.recorder.const import DATA_INSTANCE
+from homeassistant.components.recorder.models import (
+    Statistics,
+    StatisticsMeta,
+    StatisticsShortTerm,
+)
+from homeassistant.components.recorder.statistics import (
+    PERIOD_5MINUTE,
+    PERIOD_HOUR,
+    list_statistic_ids,
+    statistics_during_period,
+)
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+import homeassistant.util.dt as dt_util
+
+from .common import wait_recording_done
+
+TEMPERATURE = {ATTR_UNIT_OF_MEASUREMENT: "°C"}
+
+
+def _set_states(hass, zero, states):
+    """Set states at minutes after zero."""
+    for minutes, entity_id, state, attributes in states:
+        with patch(
+            "homeassistant.core.dt_util.utcnow",
+            return_value=zero + timedelta(minutes=minutes),
+        ):
+            hass.states.set(entity_id, state, attributes)
+    wait_recording_done(hass)
+
+
+def _compile(hass, start):
+    """Compile the statistics that ended before start."""
+    hass.data[DATA_INSTANCE].do_adhoc_statistics(start=start)
+    wait_recording_done(hass)
+
+
+def test_compile_statistics(hass_recorder):
+    """Test time weighted statistics are compiled per period."""
+    hass = hass_recorder()
+    zero = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=2
+    )
+    _set_states(
+        hass,
+        zero,
+        [
+            (1, "sensor.temperature", "10", TEMPERATURE),
+            (3, "sensor.temperature", "20", TEMPERATURE),
+            (4, "sensor.temperature", "30", TEMPERATURE),
+            (1, "sensor.text", "on", TEMPERATURE),
+            (1, "sensor.no_unit", "10", {}),
+            (1, "input_number.temperature", "10", TEMPERATURE),
+        ],
+    )
+
+    _compile(hass, zero + timedelta(minutes=5))
+    stats = statistics_during_period(hass, zero, period=PERIOD_5MINUTE)
+    assert stats == {
+        "sensor.temperature": [
+            {
+                "statistic_id": "sensor.temperature",
+                "start": zero,
+                "mean": approx(17.5),
+                "min": 10.0,
+                "max": 30.0,
+            }
+        ]
+    }
+    assert statistics_during_period(hass, zero, period=PERIOD_HOUR) == {}
+
+    _compile(hass, zero + timedelta(hours=1))
+    stats = statistics_during_period(hass, zero, period=PERIOD_5MINUTE)
+    assert len(stats["sensor.temperature"]) == 12
+    assert stats["sensor.temperature"][-1] == {
+        "statistic_id": "sensor.temperature",
+        "start": zero + timedelta(minutes=55),
+        "mean": approx(30.0),
+        "min": 30.0,
+        "max": 30.0,
+    }
+    stats = statistics_during_period(hass, zero, period=PERIOD_HOUR)
+    assert stats == {
+        "sensor.temperature": [
+            {
+                "statistic_id": "sensor.temperature",
+                "start": zero,
+                "mean": approx((10 * 120 + 20 * 60 + 30 * 3360) / 3540),
+                "min": 10.0,
+                "max": 30.0,
+            }
+        ]
+    }
+    assert list_statistic_ids(hass) == [
+        {"statistic_id": "sensor.temperature", "unit_of_measurement": "°C"}
+    ]
+
+
+def test_compile_statistics_skips_unavailable(hass_recorder):
+    """Test the time a sensor is not numeric is left out of the mean."""
+    hass = hass_recorder()
+    zero = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=2
+    )
+    _set_states(
+        hass,
+        zero,
+        [
+            (0, "sensor.temperature", "10", TEMPERATURE),
+            (1, "sensor.temperature", "unavailable", TEMPERATURE),
+            (4, "sensor.temperature", "40", TEMPERATURE),
+        ],
+    )
+
+    _compile(hass, zero + timedelta(minutes=10))
+    stats = statistics_during_period(hass, zero, period=PERIOD_5MINUTE)
+    assert stats["sensor.temperature"] == [
+        {
+            "statistic_id": "sensor.temperature",
+            "start": zero,
+            "mean": approx(25.0),
+            "min": 10.0,
+            "max": 40.0,
+        },
+        {
+            "statistic_id": "sensor.temperature",
+            "start": zero + timedelta(minutes=5),
+            "mean": approx(40.0),
+            "min": 40.0,
+            "max": 40.0,
+        },
+    ]
+
+
+def test_statistics_not_purged(hass_recorder):
+    """Test purging the recorder keeps the statistics."""
+    hass = hass_recorder()
+    zero = dt_util.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(
+        hours=2
+    )
+    _set_states(hass, zero, [(0, "sensor.temperature", "10", TEMPERATURE)])
+    _compile(hass, zero + timedelta(hours=1))
+
+    hass.data[DATA_INSTANCE].do_adhoc_purge(keep_days=0)
+    wait_recording_done(hass)
+
+    with session_scope(hass=hass) as session:
+        assert session.query(StatisticsMeta).count() == 1
+        assert session.query(StatisticsShortTerm).count() == 12
+        assert session.query(Statistics).count() == 1
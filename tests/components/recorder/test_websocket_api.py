@@ -0,0 +1,35 @@
+"""The tests for the recorder websocket API."""
+from homeassistant.components.recorder.const import MAX_BATCH_SIZE
+
+from tests.common import async_init_recorder_component
+
+
+async def test_recorder_info(hass, hass_ws_client):
+    """Test getting the recorder status."""
+    await async_init_recorder_component(hass)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    await client.send_json({"id": 1, "type": "recorder/info"})
+    response = await client.receive_json()
+
+    assert response["success"]
+    assert response["result"] == {
+        "backlog": 0,
+        "max_batch_size": MAX_BATCH_SIZE,
+        "thread_running": True,
+    }
+
+
+async def test_recorder_info_requires_admin(hass, hass_ws_client, hass_admin_user):
+    """Test the recorder status is only available to admins."""
+    hass_admin_user.groups = []
+    await async_init_recorder_component(hass)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client()
+    await client.send_json({"id": 1, "type": "recorder/info"})
+    response = await client.receive_json()
+
+    assert not response["success"]
+    assert response["error"]["code"] == "unauthorized"
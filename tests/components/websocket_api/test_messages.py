@@ -1,16 +1,20 @@
 """Test Websocket API messages module."""
 
+import json
+from unittest.mock import patch
+
 from homeassistant.components.websocket_api.messages import (
-    _cached_event_message as lru_event_cache,
     cached_event_message,
     message_to_json,
+    states_result_message,
 )
 from homeassistant.const import EVENT_STATE_CHANGED
 from homeassistant.core import callback
+from homeassistant.helpers.json import JSONEncoder
 
 
 async def test_cached_event_message(hass):
-    """Test that we cache event messages."""
+    """Test that we serialize events once."""
 
     events = []
 
@@ -25,30 +29,29 @@ async def test_cached_event_message(hass):
     await hass.async_block_till_done()
 
     assert len(events) == 2
-    lru_event_cache.cache_clear()
 
-    msg0 = cached_event_message(2, events[0])
-    assert msg0 == cached_event_message(2, events[0])
+    with patch("homeassistant.core._json_dumps", wraps=json.dumps) as mock_json_dumps:
+        msg0 = cached_event_message(2, events[0])
+        calls = mock_json_dumps.call_count
+        assert msg0 == cached_event_message(2, events[0])
+        assert mock_json_dumps.call_count == calls
 
-    msg1 = cached_event_message(2, events[1])
-    assert msg1 == cached_event_message(2, events[1])
+        # The new state of the first event is the old state of the second
+        msg1 = cached_event_message(2, events[1])
+        assert msg1 == cached_event_message(2, events[1])
+        assert mock_json_dumps.call_count == 2 * calls - 1
 
     assert msg0 != msg1
-
-    cache_info = lru_event_cache.cache_info()
-    assert cache_info.hits == 2
-    assert cache_info.misses == 2
-    assert cache_info.currsize == 2
-
-    cached_event_message(2, events[1])
-    cache_info = lru_event_cache.cache_info()
-    assert cache_info.hits == 3
-    assert cache_info.misses == 2
-    assert cache_info.currsize == 2
+    assert json.loads(msg0) == {
+        "id": 2,
+        "type": "event",
+        "event": json.loads(json.dumps(events[0].as_dict(), cls=JSONEncoder)),
+    }
+    assert json.loads(msg1)["event"]["data"]["old_state"]["state"] == "on"
 
 
 async def test_cached_event_message_with_different_idens(hass):
-    """Test that we cache event messages when the subscrition idens differ."""
+    """Test that we share the event json when the subscription idens differ."""
 
     events = []
 
@@ -63,19 +66,34 @@ async def test_cached_event_message_with_different_idens(hass):
 
     assert len(events) == 1
 
-    lru_event_cache.cache_clear()
-
     msg0 = cached_event_message(2, events[0])
     msg1 = cached_event_message(3, events[0])
     msg2 = cached_event_message(4, events[0])
 
     assert msg0 != msg1
     assert msg0 != msg2
+    assert [json.loads(msg)["id"] for msg in (msg0, msg1, msg2)] == [2, 3, 4]
+    assert json.loads(msg0)["event"] == json.loads(msg1)["event"]
+
 
-    cache_info = lru_event_cache.cache_info()
-    assert cache_info.hits == 2
-    assert cache_info.misses == 1
-    assert cache_info.currsize == 1
+async def test_states_result_message(hass):
+    """Test the states result reuses the json of the states."""
+    hass.states.async_set("light.window", "on")
+    hass.states.async_set("light.nan", "on", {"value": float("nan")})
+    state = hass.states.get("light.window")
+
+    msg = states_result_message(1, [state])
+    assert state.as_json() in msg
+    assert json.loads(msg) == {
+        "id": 1,
+        "type": "result",
+        "success": True,
+        "result": [json.loads(state.as_json())],
+    }
+
+    msg = json.loads(states_result_message(1, hass.states.async_all()))
+    assert not msg["success"]
+    assert msg["error"]["code"] == "unknown_error"
 
 
 async def test_message_to_json(caplog):
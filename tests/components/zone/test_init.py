@@ -1,4 +1,5 @@
 """Test zone component."""
+import random
 from unittest.mock import patch
 
 import pytest
@@ -503,3 +504,75 @@ async def test_unavailable_zone(hass):
     assert zone.async_active_zone(hass, 0.0, 0.01) is None
 
     assert zone.in_zone(hass.states.get("zone.bla"), 0, 0) is False
+
+
+async def test_active_zone_index_matches_all_zones(hass):
+    """Test the zone index finds the same zone as checking every zone."""
+    rnd = random.Random(42)
+    zones = [
+        {
+            "name": f"Zone {idx}",
+            "latitude": 52 + rnd.uniform(-0.5, 0.5),
+            "longitude": 4 + rnd.uniform(-0.5, 0.5),
+            "radius": rnd.choice([50, 200, 1000, 5000, 50000]),
+        }
+        for idx in range(200)
+    ]
+    assert await setup.async_setup_component(hass, DOMAIN, {"zone": zones})
+
+    def _active_zone(latitude, longitude, radius):
+        """Return the active zone by checking every zone."""
+        with patch.object(zone.ZoneIndex, "nearby_zones", autospec=True) as mock:
+            mock.side_effect = lambda index, *args: index.zones
+            return zone.async_active_zone(hass, latitude, longitude, radius)
+
+    for _ in range(200):
+        latitude = 52 + rnd.uniform(-0.6, 0.6)
+        longitude = 4 + rnd.uniform(-0.6, 0.6)
+        radius = rnd.choice([0, 10, 100, 2000])
+        assert zone.async_active_zone(
+            hass, latitude, longitude, radius
+        ) == _active_zone(latitude, longitude, radius)
+
+
+async def test_active_zone_index_updated_on_zone_change(hass):
+    """Test the zone index is rebuilt when a zone changes."""
+    assert await setup.async_setup_component(hass, DOMAIN, {"zone": {}})
+    assert zone.async_active_zone(hass, 10.0, 10.0) is None
+
+    hass.states.async_set(
+        "zone.moved", "0", {"latitude": 10.0, "longitude": 10.0, "radius": 100}
+    )
+    await hass.async_block_till_done()
+    assert zone.async_active_zone(hass, 10.0, 10.0).entity_id == "zone.moved"
+
+    hass.states.async_set(
+        "zone.moved", "0", {"latitude": 20.0, "longitude": 20.0, "radius": 100}
+    )
+    await hass.async_block_till_done()
+    assert zone.async_active_zone(hass, 10.0, 10.0) is None
+
+    hass.states.async_remove("zone.moved")
+    await hass.async_block_till_done()
+    assert zone.async_active_zone(hass, 20.0, 20.0) is None
+
+
+async def test_active_zone_index_updated_by_zone_entity(hass):
+    """Test a zone entity change is seen by a lookup in the same tick."""
+    assert await setup.async_setup_component(hass, DOMAIN, {"zone": {}})
+    storage_collection = hass.data[DOMAIN]
+    assert zone.async_active_zone(hass, 10.0, 10.0) is None
+
+    item = await storage_collection.async_create_item(
+        {"name": "moved", "latitude": 10.0, "longitude": 10.0, "radius": 100}
+    )
+    assert zone.async_active_zone(hass, 10.0, 10.0).entity_id == "zone.moved"
+
+    await storage_collection.async_update_item(
+        item["id"], {"latitude": 20.0, "longitude": 20.0}
+    )
+    assert zone.async_active_zone(hass, 10.0, 10.0) is None
+    assert zone.async_active_zone(hass, 20.0, 20.0).entity_id == "zone.moved"
+
+    await storage_collection.async_delete_item(item["id"])
+    assert zone.async_active_zone(hass, 20.0, 20.0) is None
@@ -2130,35 +2130,72 @@ def test_urlencode(hass):
     assert tpl.async_render() == "the%20quick%20brown%20fox%20%3D%20true"
 
 
-async def test_cache_garbage_collection():
-    """Test caching a template."""
+async def test_compile_cache_shared_between_templates(hass):
+    """Test compiled code is shared by templates with the same source."""
+    template._COMPILE_CACHE.clear()
     template_string = (
         "{% set dict = {'foo': 'x&y', 'bar': 42} %} {{ dict | urlencode }}"
     )
-    tpl = template.Template(
-        (template_string),
-    )
+    tpl = template.Template(template_string)
     tpl.ensure_valid()
-    assert template._NO_HASS_ENV.template_cache.get(
-        template_string
-    )  # pylint: disable=protected-access
+    assert template.compile_cache_info()["misses"] == 1
 
-    tpl2 = template.Template(
-        (template_string),
-    )
+    tpl2 = template.Template(template_string)
     tpl2.ensure_valid()
-    assert template._NO_HASS_ENV.template_cache.get(
-        template_string
-    )  # pylint: disable=protected-access
-
-    del tpl
-    assert template._NO_HASS_ENV.template_cache.get(
-        template_string
-    )  # pylint: disable=protected-access
-    del tpl2
-    assert not template._NO_HASS_ENV.template_cache.get(
-        template_string
-    )  # pylint: disable=protected-access
+    assert tpl2._compiled_code is tpl._compiled_code
+    info = template.compile_cache_info()
+    assert info["hits"] == 1
+    assert info["size"] == 1
+
+    # Compiled code outlives the templates, so reloads can reuse it
+    del tpl, tpl2
+    tpl3 = template.Template(template_string)
+    tpl3.ensure_valid()
+    assert template.compile_cache_info()["hits"] == 2
+
+    # Environments with hass cache their code apart from the one without
+    template.Template(template_string, hass).async_render()
+    template.Template(template_string, hass).async_render(limited=True)
+    info = template.compile_cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 3
+    assert info["size"] == 2
+
+
+async def test_compile_cache_invalidated_on_environment_change(hass):
+    """Test cached code is dropped when the environment filters change."""
+    template._COMPILE_CACHE.clear()
+    template_string = "{{ 'x' | missing_filter }}"
+    with pytest.raises(TemplateError):
+        template.Template(template_string, hass).async_render()
+
+    template.Template("{{ 1 }}", hass).async_render()
+    env = hass.data[template._ENVIRONMENT]
+    signature = env.compile_signature()
+    assert env.compile_signature() is signature
+    env.filters["missing_filter"] = lambda value: value * 2
+    assert "missing_filter" in env.compile_signature()
+    try:
+        assert template.Template(template_string, hass).async_render() == "xx"
+        assert template.Template("{{ 1 }}", hass).async_render() == 1
+        assert template.compile_cache_info()["hits"] == 0
+    finally:
+        del env.filters["missing_filter"]
+    assert env.compile_signature() == signature
+
+
+def test_compile_cache_bounded():
+    """Test the compile cache evicts the least recently used code."""
+    cache = template.CompileCache(2)
+    code = compile("1", "<test>", "eval")
+    cache.set(("a", None), frozenset(), code)
+    cache.set(("b", None), frozenset(), code)
+    assert cache.get(("a", None), frozenset()) is code
+    cache.set(("c", None), frozenset(), code)
+    assert cache.get(("b", None), frozenset()) is None
+    assert cache.get(("a", None), frozenset()) is code
+    assert cache.get(("a", None), frozenset({"round"})) is None
+    assert cache.info() == {"hits": 2, "misses": 2, "size": 2, "maxsize": 2}
 
 
 def test_is_template_string():
@@ -3,6 +3,7 @@
 import asyncio
 from datetime import datetime, timedelta
 import functools
+import json
 import logging
 import os
 from tempfile import TemporaryDirectory
@@ -34,10 +35,12 @@ from homeassistant.const import (
 )
 import homeassistant.core as ha
 from homeassistant.exceptions import (
+    HomeAssistantError,
     InvalidEntityFormatError,
     InvalidStateError,
     ServiceNotFound,
 )
+from homeassistant.helpers.json import JSONEncoder
 import homeassistant.util.dt as dt_util
 from homeassistant.util.unit_system import METRIC_SYSTEM
 
@@ -360,6 +363,29 @@ def test_state_as_dict():
     assert state.as_dict() is state.as_dict()
 
 
+def test_state_and_event_as_json():
+    """Test the JSON of states and events is serialized once."""
+    state = ha.State("happy.happy", "on", {"pig": "dog"})
+    assert json.loads(state.as_json()) == json.loads(
+        json.dumps(state.as_dict(), cls=JSONEncoder)
+    )
+    assert state.as_json() is state.as_json()
+
+    event = ha.Event(
+        EVENT_STATE_CHANGED,
+        {"entity_id": "happy.happy", "old_state": None, "new_state": state},
+    )
+    assert state.as_json() in event.as_json()
+    assert json.loads(event.as_json()) == json.loads(
+        json.dumps(event.as_dict(), cls=JSONEncoder)
+    )
+    assert event.as_json() is event.as_json()
+
+    state = ha.State("happy.happy", "on", {"pig": float("nan")})
+    with pytest.raises(ValueError):
+        state.as_json()
+
+
 async def test_eventbus_add_remove_listener(hass):
     """Test remove_listener method."""
     old_count = len(hass.bus.async_listeners())
@@ -408,6 +434,64 @@ async def test_eventbus_filtered_listener(hass):
     unsub()
 
 
+async def test_eventbus_keyed_listener(hass):
+    """Test listeners keyed by a value of the event data."""
+    calls = []
+    other_calls = []
+
+    @ha.callback
+    def listener(event):
+        """Mock listener."""
+        calls.append(event)
+
+    @ha.callback
+    def other_listener(event):
+        """Mock listener."""
+        other_calls.append(event)
+
+    unsub = hass.bus.async_listen_keyed(
+        "test", "device_id", ["device_1", "device_2"], listener
+    )
+    unsub_other = hass.bus.async_listen_keyed(
+        "test",
+        "domain",
+        "light",
+        other_listener,
+        event_filter=ha.callback(lambda event: event.data["service"] == "turn_on"),
+    )
+    assert hass.bus.async_listeners()["test"] == 2
+
+    hass.bus.async_fire("test")
+    hass.bus.async_fire("test", {"device_id": "device_3"})
+    hass.bus.async_fire("test", {"device_id": {"unhashable": True}})
+    hass.bus.async_fire("other", {"device_id": "device_1"})
+    await hass.async_block_till_done()
+    assert len(calls) == 0
+
+    hass.bus.async_fire("test", {"device_id": "device_1"})
+    hass.bus.async_fire("test", {"device_id": ["device_1", "device_2"]})
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+    hass.bus.async_fire("test", {"domain": "light", "service": "turn_off"})
+    hass.bus.async_fire("test", {"domain": "light", "service": "turn_on"})
+    await hass.async_block_till_done()
+    assert len(other_calls) == 1
+    assert other_calls[0].data["service"] == "turn_on"
+
+    unsub()
+    assert hass.bus.async_listeners()["test"] == 1
+    hass.bus.async_fire("test", {"device_id": "device_2"})
+    await hass.async_block_till_done()
+    assert len(calls) == 2
+
+    unsub_other()
+    assert "test" not in hass.bus.async_listeners()
+
+    with pytest.raises(HomeAssistantError):
+        hass.bus.async_listen_keyed(MATCH_ALL, "device_id", "device_1", listener)
+
+
 async def test_eventbus_unsubscribe_listener(hass):
     """Test unsubscribe listener from returned function."""
     calls = []
@@ -1478,6 +1562,51 @@ async def test_async_entity_ids_count(hass):
 
     assert hass.states.async_entity_ids_count() == 5
     assert hass.states.async_entity_ids_count("light") == 3
+    assert hass.states.async_entity_ids_count(["light", "switch"]) == 4
+    assert hass.states.async_entity_ids_count(("light", "climate")) == 3
+
+    hass.states.async_remove("switch.link")
+
+    assert hass.states.async_entity_ids_count(["light", "switch"]) == 3
+
+
+async def test_domain_filter_keeps_order(hass):
+    """Test filtering by domain keeps the order the states were added in."""
+    hass.states.async_set("light.bowl", "on")
+    hass.states.async_set("switch.link", "on")
+    hass.states.async_set("light.frog", "on")
+    hass.states.async_set("light.cow", "on")
+    hass.states.async_set("light.bowl", "off")
+    hass.states.async_remove("light.frog")
+    hass.states.async_set("light.frog", "off")
+    hass.states.async_remove("switch.link")
+
+    assert hass.states.async_entity_ids("LIGHT") == [
+        "light.bowl",
+        "light.cow",
+        "light.frog",
+    ]
+    assert [state.state for state in hass.states.async_all(["light"])] == [
+        "off",
+        "on",
+        "off",
+    ]
+    assert hass.states.async_entity_ids("switch") == []
+    assert hass.states.async_entity_ids_count("switch") == 0
+
+    hass.states.async_set("switch.link", "on")
+    assert hass.states.async_entity_ids(("light", "switch")) == [
+        "light.bowl",
+        "light.cow",
+        "light.frog",
+        "switch.link",
+    ]
+    assert hass.states.async_entity_ids(("switch", "light")) == [
+        "light.bowl",
+        "light.cow",
+        "light.frog",
+        "switch.link",
+    ]
 
 
 async def test_hassjob_forbid_coroutine():
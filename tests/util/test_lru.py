@@ -0,0 +1,64 @@
+"""Test the least recently used mapping."""
+from homeassistant.util.lru import LRU
+
+
+def test_lru_evicts_least_recently_used():
+    """Test the least recently used item is evicted when full."""
+    lru = LRU(2)
+    lru["a"] = 1
+    lru["b"] = 2
+    assert lru.get("a") == 1
+
+    lru["c"] = 3
+
+    assert len(lru) == 2
+    assert "a" in lru
+    assert "b" not in lru
+    assert lru.get("b") is None
+    assert lru.get("b", 5) == 5
+    assert lru.get("c") == 3
+
+
+def test_lru_set_existing_key_marks_used():
+    """Test updating an item marks it as recently used."""
+    lru = LRU(2)
+    lru["a"] = 1
+    lru["b"] = 2
+    lru["a"] = 10
+    lru["c"] = 3
+
+    assert lru.get("a") == 10
+    assert "b" not in lru
+
+
+def test_lru_pop_and_clear():
+    """Test removing items."""
+    lru = LRU(3)
+    lru["a"] = 1
+    lru["b"] = 2
+
+    assert lru.pop("a") == 1
+    assert lru.pop("a") is None
+    assert lru.pop("a", 5) == 5
+
+    lru.clear()
+    assert len(lru) == 0
+
+
+def test_lru_setdefault():
+    """Test setdefault only sets missing items."""
+    lru = LRU(2)
+    assert lru.setdefault("a", 1) == 1
+    assert lru.setdefault("a", 2) == 1
+    assert lru.setdefault(None, None) is None
+    assert None in lru
+
+
+def test_lru_items():
+    """Test the items are listed from least to most recently used."""
+    lru = LRU(3)
+    lru["a"] = 1
+    lru["b"] = 2
+    lru.get("a")
+
+    assert lru.items() == [("b", 2), ("a", 1)]